@@ -2,8 +2,11 @@
 from .det_inferencer import DetInferencer
 from .inference import (async_inference_detector, inference_detector,
                         inference_mot, init_detector, init_track_model)
+from .large_image_inference import inference_large_image, open_large_image
+from .stream_tracking import MultiStreamTracking
 
 __all__ = [
     'init_detector', 'async_inference_detector', 'inference_detector',
-    'DetInferencer', 'inference_mot', 'init_track_model'
+    'DetInferencer', 'inference_mot', 'init_track_model',
+    'MultiStreamTracking', 'inference_large_image', 'open_large_image'
 ]
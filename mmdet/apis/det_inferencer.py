@@ -1,8 +1,12 @@
 # Copyright (c) OpenMMLab. All rights reserved.
 import copy
+import glob
 import os.path as osp
 import warnings
-from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import (Dict, Iterable, Iterator, List, Optional, Sequence, Tuple,
+                    Union)
 
 import mmcv
 import mmengine
@@ -25,6 +29,7 @@ from mmdet.structures import DetDataSample
 from mmdet.structures.mask import encode_mask_results, mask2bbox
 from mmdet.utils import ConfigType
 from ..evaluation import get_classes
+from .inference import _prepare_batches
 
 try:
     from panopticapi.evaluation import VOID
@@ -40,6 +45,7 @@ ImgType = Union[np.ndarray, Sequence[np.ndarray]]
 
 IMG_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.ppm', '.bmp', '.pgm', '.tif',
                   '.tiff', '.webp')
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov', '.mkv', '.webm', '.flv')
 
 
 class DetInferencer(BaseInferencer):
@@ -233,6 +239,38 @@ class DetInferencer(BaseInferencer):
 
         return list(inputs)
 
+    def _inputs_to_iter(self, inputs: Union[InputsType, Iterable]) -> Iterable:
+        """Lazily expand the inputs to an iterable of images.
+
+        Unlike :meth:`_inputs_to_list`, nothing is read or listed ahead:
+
+        - Directory path: the image files in the directory
+        - Glob pattern, e.g. ``data/**/*.jpg``: the matched files
+        - Video file: the decoded frames
+        - np.ndarray or other strings: the input itself
+        - Other iterables, e.g. a list or a frame generator: the iterable
+
+        Args:
+            inputs (InputsType | Iterable): Inputs for the inferencer.
+
+        Returns:
+            Iterable: Iterable of inputs for the pipeline.
+        """
+        if isinstance(inputs, str):
+            backend = get_file_backend(inputs)
+            if hasattr(backend, 'isdir') and isdir(inputs):
+                return (join_path(inputs, filename)
+                        for filename in list_dir_or_file(
+                            inputs, list_dir=False, suffix=IMG_EXTENSIONS))
+            if glob.has_magic(inputs):
+                return glob.iglob(inputs, recursive=True)
+            if inputs.lower().endswith(VIDEO_EXTENSIONS):
+                return mmcv.VideoReader(inputs)
+            return [inputs]
+        if isinstance(inputs, np.ndarray):
+            return [inputs]
+        return inputs
+
     def preprocess(self, inputs: InputsType, batch_size: int = 1, **kwargs):
         """Process the inputs into a model-feedable format.
 
@@ -292,9 +330,8 @@ class DetInferencer(BaseInferencer):
                     yield chunk_data
                 break
 
-    # TODO: Video and Webcam are currently not supported and
-    #  may consume too much memory if your input folder has a lot of images.
-    #  We will be optimized later.
+    # NOTE: All the inputs and results are kept in memory. Use `stream` for
+    #  videos, webcams and folders with a lot of images.
     def __call__(
             self,
             inputs: InputsType,
@@ -425,6 +462,129 @@ class DetInferencer(BaseInferencer):
                 results_dict['visualization'].extend(results['visualization'])
         return results_dict
 
+    def stream(self,
+               inputs: Union[InputsType, Iterable],
+               batch_size: int = 1,
+               num_workers: int = 2,
+               num_prefetch_batches: int = 2,
+               return_vis: bool = False,
+               show: bool = False,
+               wait_time: int = 0,
+               no_save_vis: bool = False,
+               draw_pred: bool = True,
+               pred_score_thr: float = 0.3,
+               return_datasamples: bool = False,
+               print_result: bool = False,
+               no_save_pred: bool = True,
+               out_dir: str = '',
+               texts: Optional[str] = None,
+               stuff_texts: Optional[str] = None,
+               custom_entities: bool = False,
+               tokens_positive: Optional[Union[int, list]] = None,
+               **kwargs) -> Iterator[dict]:
+        """Run the inferencer on a stream of inputs and yield the results of
+        every chunk.
+
+        Different from :meth:`__call__`, the inputs are read lazily and the
+        results are not accumulated, so the memory usage does not grow with
+        the number of inputs. Besides the inputs accepted by
+        :meth:`__call__`, video files, glob patterns and any iterable of
+        images such as a webcam frame generator are supported. The next
+        chunks are loaded and pre-processed by ``num_workers`` threads while
+        the model runs, and the visualization and dumping of a chunk run in a
+        background thread while the next chunk is forwarded.
+
+        Args:
+            inputs (InputsType | Iterable): Inputs for the inferencer.
+            batch_size (int): Inference batch size. Defaults to 1.
+            num_workers (int): Number of threads running the test pipeline.
+                If 0, the pipeline runs in the main thread. Defaults to 2.
+            num_prefetch_batches (int): Maximum number of chunks prepared
+                ahead of the forward and of chunks waiting for their
+                visualization. Defaults to 2.
+            texts (str, optional): Text prompt of all inputs. Per-input
+                prompts can be given by dict inputs. Defaults to None.
+            stuff_texts (str, optional): Stuff text prompt of all inputs of
+                open panoptic task. Defaults to None.
+            **kwargs: See :meth:`__call__` for the other arguments.
+
+        Yields:
+            dict: Inference and visualization results of a chunk, with keys
+            ``predictions`` and ``visualization``.
+        """
+        (
+            preprocess_kwargs,
+            forward_kwargs,
+            visualize_kwargs,
+            postprocess_kwargs,
+        ) = self._dispatch_kwargs(**kwargs)
+
+        def prepare_data(inputs_):
+            if texts is not None:
+                inputs_ = {
+                    'text': texts,
+                    'img_path' if isinstance(inputs_, str) else 'img': inputs_,
+                    'custom_entities': custom_entities,
+                    'tokens_positive': tokens_positive
+                }
+                if stuff_texts is not None:
+                    inputs_['stuff_text'] = stuff_texts
+            if isinstance(inputs_, dict):
+                ori_inputs_ = inputs_.get('img', inputs_.get('img_path'))
+                # dicts built above are not shared, only copy user inputs
+                if texts is None:
+                    inputs_ = copy.deepcopy(inputs_)
+                return ori_inputs_, self.pipeline(inputs_)
+            return inputs_, self.pipeline(inputs_)
+
+        def visualize_and_postprocess(ori_imgs, preds):
+            visualization = self.visualize(
+                ori_imgs,
+                preds,
+                return_vis=return_vis,
+                show=show,
+                wait_time=wait_time,
+                draw_pred=draw_pred,
+                pred_score_thr=pred_score_thr,
+                no_save_vis=no_save_vis,
+                img_out_dir=out_dir,
+                **visualize_kwargs)
+            return self.postprocess(
+                preds,
+                visualization,
+                return_datasamples=return_datasamples,
+                print_result=print_result,
+                no_save_pred=no_save_pred,
+                pred_out_dir=out_dir,
+                **postprocess_kwargs)
+
+        chunked_data = _prepare_batches(
+            self._inputs_to_iter(inputs), prepare_data, batch_size,
+            num_workers, num_prefetch_batches)
+        if show:
+            # windows can only be shown from the main thread
+            for chunk in chunked_data:
+                ori_imgs, data = self.collate_fn(chunk)
+                preds = self.forward(data, **forward_kwargs)
+                yield visualize_and_postprocess(ori_imgs, preds)
+            return
+
+        # A single thread keeps the visualized and dumped results in order
+        max_pending = max(num_prefetch_batches, 1)
+        with ThreadPoolExecutor(1) as executor:
+            pending = deque()
+            for chunk in chunked_data:
+                ori_imgs, data = self.collate_fn(chunk)
+                preds = self.forward(data, **forward_kwargs)
+                pending.append(
+                    executor.submit(visualize_and_postprocess, ori_imgs,
+                                    preds))
+                while pending and (pending[0].done()
+                                   or len(pending) > max_pending):
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
     def visualize(self,
                   inputs: InputsType,
                   preds: PredType,
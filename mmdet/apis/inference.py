@@ -1,8 +1,11 @@
 # Copyright (c) OpenMMLab. All rights reserved.
 import copy
+import itertools
 import warnings
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional, Sequence, Union
+from typing import Callable, Iterable, Iterator, Optional, Sequence, Union
 
 import numpy as np
 import torch
@@ -125,6 +128,9 @@ def inference_detector(
     test_pipeline: Optional[Compose] = None,
     text_prompt: Optional[str] = None,
     custom_entities: bool = False,
+    batch_size: int = 1,
+    num_workers: int = 0,
+    num_prefetch_batches: int = 2,
 ) -> Union[DetDataSample, SampleList]:
     """Inference image(s) with the detector.
 
@@ -133,6 +139,14 @@ def inference_detector(
         imgs (str, ndarray, Sequence[str/ndarray]):
            Either image files or loaded images.
         test_pipeline (:obj:`Compose`): Test pipeline.
+        batch_size (int): Number of images collated by the data
+            preprocessor and forwarded together. Defaults to 1.
+        num_workers (int): Number of threads running the test pipeline. If
+            larger than 0, the pipeline of the next batches runs while the
+            model forwards the current one. Defaults to 0.
+        num_prefetch_batches (int): Maximum number of batches processed by
+            the workers ahead of the model forward. Only used when
+            ``num_workers`` is larger than 0. Defaults to 2.
 
     Returns:
         :obj:`DetDataSample` or list[:obj:`DetDataSample`]:
@@ -164,9 +178,7 @@ def inference_detector(
                 m, RoIPool
             ), 'CPU inference with RoIPool is not supported currently.'
 
-    result_list = []
-    for i, img in enumerate(imgs):
-        # prepare data
+    def prepare_data(img):
         if isinstance(img, np.ndarray):
             # TODO: remove img_id.
             data_ = dict(img=img, img_id=0)
@@ -179,16 +191,20 @@ def inference_detector(
             data_['custom_entities'] = custom_entities
 
         # build the data pipeline
-        data_ = test_pipeline(data_)
+        return test_pipeline(data_)
 
-        data_['inputs'] = [data_['inputs']]
-        data_['data_samples'] = [data_['data_samples']]
+    result_list = []
+    for batch in _prepare_batches(imgs, prepare_data, batch_size, num_workers,
+                                  num_prefetch_batches):
+        data_ = dict(
+            inputs=[data['inputs'] for data in batch],
+            data_samples=[data['data_samples'] for data in batch])
 
         # forward the model
         with torch.no_grad():
-            results = model.test_step(data_)[0]
+            results = model.test_step(data_)
 
-        result_list.append(results)
+        result_list.extend(results)
 
     if not is_batch:
         return result_list[0]
@@ -196,6 +212,45 @@ def inference_detector(
         return result_list
 
 
+def _prepare_batches(imgs: Iterable, prepare_data: Callable, batch_size: int,
+                     num_workers: int,
+                     num_prefetch_batches: int) -> Iterator[list]:
+    """Run ``prepare_data`` on ``imgs`` and yield the results in batches of
+    ``batch_size``, keeping the order of ``imgs``.
+
+    ``imgs`` is consumed lazily. With ``num_workers > 0``, the data of at
+    most ``num_prefetch_batches`` batches is prepared by a thread pool ahead
+    of the batch being consumed, so that data loading and pre-processing
+    overlap with the model forward.
+    """
+    assert batch_size >= 1, \
+        f'batch_size should be at least 1, but got {batch_size}'
+    img_iter = iter(imgs)
+    if num_workers <= 0:
+        while True:
+            batch = [
+                prepare_data(img)
+                for img in itertools.islice(img_iter, batch_size)
+            ]
+            if not batch:
+                return
+            yield batch
+
+    max_pending = batch_size * (max(num_prefetch_batches, 0) + 1)
+    with ThreadPoolExecutor(num_workers) as executor:
+        pending = deque()
+        for img in itertools.islice(img_iter, max_pending):
+            pending.append(executor.submit(prepare_data, img))
+        while pending:
+            batch = []
+            while pending and len(batch) < batch_size:
+                batch.append(pending.popleft().result())
+                # refill the queue as soon as a slot is free
+                for img in itertools.islice(img_iter, 1):
+                    pending.append(executor.submit(prepare_data, img))
+            yield batch
+
+
 # TODO: Awaiting refactoring
 async def async_inference_detector(model, imgs):
     """Async inference image(s) with the detector.
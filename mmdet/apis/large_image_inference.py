@@ -0,0 +1,145 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Union
+
+import mmcv
+import numpy as np
+import torch.nn as nn
+
+from ..structures import DetDataSample
+from ..utils.large_image import NeighborPatchMerger
+from .inference import inference_detector
+
+try:
+    import tifffile
+except ImportError:
+    tifffile = None
+
+
+def open_large_image(img: Union[str, np.ndarray]) -> np.ndarray:
+    """Open a large image without decoding it entirely if possible.
+
+    ``.npy`` files, and uncompressed TIFF files when ``tifffile`` is
+    installed, are memory-mapped so that only the windows which are sliced
+    from them are read. Other images are decoded into memory.
+
+    Args:
+        img (str or np.ndarray): Image file or loaded image. Memory-mapped
+            arrays, e.g. :obj:`np.memmap`, are used as is.
+
+    Returns:
+        np.ndarray: An array-like of shape (H, W) or (H, W, C). Images read
+        with ``mmcv`` are in BGR order, memory-mapped images keep the channel
+        order of the file.
+    """
+    if isinstance(img, np.ndarray):
+        return img
+    if img.endswith('.npy'):
+        return np.load(img, mmap_mode='r')
+    if img.lower().endswith(('.tif', '.tiff')) and tifffile is not None:
+        try:
+            return tifffile.memmap(img, mode='r')
+        except ValueError:
+            # compressed or tiled images can not be memory-mapped
+            pass
+    return mmcv.imread(img)
+
+
+def _get_patch_starts(size: int, patch_size: int, step: int) -> List[int]:
+    """Start positions of the patches along an axis.
+
+    The last patch is aligned to the end of the axis.
+    """
+    if size <= patch_size:
+        return [0]
+    starts = list(range(0, size - patch_size, step))
+    starts.append(size - patch_size)
+    return starts
+
+
+def _read_patch(image: np.ndarray, x: int, y: int, w: int, h: int,
+                to_bgr: bool) -> np.ndarray:
+    """Read a window of ``image`` into a contiguous 3-channel BGR array."""
+    patch = np.asarray(image[y:y + h, x:x + w])
+    if patch.ndim == 2:
+        patch = np.repeat(patch[..., None], 3, axis=-1)
+    elif to_bgr:
+        patch = patch[..., 2::-1]
+    return np.ascontiguousarray(patch)
+
+
+def inference_large_image(model: nn.Module,
+                          img: Union[str, np.ndarray],
+                          patch_size: int = 640,
+                          patch_overlap_ratio: float = 0.25,
+                          batch_size: int = 1,
+                          nms_cfg: Optional[dict] = None,
+                          score_thr: float = 0.,
+                          rgb: Optional[bool] = None) -> DetDataSample:
+    """Inference a large image, e.g. an aerial or satellite tile, by patches.
+
+    The image is sliced into overlapping patches which are read lazily,
+    a row of patches at a time, and forwarded in batches of ``batch_size``.
+    The next row is read while the current one is inferred. The predictions
+    are merged incrementally by :class:`NeighborPatchMerger`, which only
+    suppresses boxes in the overlaps of neighboring patches.
+
+    Args:
+        model (nn.Module): The loaded detector.
+        img (str or np.ndarray): Image file or loaded image. See
+            :func:`open_large_image` for the lazily read formats.
+        patch_size (int): The size of patches. Defaults to 640.
+        patch_overlap_ratio (float): Ratio of overlap between two patches.
+            Defaults to 0.25.
+        batch_size (int): Number of patches forwarded together.
+            Defaults to 1.
+        nms_cfg (dict, optional): NMS config used to merge the patch
+            predictions. Defaults to ``dict(type='nms', iou_threshold=0.25)``.
+        score_thr (float): Predictions with lower scores are dropped before
+            merging. Defaults to 0.
+        rgb (bool, optional): Whether the channels of ``img`` are in RGB
+            order. If None, memory-mapped TIFF images are assumed to be RGB
+            and others BGR. Defaults to None.
+
+    Returns:
+        :obj:`DetDataSample`: The merged predictions. Only bboxes, scores
+        and labels are kept.
+    """
+    assert 0 <= patch_overlap_ratio < 1, \
+        'patch_overlap_ratio should be in [0, 1).'
+    if nms_cfg is None:
+        nms_cfg = dict(type='nms', iou_threshold=0.25)
+    image = open_large_image(img)
+    if rgb is None:
+        rgb = isinstance(img, str) and isinstance(image, np.memmap) and \
+            img.lower().endswith(('.tif', '.tiff'))
+    height, width = image.shape[:2]
+    patch_h, patch_w = min(patch_size, height), min(patch_size, width)
+    step = max(int(patch_size * (1 - patch_overlap_ratio)), 1)
+    x_starts = _get_patch_starts(width, patch_size, step)
+    y_starts = _get_patch_starts(height, patch_size, step)
+
+    merger = NeighborPatchMerger(
+        x_starts,
+        y_starts, (patch_h, patch_w),
+        nms_cfg=nms_cfg,
+        score_thr=score_thr)
+
+    def read_row(y):
+        return [
+            _read_patch(image, x, y, patch_w, patch_h, rgb) for x in x_starts
+        ]
+
+    with ThreadPoolExecutor(1) as executor:
+        next_row = executor.submit(read_row, y_starts[0])
+        for row in range(len(y_starts)):
+            patches = next_row.result()
+            if row + 1 < len(y_starts):
+                next_row = executor.submit(read_row, y_starts[row + 1])
+            results = inference_detector(model, patches, batch_size=batch_size)
+            merger.add_row(row, results)
+
+    merged_result = DetDataSample(
+        metainfo=dict(ori_shape=(height, width), img_shape=(height, width)))
+    merged_result.pred_instances = merger.merge()
+    return merged_result
@@ -0,0 +1,235 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+import copy
+import math
+import threading
+import time
+from queue import Queue
+from typing import Dict, Hashable, Iterable, Iterator, List, Tuple
+
+import numpy as np
+import torch
+import torch.nn as nn
+from mmengine.dataset import pseudo_collate
+
+from ..structures import TrackDataSample
+from .inference import build_test_pipeline
+
+# Marks that a decoding worker has exhausted all of its streams.
+_STOP = object()
+
+
+class MultiStreamTracking:
+    """Run a SORT-family MOT model on several video streams at once.
+
+    Frames of all streams are decoded and pre-processed by ``num_workers``
+    background threads and pushed into a bounded queue, so that decoding
+    overlaps with model inference and slow consumers apply backpressure on
+    the readers. The consumer gathers up to ``batch_size`` queued frames,
+    runs a single detector forward on them and then feeds every detection
+    result, in frame order, to the tracker owned by its stream.
+
+    Only models whose tracker works on detection results, i.e.
+    :class:`ByteTrack`, :class:`OCSORT`, :class:`DeepSORT` and
+    :class:`StrongSORT`, are supported.
+
+    Args:
+        model (nn.Module): The loaded mot model.
+        batch_size (int): Maximum number of frames in one detector forward.
+            Defaults to 8.
+        queue_size (int): Maximum number of decoded frames waiting for
+            inference. Defaults to 32.
+        num_workers (int): Number of decoding threads. Each stream is read by
+            exactly one worker so its frame order is preserved.
+            Defaults to 2.
+
+    Examples:
+        >>> runner = MultiStreamTracking(model, batch_size=4)
+        >>> streams = dict(cam0=mmcv.VideoReader('cam0.mp4'),
+        >>>                cam1=mmcv.VideoReader('cam1.mp4'))
+        >>> for stream, frame_id, result in runner(streams):
+        >>>     print(stream, frame_id, result.pred_track_instances)
+        >>> print(runner.stats)
+    """
+
+    def __init__(self,
+                 model: nn.Module,
+                 batch_size: int = 8,
+                 queue_size: int = 32,
+                 num_workers: int = 2) -> None:
+        if not getattr(model, 'with_detector', False) or \
+                not hasattr(model, 'tracker'):
+            raise TypeError('MultiStreamTracking requires a mot model with a '
+                            f'detector and a tracker, but got {type(model)}')
+        if type(model).__name__ == 'QDTrack':
+            raise NotImplementedError(
+                'QDTrack extracts tracking features inside its forward and '
+                'is not supported by MultiStreamTracking.')
+        assert batch_size >= 1 and queue_size >= 1 and num_workers >= 1
+        self.model = model
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+        self.num_workers = num_workers
+        self.test_pipeline = build_test_pipeline(model.cfg)
+        self.trackers = {}
+        self._timings = {}
+
+    def __call__(
+        self, streams: Dict[Hashable, Iterable[np.ndarray]]
+    ) -> Iterator[Tuple[Hashable, int, TrackDataSample]]:
+        """Track all streams until every one of them is exhausted.
+
+        Args:
+            streams (dict): Mapping from stream names to iterables of BGR
+                frames, e.g. :obj:`mmcv.VideoReader` or camera generators.
+
+        Yields:
+            tuple: The stream name, the frame id within the stream and the
+            tracking data sample of that frame, which contains
+            ``pred_track_instances``.
+        """
+        self.trackers = {
+            name: copy.deepcopy(self.model.tracker)
+            for name in streams
+        }
+        self._timings = {name: [] for name in streams}
+
+        queue = Queue(self.queue_size)
+        stop_event = threading.Event()
+        names = list(streams)
+        workers = []
+        for i in range(min(self.num_workers, len(names))):
+            worker_streams = {
+                name: streams[name]
+                for name in names[i::self.num_workers]
+            }
+            worker = threading.Thread(
+                target=self._read_streams,
+                args=(worker_streams, queue, stop_event),
+                daemon=True)
+            worker.start()
+            workers.append(worker)
+
+        num_running = len(workers)
+        try:
+            while num_running > 0:
+                batch = []
+                # block for the first frame, then take whatever is ready
+                item = queue.get()
+                while True:
+                    if item is _STOP:
+                        num_running -= 1
+                    elif isinstance(item, Exception):
+                        raise item
+                    else:
+                        batch.append(item)
+                    if len(batch) == self.batch_size or queue.empty() \
+                            or num_running == 0:
+                        break
+                    item = queue.get()
+                if len(batch) > 0:
+                    yield from self._track_batch(batch)
+        finally:
+            stop_event.set()
+            # unblock workers waiting on a full queue
+            while any(worker.is_alive() for worker in workers):
+                while not queue.empty():
+                    queue.get_nowait()
+                time.sleep(0.001)
+
+    def _read_streams(self, streams: Dict[Hashable, Iterable[np.ndarray]],
+                      queue: Queue, stop_event: threading.Event) -> None:
+        """Decode and pre-process the frames of ``streams`` in round-robin
+        order and push them into ``queue``."""
+        try:
+            iterators = {
+                name: iter(frames)
+                for name, frames in streams.items()
+            }
+            frame_ids = dict.fromkeys(streams, 0)
+            while iterators and not stop_event.is_set():
+                for name in list(iterators):
+                    try:
+                        img = next(iterators[name])
+                    except StopIteration:
+                        iterators.pop(name)
+                        continue
+                    if img is None:
+                        iterators.pop(name)
+                        continue
+                    start = time.perf_counter()
+                    frame_id = frame_ids[name]
+                    frame_ids[name] += 1
+                    data = dict(
+                        img=[img.astype(np.float32)],
+                        frame_id=[frame_id],
+                        ori_shape=[img.shape[:2]],
+                        img_id=[frame_id + 1],
+                        ori_video_length=[-1])
+                    data = self.test_pipeline(data)
+                    queue.put((name, frame_id, data, start))
+                    if stop_event.is_set():
+                        return
+        except Exception as e:
+            queue.put(e)
+        queue.put(_STOP)
+
+    def _track_batch(
+            self, batch: list) -> List[Tuple[Hashable, int, TrackDataSample]]:
+        """Detect objects on a batch of frames with one forward and update
+        the tracker of every frame's stream."""
+        model = self.model
+        # the unpadded size of each frame, used to drop the extra padding
+        # added when frames of different sizes are stacked together
+        img_sizes = [item[2]['inputs'].shape[-2:] for item in batch]
+        results = []
+        with torch.no_grad():
+            data = pseudo_collate([item[2] for item in batch])
+            data = model.data_preprocessor(data, False)
+            inputs, track_samples = data['inputs'], data['data_samples']
+            det_samples = [track_sample[0] for track_sample in track_samples]
+            det_results = model.detector.predict(inputs[:, 0].contiguous(),
+                                                 det_samples)
+
+            divisor = getattr(model.data_preprocessor, 'pad_size_divisor', 1)
+            for i, (name, frame_id, _, start) in enumerate(batch):
+                tracker = self.trackers[name]
+                if frame_id == 0:
+                    tracker.reset()
+                h, w = (
+                    math.ceil(size / divisor) * divisor
+                    for size in img_sizes[i])
+                img = inputs[i:i + 1, 0, :, :h, :w].contiguous()
+                pred_track_instances = tracker.track(
+                    model=model,
+                    img=img,
+                    feats=None,
+                    data_sample=det_results[i],
+                    data_preprocessor=getattr(model, 'preprocess_cfg', None),
+                    rescale=True)
+                track_samples[i][0].pred_track_instances = \
+                    pred_track_instances
+                self._timings[name].append((start, time.perf_counter()))
+                results.append((name, frame_id, track_samples[i]))
+        return results
+
+    @property
+    def stats(self) -> Dict[Hashable, dict]:
+        """dict: Per-stream statistics of the last run, including the number
+        of tracked frames, the mean and max latency in milliseconds from
+        decoding a frame to its tracking result, and the throughput in frames
+        per second."""
+        stats = dict()
+        for name, timings in self._timings.items():
+            if len(timings) == 0:
+                stats[name] = dict(
+                    num_frames=0, mean_latency=0., max_latency=0., fps=0.)
+                continue
+            timings = np.array(timings)
+            latency = (timings[:, 1] - timings[:, 0]) * 1000
+            duration = timings[-1, 1] - timings[0, 0]
+            stats[name] = dict(
+                num_frames=len(timings),
+                mean_latency=float(latency.mean()),
+                max_latency=float(latency.max()),
+                fps=len(timings) / duration if duration > 0 else 0.)
+        return stats
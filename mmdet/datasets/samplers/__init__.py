@@ -1,6 +1,7 @@
 # Copyright (c) OpenMMLab. All rights reserved.
 from .batch_sampler import (AspectRatioBatchSampler,
                             MultiDataAspectRatioBatchSampler,
+                            SizeBucketBatchSampler,
                             TrackAspectRatioBatchSampler)
 from .class_aware_sampler import ClassAwareSampler
 from .custom_sample_size_sampler import CustomSampleSizeSampler
@@ -12,5 +13,6 @@ __all__ = [
     'ClassAwareSampler', 'AspectRatioBatchSampler', 'MultiSourceSampler',
     'GroupMultiSourceSampler', 'TrackImgSampler',
     'TrackAspectRatioBatchSampler', 'MultiDataSampler',
-    'MultiDataAspectRatioBatchSampler', 'CustomSampleSizeSampler'
+    'MultiDataAspectRatioBatchSampler', 'CustomSampleSizeSampler',
+    'SizeBucketBatchSampler'
 ]
@@ -1,6 +1,9 @@
 # Copyright (c) OpenMMLab. All rights reserved.
-from typing import Sequence
+import math
+from typing import Dict, List, Optional, Sequence, Tuple, Union
 
+import mmcv
+from mmengine.logging import print_log
 from torch.utils.data import BatchSampler, Sampler
 
 from mmdet.datasets.samplers.track_img_sampler import TrackImgSampler
@@ -69,6 +72,119 @@ class AspectRatioBatchSampler(BatchSampler):
             return (len(self.sampler) + self.batch_size - 1) // self.batch_size
 
 
+@DATA_SAMPLERS.register_module()
+class SizeBucketBatchSampler(AspectRatioBatchSampler):
+    """A sampler wrapper for grouping images with similar sizes after resizing
+    into a same batch.
+
+    Compared with :class:`AspectRatioBatchSampler`, which only separates
+    landscape and portrait images, the images are grouped by their height
+    and width after resizing to ``scale``, quantized by ``bucket_size``.
+    Since a batch is padded to its largest image, this reduces the padded
+    pixels. For multi-scale training, ``scale`` is usually the largest scale
+    of the random resizing, whose aspect ratios are kept by the other scales.
+
+    The indices are drawn from ``sampler``, so the sampler shards the dataset
+    among ranks as usual, and datasets wrapped by ``RepeatDataset`` or
+    ``ClassBalancedDataset`` and samplers like :class:`ClassAwareSampler` are
+    supported. The remaining indices of all the buckets are sorted by size
+    and batched at the end of an epoch.
+
+    The estimated ratio of padded pixels of the batches is kept in
+    ``padding_ratio`` and logged at the end of each epoch.
+
+    Args:
+        sampler (Sampler): Base sampler.
+        batch_size (int): Size of mini-batch.
+        drop_last (bool): If ``True``, the sampler will drop the last batch if
+            its size would be less than ``batch_size``.
+        scale (int or tuple[int], optional): The scale images are resized
+            to. Defaults to None, which means the original sizes.
+        keep_ratio (bool): Whether images are resized with their aspect
+            ratios kept. Defaults to True.
+        bucket_size (int): The step in pixels the resized heights and widths
+            are quantized by. Defaults to 64.
+    """
+
+    def __init__(self,
+                 sampler: Sampler,
+                 batch_size: int,
+                 drop_last: bool = False,
+                 scale: Optional[Union[int, Tuple[int, int]]] = None,
+                 keep_ratio: bool = True,
+                 bucket_size: int = 64) -> None:
+        super().__init__(sampler, batch_size, drop_last)
+        if isinstance(scale, int):
+            scale = (scale, scale)
+        self.scale = scale
+        self.keep_ratio = keep_ratio
+        self.bucket_size = bucket_size
+        # the buckets keep the indices with their resized shapes since
+        # samplers like ClassAwareSampler can draw an index repeatedly
+        self._buckets: Dict[Tuple[int, int], List[tuple]] = {}
+        self._valid_pixels = 0
+        self._batch_pixels = 0
+
+    @property
+    def padding_ratio(self) -> float:
+        """float: The ratio of padded pixels of the batches of the current or
+        last epoch."""
+        if self._batch_pixels == 0:
+            return 0.
+        return 1 - self._valid_pixels / self._batch_pixels
+
+    def _get_shape(self, idx: int) -> Tuple[int, int]:
+        """Get the resized (h, w) of an image."""
+        data_info = self.sampler.dataset.get_data_info(idx)
+        width, height = data_info['width'], data_info['height']
+        if self.scale is not None:
+            if self.keep_ratio:
+                width, height = mmcv.rescale_size((width, height), self.scale)
+            else:
+                width, height = self.scale
+        return height, width
+
+    def _make_batch(self, items: List[tuple]) -> List[int]:
+        """Get the indices of a batch and record its padded pixels."""
+        shapes = [shape for _, shape in items]
+        max_h = max(h for h, _ in shapes)
+        max_w = max(w for _, w in shapes)
+        self._valid_pixels += sum(h * w for h, w in shapes)
+        self._batch_pixels += len(shapes) * max_h * max_w
+        return [idx for idx, _ in items]
+
+    def __iter__(self) -> Sequence[int]:
+        self._valid_pixels = 0
+        self._batch_pixels = 0
+        for idx in self.sampler:
+            height, width = self._get_shape(idx)
+            bucket_id = (math.ceil(height / self.bucket_size),
+                         math.ceil(width / self.bucket_size))
+            bucket = self._buckets.setdefault(bucket_id, [])
+            bucket.append((idx, (height, width)))
+            # yield a batch of indices in the same size group
+            if len(bucket) == self.batch_size:
+                yield self._make_batch(bucket[:])
+                del bucket[:]
+
+        # yield the rest data sorted by size and reset the buckets
+        left_data = []
+        for bucket_id in sorted(self._buckets):
+            left_data.extend(self._buckets[bucket_id])
+        self._buckets = {}
+        while len(left_data) > 0:
+            if len(left_data) <= self.batch_size:
+                if not self.drop_last:
+                    yield self._make_batch(left_data[:])
+                left_data = []
+            else:
+                yield self._make_batch(left_data[:self.batch_size])
+                left_data = left_data[self.batch_size:]
+        print_log(
+            f'The padding ratio of the batches is {self.padding_ratio:.4f}',
+            logger='current')
+
+
 @DATA_SAMPLERS.register_module()
 class TrackAspectRatioBatchSampler(AspectRatioBatchSampler):
     """A sampler wrapper for grouping images with similar aspect ratio (< 1 or.
@@ -0,0 +1,221 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+import copy
+import multiprocessing
+import os
+import pickle
+import random
+import time
+import warnings
+import weakref
+from multiprocessing.shared_memory import SharedMemory
+from typing import Optional
+
+import numpy as np
+
+
+def _release_shared_memory(shm: SharedMemory, owner_pid: int,
+                           num_attached: list) -> None:
+    """Close the shared memory and unlink it in the process creating it,
+    once no cache of the process is attached to it."""
+    shm.close()
+    num_attached[0] -= 1
+    if os.getpid() == owner_pid and num_attached[0] == 0:
+        try:
+            shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class SharedResultsCache:
+    """A cache of results in a shared-memory ring buffer.
+
+    The cache is created by the main process when the pipeline is built, so
+    that all the dataloader workers of a rank, whether forked or spawned,
+    share the same buffer and sample from the results cached by each other.
+    Each result is kept in a slot of ``slot_size`` bytes: the image is
+    stored as raw bytes and the other items are pickled.
+
+    Writers hold a lock shared by the workers. Readers are lock-free: each
+    slot has a version which is odd while the slot is written, and a read
+    is retried if the version changes during it. The image is copied out
+    of its slot with a single memory copy instead of being deep-copied.
+
+    A deep copy of the cache, e.g. made by ``BaseDataset.get_subset``, is
+    attached to the same buffer and lock. The buffer is unlinked when the
+    last cache attached to it in the creating process is released.
+
+    A worker dying while it writes a slot leaves the version of the slot
+    odd and the lock taken. So the lock is taken with a timeout, and a
+    result which can not be cached in time is skipped. A read which can
+    not finish in time is a miss, and the slot is dropped by the reading
+    process until it is written again.
+
+    Args:
+        max_size (int): The number of slots.
+        random_pop (bool): Whether to overwrite a random slot when the cache
+            is full. If False, the oldest slot is overwritten.
+            Defaults to True.
+        slot_size (int): The number of bytes of each slot. Results larger
+            than it are not cached. Defaults to 8 MB.
+        timeout (float): Seconds to wait for the lock or for a slot being
+            written. Defaults to 1.
+    """
+
+    def __init__(self,
+                 max_size: int,
+                 random_pop: bool = True,
+                 slot_size: int = 8 * 1024**2,
+                 timeout: float = 1.) -> None:
+        self.max_size = max_size
+        self.random_pop = random_pop
+        self.slot_size = slot_size
+        self.timeout = timeout
+        # the versions of the slots which this process gave up reading
+        self._dropped = dict()
+        # the header holds the ring head, the number of cached results and
+        # the version, image size and meta size of every slot
+        self._header_len = 2 + 3 * max_size
+        shm = SharedMemory(
+            create=True, size=self._header_len * 8 + max_size * slot_size)
+        self._name = shm.name
+        self._owner_pid = os.getpid()
+        # a lock of the spawn context can also be inherited by forked workers
+        self._lock = multiprocessing.get_context('spawn').Lock()
+        # the number of caches of this process attached to the memory
+        self._num_attached = [0]
+        self._attach(shm)
+        self._header[:] = 0
+        self._warned = False
+
+    def _attach(self, shm: SharedMemory) -> None:
+        """Create the views of the shared memory."""
+        self._shm = shm
+        self._header = np.ndarray((self._header_len, ),
+                                  dtype=np.int64,
+                                  buffer=shm.buf)
+        self._versions = self._header[2::3]
+        self._img_sizes = self._header[3::3]
+        self._meta_sizes = self._header[4::3]
+        self._data = np.ndarray((self.max_size, self.slot_size),
+                                dtype=np.uint8,
+                                buffer=shm.buf,
+                                offset=self._header_len * 8)
+        self._num_attached[0] += 1
+        self._finalizer = weakref.finalize(self, _release_shared_memory, shm,
+                                           self._owner_pid, self._num_attached)
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        for key in ('_shm', '_header', '_versions', '_img_sizes',
+                    '_meta_sizes', '_data', '_finalizer'):
+            state.pop(key)
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        # spawned workers share the resource tracker of the main process,
+        # which unlinks the memory
+        self._attach(SharedMemory(name=self._name))
+
+    def __deepcopy__(self, memo: dict) -> 'SharedResultsCache':
+        # the lock can not be pickled, so the copy shares it and is attached
+        # to the same memory instead
+        state = self.__getstate__()
+        lock = state.pop('_lock')
+        num_attached = state.pop('_num_attached')
+        new = self.__class__.__new__(self.__class__)
+        memo[id(self)] = new
+        new.__dict__.update(copy.deepcopy(state, memo))
+        new._lock = lock
+        new._num_attached = num_attached
+        new._attach(SharedMemory(name=self._name))
+        return new
+
+    def __len__(self) -> int:
+        return int(self._header[1])
+
+    def append(self, results: dict) -> bool:
+        """Cache a result, overwriting a slot if the cache is full.
+
+        Args:
+            results (dict): The result to cache, with an ``img`` array.
+
+        Returns:
+            bool: Whether the result is cached.
+        """
+        img = np.ascontiguousarray(results['img'])
+        others = {k: v for k, v in results.items() if k != 'img'}
+        meta = pickle.dumps((others, img.shape, img.dtype.str),
+                            protocol=pickle.HIGHEST_PROTOCOL)
+        if img.nbytes + len(meta) > self.slot_size:
+            if not self._warned:
+                warnings.warn(
+                    f'A result of {img.nbytes + len(meta)} bytes is larger '
+                    f'than the slot size {self.slot_size} and is not cached, '
+                    'please increase the slot size.')
+                self._warned = True
+            return False
+
+        if not self._lock.acquire(timeout=self.timeout):
+            warnings.warn('Timed out waiting for the lock of the shared '
+                          'cache, the result is not cached.')
+            return False
+        try:
+            num_cached = int(self._header[1])
+            if num_cached < self.max_size:
+                slot = num_cached
+            elif self.random_pop:
+                slot = random.randint(0, self.max_size - 1)
+            else:
+                slot = int(self._header[0]) % self.max_size
+                self._header[0] += 1
+            self._versions[slot] += 1
+            data = self._data[slot]
+            data[:img.nbytes] = img.reshape(-1).view(np.uint8)
+            data[img.nbytes:img.nbytes + len(meta)] = np.frombuffer(
+                meta, dtype=np.uint8)
+            self._img_sizes[slot] = img.nbytes
+            self._meta_sizes[slot] = len(meta)
+            self._versions[slot] += 1
+            if num_cached < self.max_size:
+                self._header[1] = num_cached + 1
+        finally:
+            self._lock.release()
+        return True
+
+    def __getitem__(self, index: int) -> Optional[dict]:
+        """Get a copy of the cached result in a slot.
+
+        Returns:
+            dict, optional: The cached result, or None if the slot can not
+            be read in time.
+        """
+        if not 0 <= index < len(self):
+            raise IndexError(f'Index {index} out of range!')
+        deadline = time.monotonic() + self.timeout
+        while True:
+            version = int(self._versions[index])
+            if self._dropped.get(index) == version:
+                return None
+            if version % 2 == 0:
+                img_size = int(self._img_sizes[index])
+                meta_size = int(self._meta_sizes[index])
+                img = self._data[index, :img_size].copy()
+                meta = self._data[index,
+                                  img_size:img_size + meta_size].tobytes()
+                if int(self._versions[index]) == version:
+                    break
+            if time.monotonic() > deadline:
+                warnings.warn(f'Timed out reading slot {index} of the shared '
+                              'cache, the slot is dropped.')
+                self._dropped[index] = version
+                return None
+            time.sleep(0)
+        self._dropped.pop(index, None)
+        results, shape, dtype = pickle.loads(meta)
+        results['img'] = img.view(dtype).reshape(shape)
+        return results
+
+    def close(self) -> None:
+        """Release the shared memory."""
+        self._finalizer()
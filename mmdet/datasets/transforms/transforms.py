@@ -23,6 +23,7 @@ from mmdet.registry import TRANSFORMS
 from mmdet.structures.bbox import HorizontalBoxes, autocast_box_type
 from mmdet.structures.mask import BitmapMasks, PolygonMasks
 from mmdet.utils import log_img_scale
+from .shared_cache import SharedResultsCache
 
 try:
     from imagecorruptions import corrupt
@@ -3409,19 +3410,32 @@ class CachedMosaic(Mosaic):
         random_pop (bool): Whether to randomly pop a result from the cache
             when the cache is full. If set to False, use FIFO popping method.
             Defaults to True.
+        shared_cache (bool): Whether to keep the cache in shared memory,
+            which is shared by all the dataloader workers of a rank instead
+            of duplicated in each of them. See :class:`SharedResultsCache`.
+            Defaults to False.
+        cache_slot_size (int): The maximum number of bytes of a cached result
+            in the shared cache. Defaults to 8 MB.
     """
 
     def __init__(self,
                  *args,
                  max_cached_images: int = 40,
                  random_pop: bool = True,
+                 shared_cache: bool = False,
+                 cache_slot_size: int = 8 * 1024**2,
                  **kwargs) -> None:
         super().__init__(*args, **kwargs)
-        self.results_cache = []
         self.random_pop = random_pop
         assert max_cached_images >= 4, 'The length of cache must >= 4, ' \
                                        f'but got {max_cached_images}.'
         self.max_cached_images = max_cached_images
+        self.shared_cache = shared_cache
+        if shared_cache:
+            self.results_cache = SharedResultsCache(
+                max_cached_images, random_pop, slot_size=cache_slot_size)
+        else:
+            self.results_cache = []
 
     @cache_randomness
     def get_indexes(self, cache: list) -> list:
@@ -3448,13 +3462,16 @@ class CachedMosaic(Mosaic):
             dict: Updated result dict.
         """
         # cache and pop images
-        self.results_cache.append(copy.deepcopy(results))
-        if len(self.results_cache) > self.max_cached_images:
-            if self.random_pop:
-                index = random.randint(0, len(self.results_cache) - 1)
-            else:
-                index = 0
-            self.results_cache.pop(index)
+        if self.shared_cache:
+            self.results_cache.append(results)
+        else:
+            self.results_cache.append(copy.deepcopy(results))
+            if len(self.results_cache) > self.max_cached_images:
+                if self.random_pop:
+                    index = random.randint(0, len(self.results_cache) - 1)
+                else:
+                    index = 0
+                self.results_cache.pop(index)
 
         if len(self.results_cache) <= 4:
             return results
@@ -3462,7 +3479,15 @@ class CachedMosaic(Mosaic):
         if random.uniform(0, 1) > self.prob:
             return results
         indices = self.get_indexes(self.results_cache)
-        mix_results = [copy.deepcopy(self.results_cache[i]) for i in indices]
+        # the shared cache returns copies
+        mix_results = [
+            self.results_cache[i]
+            if self.shared_cache else copy.deepcopy(self.results_cache[i])
+            for i in indices
+        ]
+        if any(mix_result is None for mix_result in mix_results):
+            # a slot of the shared cache can not be read
+            return results
 
         # TODO: refactor mosaic to reuse these code.
         mosaic_bboxes = []
@@ -3571,7 +3596,8 @@ class CachedMosaic(Mosaic):
         repr_str += f'pad_val={self.pad_val}, '
         repr_str += f'prob={self.prob}, '
         repr_str += f'max_cached_images={self.max_cached_images}, '
-        repr_str += f'random_pop={self.random_pop})'
+        repr_str += f'random_pop={self.random_pop}, '
+        repr_str += f'shared_cache={self.shared_cache})'
         return repr_str
 
 
@@ -3645,6 +3671,12 @@ class CachedMixUp(BaseTransform):
             Defaults to True.
         prob (float): Probability of applying this transformation.
             Defaults to 1.0.
+        shared_cache (bool): Whether to keep the cache in shared memory,
+            which is shared by all the dataloader workers of a rank instead
+            of duplicated in each of them. See :class:`SharedResultsCache`.
+            Defaults to False.
+        cache_slot_size (int): The maximum number of bytes of a cached result
+            in the shared cache. Defaults to 8 MB.
     """
 
     def __init__(self,
@@ -3656,7 +3688,9 @@ class CachedMixUp(BaseTransform):
                  bbox_clip_border: bool = True,
                  max_cached_images: int = 20,
                  random_pop: bool = True,
-                 prob: float = 1.0) -> None:
+                 prob: float = 1.0,
+                 shared_cache: bool = False,
+                 cache_slot_size: int = 8 * 1024**2) -> None:
         assert isinstance(img_scale, tuple)
         assert max_cached_images >= 2, 'The length of cache must >= 2, ' \
                                        f'but got {max_cached_images}.'
@@ -3668,11 +3702,16 @@ class CachedMixUp(BaseTransform):
         self.pad_val = pad_val
         self.max_iters = max_iters
         self.bbox_clip_border = bbox_clip_border
-        self.results_cache = []
 
         self.max_cached_images = max_cached_images
         self.random_pop = random_pop
         self.prob = prob
+        self.shared_cache = shared_cache
+        if shared_cache:
+            self.results_cache = SharedResultsCache(
+                max_cached_images, random_pop, slot_size=cache_slot_size)
+        else:
+            self.results_cache = []
 
     @cache_randomness
     def get_indexes(self, cache: list) -> int:
@@ -3703,13 +3742,16 @@ class CachedMixUp(BaseTransform):
             dict: Updated result dict.
         """
         # cache and pop images
-        self.results_cache.append(copy.deepcopy(results))
-        if len(self.results_cache) > self.max_cached_images:
-            if self.random_pop:
-                index = random.randint(0, len(self.results_cache) - 1)
-            else:
-                index = 0
-            self.results_cache.pop(index)
+        if self.shared_cache:
+            self.results_cache.append(results)
+        else:
+            self.results_cache.append(copy.deepcopy(results))
+            if len(self.results_cache) > self.max_cached_images:
+                if self.random_pop:
+                    index = random.randint(0, len(self.results_cache) - 1)
+                else:
+                    index = 0
+                self.results_cache.pop(index)
 
         if len(self.results_cache) <= 1:
             return results
@@ -3718,7 +3760,12 @@ class CachedMixUp(BaseTransform):
             return results
 
         index = self.get_indexes(self.results_cache)
-        retrieve_results = copy.deepcopy(self.results_cache[index])
+        # the shared cache returns copies
+        retrieve_results = self.results_cache[index] if self.shared_cache \
+            else copy.deepcopy(self.results_cache[index])
+        if retrieve_results is None:
+            # a slot of the shared cache can not be read
+            return results
 
         # TODO: refactor mixup to reuse these code.
         if retrieve_results['gt_bboxes'].shape[0] == 0:
@@ -3852,5 +3899,6 @@ class CachedMixUp(BaseTransform):
         repr_str += f'bbox_clip_border={self.bbox_clip_border}, '
         repr_str += f'max_cached_images={self.max_cached_images}, '
         repr_str += f'random_pop={self.random_pop}, '
-        repr_str += f'prob={self.prob})'
+        repr_str += f'prob={self.prob}, '
+        repr_str += f'shared_cache={self.shared_cache})'
         return repr_str
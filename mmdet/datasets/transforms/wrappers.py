@@ -1,10 +1,16 @@
 # Copyright (c) OpenMMLab. All rights reserved.
 import copy
-from typing import Callable, Dict, List, Optional, Union
+import glob
+import hashlib
+import os
+import os.path as osp
+import pickle
+from typing import Callable, Dict, List, Optional, Sequence, Union
 
 import numpy as np
 from mmcv.transforms import BaseTransform, Compose
 from mmcv.transforms.utils import cache_random_params, cache_randomness
+from mmengine.utils import mkdir_or_exist
 
 from mmdet.registry import TRANSFORMS
 
@@ -275,3 +281,194 @@ class ProposalBroadcaster(BaseTransform):
         outputs = output_scatters[0]
         outputs['proposals'] = output_scatters[1]['gt_bboxes']
         return outputs
+
+
+@TRANSFORMS.register_module()
+class DiskCache(BaseTransform):
+    """A transform wrapper caching the outputs of deterministic transforms,
+    e.g. loading and decoding, in an on-disk store.
+
+    The outputs of ``transforms`` are cached in ``cache_dir``, keyed by the
+    image path, the annotations (``instances`` and ``seg_map_path``) and the
+    config of ``transforms``, so later epochs and runs
+    skip the file fetching, image decoding and annotation parsing. Only the
+    items added or replaced by ``transforms`` are cached. Images are stored
+    as ``.npy`` files and memory-mapped copy-on-write when read, and the
+    other items are pickled.
+
+    Each entry is written to a temporary file and renamed into place, so the
+    store can be shared by the dataloader workers of all ranks. When the
+    store grows larger than ``max_size``, the least recently used entries are
+    evicted. The size is scanned again after each process writes 5% of
+    ``max_size``, so the store may exceed ``max_size`` by that amount per
+    process.
+
+    Note:
+        The wrapped transforms must be deterministic. Random augmentations
+        should follow this transform in the pipeline. Images can be cached
+        downscaled by wrapping a ``Resize`` with ``keep_ratio=True`` as well.
+
+    Args:
+        transforms (list): Sequence of deterministic transform objects or
+            config dicts to be wrapped.
+        cache_dir (str): The directory of the store.
+        max_size (int, optional): The maximum number of bytes of the store.
+            Defaults to None, which means unlimited.
+        key_fields (Sequence[str]): The fields of the results identifying an
+            entry. Defaults to ``('img_path', )``.
+
+    Examples:
+        >>> pipeline = [
+        >>>     dict(
+        >>>         type='DiskCache',
+        >>>         cache_dir='data/cache/lvis',
+        >>>         max_size=100 * 1024**3,
+        >>>         transforms=[
+        >>>             dict(type='LoadImageFromFile'),
+        >>>             dict(type='LoadAnnotations', with_bbox=True,
+        >>>                  with_mask=True),
+        >>>         ]),
+        >>>     dict(type='RandomResize', scale=(1333, 800),
+        >>>          ratio_range=(0.1, 2.0), keep_ratio=True),
+        >>>     dict(type='RandomFlip', prob=0.5),
+        >>>     dict(type='PackDetInputs')]
+    """
+
+    def __init__(
+        self,
+        transforms: List[Union[dict, Callable]],
+        cache_dir: str,
+        max_size: Optional[int] = None,
+        key_fields: Sequence[str] = ('img_path', )
+    ) -> None:
+        self.transforms = Compose(transforms)
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self.key_fields = key_fields
+        # changing the wrapped transforms invalidates the entries
+        self._signature = repr(self.transforms)
+        self._cached_bytes = None
+        self._written_bytes = 0
+        mkdir_or_exist(cache_dir)
+
+    def _entry_path(self, results: dict) -> str:
+        """Get the path of the entry of results, without the extension."""
+        # the same image may be annotated differently, e.g. by datasets
+        # sharing images, or by the annotation files of different runs
+        annotations = pickle.dumps(
+            [results.get(k) for k in ('instances', 'seg_map_path')],
+            protocol=4)
+        key = '\0'.join(
+            [str(results[k]) for k in self.key_fields] +
+            [hashlib.sha1(annotations).hexdigest(), self._signature])
+        name = hashlib.sha1(key.encode()).hexdigest()
+        return osp.join(self.cache_dir, name[:2], name)
+
+    def _load(self, path: str) -> Optional[dict]:
+        """Load an entry, returns None if it does not exist."""
+        try:
+            with open(path + '.pkl', 'rb') as f:
+                entry = pickle.load(f)
+            if entry.pop('__with_img__'):
+                entry['img'] = np.load(
+                    path + '.npy', mmap_mode='c').view(np.ndarray)
+            # mark the entry as recently used
+            os.utime(path + '.pkl')
+        except (OSError, EOFError, ValueError, pickle.UnpicklingError):
+            # the entry is missing, or evicted or written by another process
+            return None
+        return entry
+
+    def _save(self, path: str, entry: dict) -> None:
+        """Save an entry atomically."""
+        mkdir_or_exist(osp.dirname(path))
+        tmp_suffix = f'.{os.getpid()}.tmp'
+        entry = entry.copy()
+        img = entry.pop('img', None)
+        entry['__with_img__'] = img is not None
+        num_bytes = 0
+        # the image is saved first since the meta file marks a whole entry
+        if img is not None:
+            with open(path + '.npy' + tmp_suffix, 'wb') as f:
+                np.save(f, np.ascontiguousarray(img))
+            num_bytes += os.path.getsize(path + '.npy' + tmp_suffix)
+            os.replace(path + '.npy' + tmp_suffix, path + '.npy')
+        with open(path + '.pkl' + tmp_suffix, 'wb') as f:
+            pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+        num_bytes += os.path.getsize(path + '.pkl' + tmp_suffix)
+        os.replace(path + '.pkl' + tmp_suffix, path + '.pkl')
+
+        if self.max_size is not None:
+            self._written_bytes += num_bytes
+            if self._cached_bytes is None or \
+                    self._written_bytes > self.max_size // 20:
+                self._evict()
+            elif self._cached_bytes + self._written_bytes > self.max_size:
+                self._evict()
+
+    def _evict(self) -> None:
+        """Scan the store and evict the least recently used entries until it
+        is 10% below ``max_size``."""
+        entries = []
+        total_bytes = 0
+        for meta_path in glob.iglob(osp.join(self.cache_dir, '*', '*.pkl')):
+            path = meta_path[:-4]
+            try:
+                last_used = os.path.getmtime(meta_path)
+                num_bytes = os.path.getsize(meta_path)
+                if osp.exists(path + '.npy'):
+                    num_bytes += os.path.getsize(path + '.npy')
+            except OSError:
+                continue
+            entries.append((last_used, num_bytes, path))
+            total_bytes += num_bytes
+
+        if total_bytes > self.max_size:
+            entries.sort()
+            for _, num_bytes, path in entries:
+                if total_bytes <= self.max_size * 0.9:
+                    break
+                # remove the meta file first to invalidate the entry
+                for suffix in ('.pkl', '.npy'):
+                    try:
+                        os.remove(path + suffix)
+                    except FileNotFoundError:
+                        pass
+                total_bytes -= num_bytes
+        self._cached_bytes = total_bytes
+        self._written_bytes = 0
+
+    def transform(self, results: dict) -> Optional[dict]:
+        """Apply the wrapped transforms, or load their cached outputs.
+
+        Args:
+            results (dict): Result dict from the dataset.
+
+        Returns:
+            dict or None: The transformed results.
+        """
+        path = self._entry_path(results)
+        entry = self._load(path)
+        if entry is not None:
+            results.update(entry)
+            return results
+
+        inputs = dict(results)
+        results = self.transforms(results)
+        if results is None:
+            return None
+        entry = {
+            k: v
+            for k, v in results.items()
+            if k not in inputs or inputs[k] is not v
+        }
+        self._save(path, entry)
+        return results
+
+    def __repr__(self) -> str:
+        repr_str = self.__class__.__name__
+        repr_str += f'(transforms={self.transforms}, '
+        repr_str += f'cache_dir={self.cache_dir}, '
+        repr_str += f'max_size={self.max_size}, '
+        repr_str += f'key_fields={self.key_fields})'
+        return repr_str
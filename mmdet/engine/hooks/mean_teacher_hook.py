@@ -6,6 +6,7 @@ from mmengine.hooks import Hook
 from mmengine.model import is_model_wrapper
 from mmengine.runner import Runner
 
+from mmdet.models.layers import fused_ema_update
 from mmdet.registry import HOOKS
 
 
@@ -33,16 +34,21 @@ class MeanTeacherHook(Hook):
         skip_buffers (bool): Whether to skip the model buffers, such as
             batchnorm running stats (running_mean, running_var), it does not
             perform the ema operation. Default to True.
+        compensate_momentum (bool): Whether to compensate the momentum for
+            the iterations skipped by ``interval``, i.e. to update with
+            ``1 - (1 - momentum) ** interval``. Defaults to False.
     """
 
     def __init__(self,
                  momentum: float = 0.001,
                  interval: int = 1,
-                 skip_buffer=True) -> None:
+                 skip_buffer=True,
+                 compensate_momentum: bool = False) -> None:
         assert 0 < momentum < 1
         self.momentum = momentum
         self.interval = interval
         self.skip_buffers = skip_buffer
+        self.compensate_momentum = compensate_momentum
 
     def before_train(self, runner: Runner) -> None:
         """To check that teacher model and student model exist."""
@@ -66,22 +72,28 @@ class MeanTeacherHook(Hook):
         model = runner.model
         if is_model_wrapper(model):
             model = model.module
-        self.momentum_update(model, self.momentum)
+        momentum = self.momentum
+        if self.compensate_momentum:
+            momentum = 1 - (1 - momentum)**self.interval
+        self.momentum_update(model, momentum)
 
     def momentum_update(self, model: nn.Module, momentum: float) -> None:
         """Compute the moving average of the parameters using exponential
-        moving average."""
+        moving average.
+
+        All the parameters are updated together by fused multi-tensor
+        operations.
+        """
         if self.skip_buffers:
-            for (src_name, src_parm), (dst_name, dst_parm) in zip(
-                    model.student.named_parameters(),
-                    model.teacher.named_parameters()):
-                dst_parm.data.mul_(1 - momentum).add_(
-                    src_parm.data, alpha=momentum)
+            src_params = [p.data for p in model.student.parameters()]
+            dst_params = [p.data for p in model.teacher.parameters()]
         else:
+            src_params, dst_params = [], []
             for (src_parm,
                  dst_parm) in zip(model.student.state_dict().values(),
                                   model.teacher.state_dict().values()):
                 # exclude num_tracking
                 if dst_parm.dtype.is_floating_point:
-                    dst_parm.data.mul_(1 - momentum).add_(
-                        src_parm.data, alpha=momentum)
+                    src_params.append(src_parm.data)
+                    dst_params.append(dst_parm.data)
+        fused_ema_update(dst_params, src_params, momentum)
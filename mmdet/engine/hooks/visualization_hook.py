@@ -1,12 +1,16 @@
 # Copyright (c) OpenMMLab. All rights reserved.
+import logging
 import os.path as osp
+import queue
+import threading
 import warnings
-from typing import Optional, Sequence
+from typing import Callable, Dict, Optional, Sequence
 
 import mmcv
 import numpy as np
 from mmengine.fileio import get
 from mmengine.hooks import Hook
+from mmengine.logging import print_log
 from mmengine.runner import Runner
 from mmengine.utils import mkdir_or_exist
 from mmengine.visualization import Visualizer
@@ -18,8 +22,137 @@ from mmdet.structures.bbox import BaseBoxes
 from mmdet.visualization.palette import _get_adaptive_scales
 
 
+class _DrawWorkers:
+    """A pool of background threads running drawing jobs.
+
+    The jobs wait in a bounded queue. When the queue is full, new jobs are
+    dropped instead of blocking the caller.
+
+    Args:
+        num_workers (int): The number of threads.
+        max_pending (int): The maximum number of jobs waiting in the queue.
+    """
+
+    def __init__(self, num_workers: int, max_pending: int) -> None:
+        self._queue: queue.Queue = queue.Queue(max_pending)
+        self._error: Optional[Exception] = None
+        self.num_dropped = 0
+        for _ in range(num_workers):
+            threading.Thread(target=self._run, daemon=True).start()
+
+    def _run(self) -> None:
+        while True:
+            fn, args, kwargs = self._queue.get()
+            try:
+                fn(*args, **kwargs)
+            except Exception as e:
+                if self._error is None:
+                    self._error = e
+            finally:
+                self._queue.task_done()
+
+    def submit(self, fn: Callable, *args, **kwargs) -> bool:
+        """Queue a job, or drop it if the queue is full.
+
+        Returns:
+            bool: Whether the job is queued.
+        """
+        try:
+            self._queue.put_nowait((fn, args, kwargs))
+        except queue.Full:
+            self.num_dropped += 1
+            return False
+        return True
+
+    def flush(self) -> int:
+        """Wait for the queued jobs and raise the first error of them.
+
+        Returns:
+            int: The number of jobs dropped since the last flush.
+        """
+        self._queue.join()
+        num_dropped, self.num_dropped = self.num_dropped, 0
+        error, self._error = self._error, None
+        if error is not None:
+            raise error
+        return num_dropped
+
+
+class _AsyncDrawMixin:
+    """Draw data samples on the images in background threads.
+
+    The predictions of data samples are moved to the host before they are
+    queued, and the images are loaded and drawn by the workers. The drawing
+    is serialized since the visualizer is shared by the workers.
+    """
+    _visualizer: Visualizer
+    async_workers: int
+    max_pending: int
+    show: bool
+    backend_args: Optional[dict]
+
+    def _init_async(self, async_workers: int, max_pending: int) -> None:
+        # the images are shown in the main thread
+        self.async_workers = 0 if self.show else async_workers
+        self.max_pending = max_pending
+        self._workers: Optional[_DrawWorkers] = None
+        self._draw_lock = threading.Lock()
+
+    def _draw_datasample(self, name: str, img_path: str,
+                         data_sample: DetDataSample, **kwargs) -> None:
+        """Load an image and draw a data sample on it."""
+        img_bytes = get(img_path, backend_args=self.backend_args)
+        img = mmcv.imfrombytes(img_bytes, channel_order='rgb')
+        with self._draw_lock:
+            self._visualizer.add_datasample(
+                name, img, data_sample=data_sample, **kwargs)
+
+    def _add_datasample(self, name: str, img_path: str,
+                        data_sample: DetDataSample, **kwargs) -> None:
+        """Draw a data sample, in the background if ``async_workers > 0``.
+
+        Args:
+            name (str): The image identifier.
+            img_path (str): The path of the image.
+            data_sample (:obj:`DetDataSample`): The data sample to draw.
+            **kwargs: Other arguments of ``add_datasample``.
+        """
+        if self.async_workers <= 0:
+            self._draw_datasample(name, img_path, data_sample, **kwargs)
+            return
+        if self._workers is None:
+            self._workers = _DrawWorkers(self.async_workers, self.max_pending)
+        self._workers.submit(self._draw_datasample, name, img_path,
+                             data_sample.cpu(), **kwargs)
+
+    def _flush(self) -> None:
+        """Wait for the queued data samples to be drawn."""
+        if self._workers is None:
+            return
+        num_dropped = self._workers.flush()
+        if num_dropped > 0:
+            print_log(
+                f'{num_dropped} images are not visualized since the '
+                f'visualization queue is full, please increase '
+                f'max_pending or async_workers.',
+                logger='current',
+                level=logging.WARNING)
+
+    def after_val_epoch(self,
+                        runner: Runner,
+                        metrics: Optional[Dict[str, float]] = None) -> None:
+        """Wait for the images to be drawn after the validation loop."""
+        self._flush()
+
+    def after_test_epoch(self,
+                         runner: Runner,
+                         metrics: Optional[Dict[str, float]] = None) -> None:
+        """Wait for the images to be drawn after the testing loop."""
+        self._flush()
+
+
 @HOOKS.register_module()
-class DetVisualizationHook(Hook):
+class DetVisualizationHook(_AsyncDrawMixin, Hook):
     """Detection Visualization Hook. Used to visualize validation and testing
     process prediction results.
 
@@ -48,6 +181,12 @@ class DetVisualizationHook(Hook):
             will be saved in testing process.
         backend_args (dict, optional): Arguments to instantiate the
             corresponding backend. Defaults to None.
+        async_workers (int): The number of background threads loading and
+            drawing the images. If it is 0, the images are drawn in the
+            loop. It is ignored if ``show`` is True. Defaults to 0.
+        max_pending (int): The maximum number of images waiting to be drawn
+            by the background threads. The images beyond it are skipped
+            instead of blocking the loop. Defaults to 16.
     """
 
     def __init__(self,
@@ -57,7 +196,9 @@ class DetVisualizationHook(Hook):
                  show: bool = False,
                  wait_time: float = 0.,
                  test_out_dir: Optional[str] = None,
-                 backend_args: dict = None):
+                 backend_args: dict = None,
+                 async_workers: int = 0,
+                 max_pending: int = 16):
         self._visualizer: Visualizer = Visualizer.get_current_instance()
         self.interval = interval
         self.score_thr = score_thr
@@ -75,6 +216,7 @@ class DetVisualizationHook(Hook):
         self.draw = draw
         self.test_out_dir = test_out_dir
         self._test_index = 0
+        self._init_async(async_workers, max_pending)
 
     def after_val_iter(self, runner: Runner, batch_idx: int, data_batch: dict,
                        outputs: Sequence[DetDataSample]) -> None:
@@ -96,14 +238,12 @@ class DetVisualizationHook(Hook):
 
         # Visualize only the first data
         img_path = outputs[0].img_path
-        img_bytes = get(img_path, backend_args=self.backend_args)
-        img = mmcv.imfrombytes(img_bytes, channel_order='rgb')
 
         if total_curr_iter % self.interval == 0:
-            self._visualizer.add_datasample(
+            self._add_datasample(
                 osp.basename(img_path) if self.show else 'val_img',
-                img,
-                data_sample=outputs[0],
+                img_path,
+                outputs[0],
                 show=self.show,
                 wait_time=self.wait_time,
                 pred_score_thr=self.score_thr,
@@ -132,18 +272,16 @@ class DetVisualizationHook(Hook):
             self._test_index += 1
 
             img_path = data_sample.img_path
-            img_bytes = get(img_path, backend_args=self.backend_args)
-            img = mmcv.imfrombytes(img_bytes, channel_order='rgb')
 
             out_file = None
             if self.test_out_dir is not None:
                 out_file = osp.basename(img_path)
                 out_file = osp.join(self.test_out_dir, out_file)
 
-            self._visualizer.add_datasample(
+            self._add_datasample(
                 osp.basename(img_path) if self.show else 'test_img',
-                img,
-                data_sample=data_sample,
+                img_path,
+                data_sample,
                 show=self.show,
                 wait_time=self.wait_time,
                 pred_score_thr=self.score_thr,
@@ -152,7 +290,7 @@ class DetVisualizationHook(Hook):
 
 
 @HOOKS.register_module()
-class TrackVisualizationHook(Hook):
+class TrackVisualizationHook(_AsyncDrawMixin, Hook):
     """Tracking Visualization Hook. Used to visualize validation and testing
     process prediction results.
 
@@ -181,6 +319,12 @@ class TrackVisualizationHook(Hook):
             will be saved in testing process.
         backend_args (dict): Arguments to instantiate a file client.
             Defaults to ``None``.
+        async_workers (int): The number of background threads loading and
+            drawing the images. If it is 0, the images are drawn in the
+            loop. It is ignored if ``show`` is True. Defaults to 0.
+        max_pending (int): The maximum number of images waiting to be drawn
+            by the background threads. The images beyond it are skipped
+            instead of blocking the loop. Defaults to 16.
     """
 
     def __init__(self,
@@ -190,7 +334,9 @@ class TrackVisualizationHook(Hook):
                  show: bool = False,
                  wait_time: float = 0.,
                  test_out_dir: Optional[str] = None,
-                 backend_args: dict = None) -> None:
+                 backend_args: dict = None,
+                 async_workers: int = 0,
+                 max_pending: int = 16) -> None:
         self._visualizer: Visualizer = Visualizer.get_current_instance()
         self.frame_interval = frame_interval
         self.score_thr = score_thr
@@ -208,6 +354,7 @@ class TrackVisualizationHook(Hook):
         self.draw = draw
         self.test_out_dir = test_out_dir
         self.image_idx = 0
+        self._init_async(async_workers, max_pending)
 
     def after_val_iter(self, runner: Runner, batch_idx: int, data_batch: dict,
                        outputs: Sequence[TrackDataSample]) -> None:
@@ -294,8 +441,6 @@ class TrackVisualizationHook(Hook):
             step (int): The index of the current image.
         """
         img_path = img_data_sample.img_path
-        img_bytes = get(img_path, backend_args=self.backend_args)
-        img = mmcv.imfrombytes(img_bytes, channel_order='rgb')
 
         out_file = None
         if self.test_out_dir is not None:
@@ -304,10 +449,10 @@ class TrackVisualizationHook(Hook):
             out_file = osp.join(self.test_out_dir, video_name,
                                 osp.basename(img_path))
 
-        self._visualizer.add_datasample(
+        self._add_datasample(
             osp.basename(img_path) if self.show else 'test_img',
-            img,
-            data_sample=img_data_sample,
+            img_path,
+            img_data_sample,
             show=self.show,
             wait_time=self.wait_time,
             pred_score_thr=self.score_thr,
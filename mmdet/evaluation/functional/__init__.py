@@ -8,7 +8,7 @@ from .class_names import (cityscapes_classes, coco_classes,
                           oid_challenge_classes, oid_v6_classes, voc_classes)
 from .mean_ap import average_precision, eval_map, print_map_summary
 from .panoptic_utils import (INSTANCE_OFFSET, pq_compute_multi_core,
-                             pq_compute_single_core)
+                             pq_compute_single_core, pq_compute_single_image)
 from .recall import (eval_recalls, plot_iou_recall, plot_num_recall,
                      print_recall_summary)
 from .ytvis import YTVIS
@@ -22,5 +22,5 @@ __all__ = [
     'oid_v6_classes', 'oid_challenge_classes', 'INSTANCE_OFFSET',
     'pq_compute_single_core', 'pq_compute_multi_core', 'bbox_overlaps',
     'objects365v1_classes', 'objects365v2_classes', 'coco_panoptic_classes',
-    'evaluateImgLists', 'YTVIS', 'YTVISeval'
+    'evaluateImgLists', 'YTVIS', 'YTVISeval', 'pq_compute_single_image'
 ]
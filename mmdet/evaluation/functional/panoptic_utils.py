@@ -27,6 +27,121 @@ except ImportError:
     OFFSET = 256 * 256 * 256
 
 
+def pq_compute_single_image(pq_stat, pan_gt, pan_pred, gt_ann, pred_ann,
+                            categories):
+    """Accumulate the statistics of Panoptic Segmentation on an image.
+
+    The statistics are the same as those computed by
+    `pq_compute_single_core` in `panopticapi` for the image, but the
+    segment ids are counted in one pass over the image.
+
+    Args:
+        pq_stat (PQStat): The statistics to update in place.
+        pan_gt (np.ndarray): The segment ids of the ground truth with the
+            shape (H, W).
+        pan_pred (np.ndarray): The segment ids of the prediction with the
+            shape (H, W).
+        gt_ann (dict): The ground truth annotation of the image.
+        pred_ann (dict): The prediction annotation of the image. The areas
+            of its segments are updated in place.
+        categories (dict): The categories of the dataset.
+
+    Returns:
+        PQStat: The updated statistics.
+    """
+    gt_segms = {el['id']: el for el in gt_ann['segments_info']}
+    pred_segms = {el['id']: el for el in pred_ann['segments_info']}
+
+    # confusion matrix calculation
+    pan_gt_pred = pan_gt.astype(np.uint64) * OFFSET + pan_pred.astype(
+        np.uint64)
+    labels, labels_cnt = np.unique(pan_gt_pred, return_counts=True)
+    gt_ids = (labels // OFFSET).tolist()
+    pred_ids = (labels % OFFSET).tolist()
+    labels_cnt = labels_cnt.tolist()
+    gt_pred_map = dict(zip(zip(gt_ids, pred_ids), labels_cnt))
+
+    # the area of a predicted segment is the sum of its intersections
+    pred_areas = dict()
+    for pred_id, intersection in zip(pred_ids, labels_cnt):
+        pred_areas[pred_id] = pred_areas.get(pred_id, 0) + intersection
+
+    # predicted segments area calculation + prediction sanity checks
+    pred_labels_set = set(el['id'] for el in pred_ann['segments_info'])
+    for label, label_cnt in pred_areas.items():
+        if label not in pred_segms:
+            if label == VOID:
+                continue
+            raise KeyError(
+                'In the image with ID {} segment with ID {} is '
+                'presented in PNG and not presented in JSON.'.format(
+                    gt_ann['image_id'], label))
+        pred_segms[label]['area'] = label_cnt
+        pred_labels_set.remove(label)
+        if pred_segms[label]['category_id'] not in categories:
+            raise KeyError('In the image with ID {} segment with ID {} has '
+                           'unknown category_id {}.'.format(
+                               gt_ann['image_id'], label,
+                               pred_segms[label]['category_id']))
+    if len(pred_labels_set) != 0:
+        raise KeyError(
+            'In the image with ID {} the following segment IDs {} '
+            'are presented in JSON and not presented in PNG.'.format(
+                gt_ann['image_id'], list(pred_labels_set)))
+
+    # count all matched pairs
+    gt_matched = set()
+    pred_matched = set()
+    for label_tuple, intersection in gt_pred_map.items():
+        gt_label, pred_label = label_tuple
+        if gt_label not in gt_segms:
+            continue
+        if pred_label not in pred_segms:
+            continue
+        if gt_segms[gt_label]['iscrowd'] == 1:
+            continue
+        if gt_segms[gt_label]['category_id'] != pred_segms[pred_label][
+                'category_id']:
+            continue
+
+        union = pred_segms[pred_label]['area'] + gt_segms[gt_label][
+            'area'] - intersection - gt_pred_map.get((VOID, pred_label), 0)
+        iou = intersection / union
+        if iou > 0.5:
+            pq_stat[gt_segms[gt_label]['category_id']].tp += 1
+            pq_stat[gt_segms[gt_label]['category_id']].iou += iou
+            gt_matched.add(gt_label)
+            pred_matched.add(pred_label)
+
+    # count false positives
+    crowd_labels_dict = {}
+    for gt_label, gt_info in gt_segms.items():
+        if gt_label in gt_matched:
+            continue
+        # crowd segments are ignored
+        if gt_info['iscrowd'] == 1:
+            crowd_labels_dict[gt_info['category_id']] = gt_label
+            continue
+        pq_stat[gt_info['category_id']].fn += 1
+
+    # count false positives
+    for pred_label, pred_info in pred_segms.items():
+        if pred_label in pred_matched:
+            continue
+        # intersection of the segment with VOID
+        intersection = gt_pred_map.get((VOID, pred_label), 0)
+        # plus intersection with corresponding CROWD region if it exists
+        if pred_info['category_id'] in crowd_labels_dict:
+            intersection += gt_pred_map.get(
+                (crowd_labels_dict[pred_info['category_id']], pred_label), 0)
+        # predicted segment is ignored if more than half of
+        # the segment correspond to VOID and CROWD regions
+        if intersection / pred_info['area'] > 0.5:
+            continue
+        pq_stat[pred_info['category_id']].fp += 1
+    return pq_stat
+
+
 def pq_compute_single_core(proc_id,
                            annotation_set,
                            gt_folder,
@@ -78,95 +193,8 @@ def pq_compute_single_core(proc_id,
             channel_order='rgb')
         pan_pred = rgb2id(pan_pred)
 
-        gt_segms = {el['id']: el for el in gt_ann['segments_info']}
-        pred_segms = {el['id']: el for el in pred_ann['segments_info']}
-
-        # predicted segments area calculation + prediction sanity checks
-        pred_labels_set = set(el['id'] for el in pred_ann['segments_info'])
-        labels, labels_cnt = np.unique(pan_pred, return_counts=True)
-        for label, label_cnt in zip(labels, labels_cnt):
-            if label not in pred_segms:
-                if label == VOID:
-                    continue
-                raise KeyError(
-                    'In the image with ID {} segment with ID {} is '
-                    'presented in PNG and not presented in JSON.'.format(
-                        gt_ann['image_id'], label))
-            pred_segms[label]['area'] = label_cnt
-            pred_labels_set.remove(label)
-            if pred_segms[label]['category_id'] not in categories:
-                raise KeyError(
-                    'In the image with ID {} segment with ID {} has '
-                    'unknown category_id {}.'.format(
-                        gt_ann['image_id'], label,
-                        pred_segms[label]['category_id']))
-        if len(pred_labels_set) != 0:
-            raise KeyError(
-                'In the image with ID {} the following segment IDs {} '
-                'are presented in JSON and not presented in PNG.'.format(
-                    gt_ann['image_id'], list(pred_labels_set)))
-
-        # confusion matrix calculation
-        pan_gt_pred = pan_gt.astype(np.uint64) * OFFSET + pan_pred.astype(
-            np.uint64)
-        gt_pred_map = {}
-        labels, labels_cnt = np.unique(pan_gt_pred, return_counts=True)
-        for label, intersection in zip(labels, labels_cnt):
-            gt_id = label // OFFSET
-            pred_id = label % OFFSET
-            gt_pred_map[(gt_id, pred_id)] = intersection
-
-        # count all matched pairs
-        gt_matched = set()
-        pred_matched = set()
-        for label_tuple, intersection in gt_pred_map.items():
-            gt_label, pred_label = label_tuple
-            if gt_label not in gt_segms:
-                continue
-            if pred_label not in pred_segms:
-                continue
-            if gt_segms[gt_label]['iscrowd'] == 1:
-                continue
-            if gt_segms[gt_label]['category_id'] != pred_segms[pred_label][
-                    'category_id']:
-                continue
-
-            union = pred_segms[pred_label]['area'] + gt_segms[gt_label][
-                'area'] - intersection - gt_pred_map.get((VOID, pred_label), 0)
-            iou = intersection / union
-            if iou > 0.5:
-                pq_stat[gt_segms[gt_label]['category_id']].tp += 1
-                pq_stat[gt_segms[gt_label]['category_id']].iou += iou
-                gt_matched.add(gt_label)
-                pred_matched.add(pred_label)
-
-        # count false positives
-        crowd_labels_dict = {}
-        for gt_label, gt_info in gt_segms.items():
-            if gt_label in gt_matched:
-                continue
-            # crowd segments are ignored
-            if gt_info['iscrowd'] == 1:
-                crowd_labels_dict[gt_info['category_id']] = gt_label
-                continue
-            pq_stat[gt_info['category_id']].fn += 1
-
-        # count false positives
-        for pred_label, pred_info in pred_segms.items():
-            if pred_label in pred_matched:
-                continue
-            # intersection of the segment with VOID
-            intersection = gt_pred_map.get((VOID, pred_label), 0)
-            # plus intersection with corresponding CROWD region if it exists
-            if pred_info['category_id'] in crowd_labels_dict:
-                intersection += gt_pred_map.get(
-                    (crowd_labels_dict[pred_info['category_id']], pred_label),
-                    0)
-            # predicted segment is ignored if more than half of
-            # the segment correspond to VOID and CROWD regions
-            if intersection / pred_info['area'] > 0.5:
-                continue
-            pq_stat[pred_info['category_id']].fp += 1
+        pq_compute_single_image(pq_stat, pan_gt, pan_pred, gt_ann, pred_ann,
+                                categories)
 
     if print_log:
         print('Core: {}, all {} images processed'.format(
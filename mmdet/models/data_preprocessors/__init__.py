@@ -1,4 +1,7 @@
 # Copyright (c) OpenMMLab. All rights reserved.
+from .batch_augments import (BatchPhotoMetricDistortion, BatchRandomAffine,
+                             BatchRandomCrop, BatchRandomFlip,
+                             BatchYOLOXHSVRandomAug)
 from .data_preprocessor import (BatchFixedSizePad, BatchResize,
                                 BatchSyncRandomResize, BoxInstDataPreprocessor,
                                 DetDataPreprocessor,
@@ -9,5 +12,7 @@ from .track_data_preprocessor import TrackDataPreprocessor
 __all__ = [
     'DetDataPreprocessor', 'BatchSyncRandomResize', 'BatchFixedSizePad',
     'MultiBranchDataPreprocessor', 'BatchResize', 'BoxInstDataPreprocessor',
-    'TrackDataPreprocessor', 'ReIDDataPreprocessor'
+    'TrackDataPreprocessor', 'ReIDDataPreprocessor', 'BatchRandomFlip',
+    'BatchPhotoMetricDistortion', 'BatchYOLOXHSVRandomAug', 'BatchRandomCrop',
+    'BatchRandomAffine'
 ]
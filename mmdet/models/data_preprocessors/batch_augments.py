@@ -0,0 +1,709 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+import math
+from typing import Callable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+from mmengine.structures import InstanceData, PixelData
+from torch import Tensor
+
+from mmdet.registry import MODELS
+from mmdet.structures import DetDataSample
+from mmdet.structures.bbox import BaseBoxes, HorizontalBoxes
+
+
+def _to_boxes(bboxes: Union[Tensor, BaseBoxes]) -> BaseBoxes:
+    """Wrap tensor bboxes with :obj:`HorizontalBoxes`."""
+    return bboxes if isinstance(bboxes, BaseBoxes) else HorizontalBoxes(
+        bboxes.clone())
+
+
+def _from_boxes(boxes: BaseBoxes,
+                like: Union[Tensor, BaseBoxes]) -> Union[Tensor, BaseBoxes]:
+    """Convert boxes back to the type of ``like``."""
+    return boxes if isinstance(like, BaseBoxes) else boxes.tensor
+
+
+def _update_instances(data_sample: DetDataSample,
+                      fn: Callable[[InstanceData], InstanceData]) -> None:
+    """Apply ``fn`` to the gt and ignored instances of a data sample."""
+    for key in ('gt_instances', 'ignored_instances'):
+        if key in data_sample:
+            setattr(data_sample, key, fn(getattr(data_sample, key)))
+
+
+def _record_homography_matrix(data_sample: DetDataSample,
+                              homography_matrix: np.ndarray) -> None:
+    """Compose ``homography_matrix`` into the homography matrix of a data
+    sample, as the per-image transforms do."""
+    homography_matrix = homography_matrix.astype(np.float32)
+    if data_sample.get('homography_matrix', None) is not None:
+        homography_matrix = homography_matrix @ data_sample.homography_matrix
+    data_sample.set_metainfo(dict(homography_matrix=homography_matrix))
+
+
+def _valid_mask(inputs: Tensor,
+                data_samples: Optional[List[DetDataSample]]) -> Tensor:
+    """Get the mask of the unpadded pixels of each image, of shape
+    (N, 1, H, W)."""
+    num_imgs, _, height, width = inputs.shape
+    if data_samples is None:
+        return inputs.new_ones((num_imgs, 1, height, width), dtype=torch.bool)
+    img_shapes = inputs.new_tensor(
+        [data_sample.img_shape[:2] for data_sample in data_samples],
+        dtype=torch.long)
+    ys = torch.arange(height, device=inputs.device)
+    xs = torch.arange(width, device=inputs.device)
+    valid_y = ys[None] < img_shapes[:, :1]
+    valid_x = xs[None] < img_shapes[:, 1:]
+    return (valid_y[:, :, None] & valid_x[:, None, :])[:, None]
+
+
+def _rgb_to_hsv(img: Tensor) -> Tensor:
+    """Convert RGB images of shape (N, 3, H, W) to HSV, in the value ranges
+    of OpenCV for float images, i.e. H in [0, 360), S in [0, 1] and V
+    unchanged."""
+    r, g, b = img.unbind(dim=1)
+    max_value, max_idx = img.max(dim=1)
+    delta = max_value - img.min(dim=1)[0]
+    safe_delta = torch.where(delta == 0, torch.ones_like(delta), delta)
+    hue = torch.stack([(g - b) / safe_delta, (b - r) / safe_delta + 2,
+                       (r - g) / safe_delta + 4],
+                      dim=1).gather(1, max_idx[:, None])[:, 0] * 60
+    hue = torch.where(delta == 0, torch.zeros_like(hue), hue % 360)
+    safe_max = torch.where(max_value == 0, torch.ones_like(max_value),
+                           max_value)
+    saturation = torch.where(max_value == 0, torch.zeros_like(delta),
+                             delta / safe_max)
+    return torch.stack([hue, saturation, max_value], dim=1)
+
+
+def _hsv_to_rgb(img: Tensor) -> Tensor:
+    """Convert HSV images in the value ranges of :func:`_rgb_to_hsv` back to
+    RGB."""
+    hue, saturation, value = img.unbind(dim=1)
+    channels = []
+    for n in (5, 3, 1):
+        k = (n + hue / 60) % 6
+        weight = torch.minimum(k, 4 - k).clamp(0, 1)
+        channels.append(value - value * saturation * weight)
+    return torch.stack(channels, dim=1)
+
+
+class _BatchPixelAugment(nn.Module):
+    """Base class of the batch augmentations working on pixel values.
+
+    The batch augmentations run after the inputs are normalized. If
+    :meth:`set_normalization` is called, which :class:`DetDataPreprocessor`
+    does, the inputs are converted back to pixel values before augmenting
+    and normalized again afterwards. Otherwise the inputs are assumed to be
+    pixel values in BGR order.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.register_buffer('mean', None, False)
+        self.register_buffer('std', None, False)
+        self.rgb = False
+
+    def set_normalization(self, mean: Optional[Tensor], std: Optional[Tensor],
+                          rgb: bool) -> None:
+        """Set the normalization of the inputs.
+
+        Args:
+            mean (Tensor, optional): The pixel mean of shape (C, 1, 1).
+            std (Tensor, optional): The pixel std of shape (C, 1, 1).
+            rgb (bool): Whether the channels of the inputs are in RGB order.
+        """
+        self.mean = None if mean is None else mean.detach().clone()
+        self.std = None if std is None else std.detach().clone()
+        self.rgb = rgb
+
+    def to_pixels(self, inputs: Tensor) -> Tensor:
+        """Denormalize the inputs."""
+        if self.mean is None:
+            return inputs
+        return inputs * self.std + self.mean
+
+    def from_pixels(self, inputs: Tensor) -> Tensor:
+        """Normalize the pixel values."""
+        if self.mean is None:
+            return inputs
+        return (inputs - self.mean) / self.std
+
+    def to_hsv(self, inputs: Tensor) -> Tensor:
+        """Convert the pixel values to HSV."""
+        return _rgb_to_hsv(inputs if self.rgb else inputs.flip(1))
+
+    def from_hsv(self, inputs: Tensor) -> Tensor:
+        """Convert HSV back to the channel order of the inputs."""
+        inputs = _hsv_to_rgb(inputs)
+        return inputs if self.rgb else inputs.flip(1)
+
+
+@MODELS.register_module()
+class BatchRandomFlip(nn.Module):
+    """Batch version of :class:`RandomFlip`.
+
+    Each image is flipped within its unpadded region, together with its
+    bboxes, masks and semantic segmentation map.
+
+    Args:
+        prob (float | list[float]): The flipping probability. If it is a
+            list, it is the probability of each direction in ``direction``.
+            Defaults to 0.5.
+        direction (str | list[str]): The flipping direction(s), options are
+            'horizontal', 'vertical' and 'diagonal'.
+            Defaults to 'horizontal'.
+    """
+
+    def __init__(self,
+                 prob: Union[float, List[float]] = 0.5,
+                 direction: Union[str, List[str]] = 'horizontal') -> None:
+        super().__init__()
+        directions = [direction] if isinstance(direction,
+                                               str) else list(direction)
+        assert set(directions) <= {'horizontal', 'vertical', 'diagonal'}
+        if isinstance(prob, (list, tuple)):
+            assert len(prob) == len(directions)
+            probs = list(prob)
+        else:
+            probs = [prob / len(directions)] * len(directions)
+        assert 0 <= sum(probs) <= 1
+        self.prob = prob
+        self.direction = direction
+        self._choices = directions + [None]
+        self._probs = probs + [1 - sum(probs)]
+
+    def forward(
+        self, inputs: Tensor, data_samples: List[DetDataSample]
+    ) -> Tuple[Tensor, List[DetDataSample]]:
+        """Randomly flip a batch of images and their annotations."""
+        inds = np.random.choice(
+            len(self._choices), size=len(data_samples), p=self._probs)
+        for i, data_sample in enumerate(data_samples):
+            direction = self._choices[inds[i]]
+            if direction is None:
+                continue
+            h, w = data_sample.img_shape[:2]
+            dims = dict(
+                horizontal=[-1], vertical=[-2], diagonal=[-2, -1])[direction]
+            inputs[i, :, :h, :w] = inputs[i, :, :h, :w].flip(dims)
+
+            def flip_instances(instances):
+                if 'bboxes' in instances:
+                    boxes = _to_boxes(instances.bboxes)
+                    boxes.flip_((h, w), direction)
+                    instances.bboxes = _from_boxes(boxes, instances.bboxes)
+                if 'masks' in instances:
+                    masks = instances.masks
+                    pad_shape = (masks.height, masks.width)
+                    if pad_shape != (h, w):
+                        # flip the unpadded region of padded masks
+                        masks = masks.crop(np.array(
+                            [0, 0, w, h])).flip(direction).pad(pad_shape)
+                    else:
+                        masks = masks.flip(direction)
+                    instances.masks = masks
+                return instances
+
+            _update_instances(data_sample, flip_instances)
+            if 'gt_sem_seg' in data_sample:
+                sem_seg = data_sample.gt_sem_seg.sem_seg.clone()
+                sem_seg[..., :h, :w] = sem_seg[..., :h, :w].flip(dims)
+                data_sample.gt_sem_seg = PixelData(sem_seg=sem_seg)
+            data_sample.set_metainfo(dict(flip=True, flip_direction=direction))
+            homography_matrix = dict(
+                horizontal=[[-1, 0, w], [0, 1, 0], [0, 0, 1]],
+                vertical=[[1, 0, 0], [0, -1, h], [0, 0, 1]],
+                diagonal=[[-1, 0, w], [0, -1, h], [0, 0, 1]])[direction]
+            _record_homography_matrix(data_sample, np.array(homography_matrix))
+        return inputs, data_samples
+
+
+@MODELS.register_module()
+class BatchPhotoMetricDistortion(_BatchPixelAugment):
+    """Batch version of :class:`PhotoMetricDistortion`.
+
+    The random parameters are sampled independently for every image and
+    all the images are distorted at once. Only the unpadded pixels are
+    changed.
+
+    Args:
+        brightness_delta (int): delta of brightness.
+        contrast_range (sequence): range of contrast.
+        saturation_range (sequence): range of saturation.
+        hue_delta (int): delta of hue.
+    """
+
+    def __init__(self,
+                 brightness_delta: int = 32,
+                 contrast_range: Sequence[float] = (0.5, 1.5),
+                 saturation_range: Sequence[float] = (0.5, 1.5),
+                 hue_delta: int = 18) -> None:
+        super().__init__()
+        self.brightness_delta = brightness_delta
+        self.contrast_lower, self.contrast_upper = contrast_range
+        self.saturation_lower, self.saturation_upper = saturation_range
+        self.hue_delta = hue_delta
+
+    def forward(
+        self, inputs: Tensor, data_samples: Optional[List[DetDataSample]]
+    ) -> Tuple[Tensor, Optional[List[DetDataSample]]]:
+        """Distort a batch of images."""
+        num_imgs = inputs.size(0)
+
+        def rand_flags():
+            return torch.randint(
+                2, (num_imgs, 1, 1, 1), device=inputs.device).bool()
+
+        def rand_values(low, high):
+            return torch.empty((num_imgs, 1, 1, 1),
+                               device=inputs.device).uniform_(low, high)
+
+        mode = rand_flags()
+        brightness = rand_values(-self.brightness_delta,
+                                 self.brightness_delta) * rand_flags()
+        contrast = torch.where(
+            rand_flags(), rand_values(self.contrast_lower,
+                                      self.contrast_upper),
+            torch.ones_like(brightness))
+        saturation = torch.where(
+            rand_flags(),
+            rand_values(self.saturation_lower, self.saturation_upper),
+            torch.ones_like(brightness))[:, 0]
+        hue = (rand_values(-self.hue_delta, self.hue_delta) * rand_flags())[:,
+                                                                            0]
+        swap_flags = rand_flags()
+        swap = torch.rand((num_imgs, 3), device=inputs.device).argsort(dim=1)
+        swap = torch.where(swap_flags[:, :, 0, 0], swap,
+                           torch.arange(3, device=inputs.device))
+
+        img = self.to_pixels(inputs) + brightness
+        # mode == 1 --> do random contrast first
+        # mode == 0 --> do random contrast last
+        img = torch.where(mode, img * contrast, img)
+        hsv = self.to_hsv(img)
+        hsv_s = hsv[:, 1] * saturation
+        hsv_s = torch.where(saturation > 1, hsv_s.clamp(0, 1), hsv_s)
+        hsv_h = (hsv[:, 0] + hue) % 360
+        img = self.from_hsv(torch.stack([hsv_h, hsv_s, hsv[:, 2]], dim=1))
+        img = torch.where(mode, img, img * contrast)
+        img = img.gather(
+            1, swap[:, :, None, None].expand(-1, -1, *img.shape[-2:]))
+
+        valid = _valid_mask(inputs, data_samples)
+        inputs = torch.where(valid, self.from_pixels(img), inputs)
+        return inputs, data_samples
+
+
+@MODELS.register_module()
+class BatchYOLOXHSVRandomAug(_BatchPixelAugment):
+    """Batch version of :class:`YOLOXHSVRandomAug`.
+
+    The HSV gains are sampled independently for every image. The HSV values
+    are not quantized to uint8 as in the per-image version.
+
+    Args:
+        hue_delta (int): delta of hue. Defaults to 5.
+        saturation_delta (int): delta of saturation. Defaults to 30.
+        value_delta (int): delat of value. Defaults to 30.
+    """
+
+    def __init__(self,
+                 hue_delta: int = 5,
+                 saturation_delta: int = 30,
+                 value_delta: int = 30) -> None:
+        super().__init__()
+        self.hue_delta = hue_delta
+        self.saturation_delta = saturation_delta
+        self.value_delta = value_delta
+
+    def forward(
+        self, inputs: Tensor, data_samples: Optional[List[DetDataSample]]
+    ) -> Tuple[Tensor, Optional[List[DetDataSample]]]:
+        """Augment the HSV of a batch of images."""
+        num_imgs = inputs.size(0)
+        deltas = inputs.new_tensor(
+            [self.hue_delta, self.saturation_delta, self.value_delta])
+        hsv_gains = torch.empty(
+            (num_imgs, 3), device=inputs.device).uniform_(-1, 1) * deltas
+        # random selection of h, s, v
+        hsv_gains *= torch.randint(2, (num_imgs, 3), device=inputs.device)
+        hsv_gains = hsv_gains.trunc()[:, :, None, None]
+
+        img = self.to_pixels(inputs).clamp(0, 255)
+        hsv = self.to_hsv(img)
+        # the gains are in the uint8 ranges of OpenCV, where H is in [0, 180)
+        hsv_h = (hsv[:, 0:1] + hsv_gains[:, 0:1] * 2) % 360
+        hsv_s = (hsv[:, 1:2] * 255 + hsv_gains[:, 1:2]).clamp(0, 255) / 255
+        hsv_v = (hsv[:, 2:3] + hsv_gains[:, 2:3]).clamp(0, 255)
+        img = self.from_hsv(torch.cat([hsv_h, hsv_s, hsv_v], dim=1))
+
+        valid = _valid_mask(inputs, data_samples)
+        inputs = torch.where(valid, self.from_pixels(img), inputs)
+        return inputs, data_samples
+
+
+@MODELS.register_module()
+class BatchRandomCrop(nn.Module):
+    """Batch version of :class:`RandomCrop`.
+
+    Each image is cropped within its unpadded region and the crops are
+    placed at the top-left corner of a new batch, which is padded to the
+    largest crop.
+
+    Different from :class:`RandomCrop`, which makes the dataset sample
+    another image, an image is left uncropped if its crop does not contain
+    any bbox and ``allow_negative_crop`` is False.
+
+    Args:
+        crop_size (tuple): The relative ratio or absolute pixels of
+            (width, height).
+        crop_type (str, optional): One of "relative_range", "relative",
+            "absolute", "absolute_range". See :class:`RandomCrop`.
+            Defaults to "absolute".
+        allow_negative_crop (bool, optional): Whether to allow a crop that does
+            not contain any bbox area. Defaults to False.
+        recompute_bbox (bool, optional): Whether to re-compute the boxes based
+            on cropped instance masks. Defaults to False.
+        bbox_clip_border (bool, optional): Whether clip the objects outside
+            the border of the image. Defaults to True.
+        size_divisor (int): The size of the new batch is divisible by
+            ``size_divisor``. Defaults to 32.
+        img_pad_value (int): The padded pixel value for images.
+            Defaults to 0.
+        seg_pad_value (int): The padded pixel value for semantic
+            segmentation maps. Defaults to 255.
+    """
+
+    def __init__(self,
+                 crop_size: tuple,
+                 crop_type: str = 'absolute',
+                 allow_negative_crop: bool = False,
+                 recompute_bbox: bool = False,
+                 bbox_clip_border: bool = True,
+                 size_divisor: int = 32,
+                 img_pad_value: int = 0,
+                 seg_pad_value: int = 255) -> None:
+        super().__init__()
+        if crop_type not in [
+                'relative_range', 'relative', 'absolute', 'absolute_range'
+        ]:
+            raise ValueError(f'Invalid crop_type {crop_type}.')
+        if crop_type in ['absolute', 'absolute_range']:
+            assert crop_size[0] > 0 and crop_size[1] > 0
+            assert isinstance(crop_size[0], int) and isinstance(
+                crop_size[1], int)
+            if crop_type == 'absolute_range':
+                assert crop_size[0] <= crop_size[1]
+        else:
+            assert 0 < crop_size[0] <= 1 and 0 < crop_size[1] <= 1
+        self.crop_size = crop_size
+        self.crop_type = crop_type
+        self.allow_negative_crop = allow_negative_crop
+        self.recompute_bbox = recompute_bbox
+        self.bbox_clip_border = bbox_clip_border
+        self.size_divisor = size_divisor
+        self.img_pad_value = img_pad_value
+        self.seg_pad_value = seg_pad_value
+
+    def _get_crop_size(self, image_size: Tuple[int, int]) -> Tuple[int, int]:
+        """Randomly generates the absolute crop size (h, w) of an image."""
+        h, w = image_size
+        if self.crop_type == 'absolute':
+            return min(self.crop_size[1], h), min(self.crop_size[0], w)
+        elif self.crop_type == 'absolute_range':
+            crop_h = np.random.randint(
+                min(h, self.crop_size[0]),
+                min(h, self.crop_size[1]) + 1)
+            crop_w = np.random.randint(
+                min(w, self.crop_size[0]),
+                min(w, self.crop_size[1]) + 1)
+            return crop_h, crop_w
+        elif self.crop_type == 'relative':
+            crop_w, crop_h = self.crop_size
+            return int(h * crop_h + 0.5), int(w * crop_w + 0.5)
+        else:
+            # 'relative_range'
+            crop_size = np.asarray(self.crop_size, dtype=np.float32)
+            crop_h, crop_w = crop_size + np.random.rand(2) * (1 - crop_size)
+            return int(h * crop_h + 0.5), int(w * crop_w + 0.5)
+
+    def _crop_instances(self, instances: InstanceData,
+                        crop_box: Tuple[int, int, int, int],
+                        pad_shape: Optional[Tuple[int, int]]) -> InstanceData:
+        """Crop the bboxes and masks of instances and drop the instances
+        outside the crop."""
+        x1, y1, x2, y2 = crop_box
+        crop_shape = (y2 - y1, x2 - x1)
+        bboxes = instances.bboxes
+        boxes = _to_boxes(bboxes)
+        boxes.translate_([-x1, -y1])
+        if self.bbox_clip_border:
+            boxes.clip_(crop_shape)
+        valid_inds = boxes.is_inside(crop_shape)
+        instances.bboxes = _from_boxes(boxes, bboxes)
+        instances = instances[valid_inds]
+        if 'masks' in instances:
+            masks = instances.masks
+            padded = pad_shape is not None and \
+                (masks.height, masks.width) != crop_shape
+            masks = masks.crop(np.asarray(crop_box))
+            if self.recompute_bbox:
+                instances.bboxes = _from_boxes(
+                    masks.get_bboxes(HorizontalBoxes), bboxes)
+            if padded:
+                masks = masks.pad(pad_shape)
+            instances.masks = masks
+        return instances
+
+    def forward(
+        self, inputs: Tensor, data_samples: List[DetDataSample]
+    ) -> Tuple[Tensor, List[DetDataSample]]:
+        """Randomly crop a batch of images and their annotations."""
+        batch_h, batch_w = inputs.shape[-2:]
+        crop_boxes = []
+        for data_sample in data_samples:
+            h, w = data_sample.img_shape[:2]
+            crop_h, crop_w = self._get_crop_size((h, w))
+            offset_h = np.random.randint(0, max(h - crop_h, 0) + 1)
+            offset_w = np.random.randint(0, max(w - crop_w, 0) + 1)
+            crop_box = (offset_w, offset_h, offset_w + crop_w,
+                        offset_h + crop_h)
+            if not self.allow_negative_crop:
+                boxes = _to_boxes(data_sample.gt_instances.bboxes)
+                boxes.translate_([-offset_w, -offset_h])
+                if self.bbox_clip_border:
+                    boxes.clip_((crop_h, crop_w))
+                if not boxes.is_inside((crop_h, crop_w)).any():
+                    crop_box = (0, 0, w, h)
+            crop_boxes.append(crop_box)
+
+        new_h = max(y2 - y1 for _, y1, _, y2 in crop_boxes)
+        new_w = max(x2 - x1 for x1, _, x2, _ in crop_boxes)
+        new_h = math.ceil(new_h / self.size_divisor) * self.size_divisor
+        new_w = math.ceil(new_w / self.size_divisor) * self.size_divisor
+        new_inputs = inputs.new_full((*inputs.shape[:2], new_h, new_w),
+                                     self.img_pad_value)
+        for i, (data_sample,
+                crop_box) in enumerate(zip(data_samples, crop_boxes)):
+            x1, y1, x2, y2 = crop_box
+            crop_h, crop_w = y2 - y1, x2 - x1
+            new_inputs[i, :, :crop_h, :crop_w] = inputs[i, :, y1:y2, x1:x2]
+            # the masks and segmentation maps padded to the batch shape are
+            # padded to the new batch shape again
+            pad_shape = (new_h, new_w) if 'masks' in data_sample.gt_instances \
+                and data_sample.gt_instances.masks.height == batch_h \
+                and data_sample.gt_instances.masks.width == batch_w else None
+            _update_instances(
+                data_sample, lambda instances: self._crop_instances(
+                    instances, crop_box, pad_shape))
+            if 'gt_sem_seg' in data_sample:
+                sem_seg = data_sample.gt_sem_seg.sem_seg
+                padded = sem_seg.shape[-2:] == (batch_h, batch_w)
+                sem_seg = sem_seg[..., y1:y2, x1:x2]
+                if padded:
+                    sem_seg = F.pad(
+                        sem_seg,
+                        pad=(0, new_w - crop_w, 0, new_h - crop_h),
+                        mode='constant',
+                        value=self.seg_pad_value)
+                data_sample.gt_sem_seg = PixelData(sem_seg=sem_seg)
+            data_sample.set_metainfo({
+                'img_shape': (crop_h, crop_w),
+                'pad_shape':
+                (math.ceil(crop_h / self.size_divisor) * self.size_divisor,
+                 math.ceil(crop_w / self.size_divisor) * self.size_divisor),
+                'batch_input_shape': (new_h, new_w)
+            })
+            _record_homography_matrix(
+                data_sample, np.array([[1, 0, -x1], [0, 1, -y1], [0, 0, 1]]))
+        return new_inputs, data_samples
+
+
+@MODELS.register_module()
+class BatchRandomAffine(_BatchPixelAugment):
+    """Batch version of :class:`RandomAffine`.
+
+    A random affine matrix is sampled for every image and all the images are
+    warped at once with :func:`F.grid_sample`. Each image keeps its shape,
+    i.e. ``border`` of :class:`RandomAffine`, which is only used after
+    mosaic, is not supported.
+
+    Args:
+        max_rotate_degree (float): Maximum degrees of rotation transform.
+            Defaults to 10.
+        max_translate_ratio (float): Maximum ratio of translation.
+            Defaults to 0.1.
+        scaling_ratio_range (tuple[float]): Min and max ratio of
+            scaling transform. Defaults to (0.5, 1.5).
+        max_shear_degree (float): Maximum degrees of shear
+            transform. Defaults to 2.
+        border_val (tuple[int]): Border padding values of 3 channels, in the
+            BGR order. Defaults to (114, 114, 114).
+        bbox_clip_border (bool, optional): Whether to clip the objects outside
+            the border of the image. Defaults to True.
+        min_bbox_size (float, optional): Width and height threshold to
+            filter bboxes. If the height or width of a box is smaller than
+            this value, it will be removed. Defaults to None, i.e. no
+            filtering as :class:`RandomAffine`.
+        min_area_ratio (float, optional): Threshold of area ratio between
+            original bboxes and wrapped bboxes. If smaller than this value,
+            the box will be removed. Defaults to None.
+        max_aspect_ratio (float, optional): Aspect ratio of width and height
+            threshold to filter bboxes. If max(h/w, w/h) larger than this
+            value, the box will be removed. Defaults to None.
+    """
+
+    def __init__(self,
+                 max_rotate_degree: float = 10.0,
+                 max_translate_ratio: float = 0.1,
+                 scaling_ratio_range: Tuple[float, float] = (0.5, 1.5),
+                 max_shear_degree: float = 2.0,
+                 border_val: Tuple[int, int, int] = (114, 114, 114),
+                 bbox_clip_border: bool = True,
+                 min_bbox_size: Optional[float] = None,
+                 min_area_ratio: Optional[float] = None,
+                 max_aspect_ratio: Optional[float] = None) -> None:
+        super().__init__()
+        assert 0 <= max_translate_ratio <= 1
+        assert scaling_ratio_range[0] <= scaling_ratio_range[1]
+        assert scaling_ratio_range[0] > 0
+        self.max_rotate_degree = max_rotate_degree
+        self.max_translate_ratio = max_translate_ratio
+        self.scaling_ratio_range = scaling_ratio_range
+        self.max_shear_degree = max_shear_degree
+        self.border_val = border_val
+        self.bbox_clip_border = bbox_clip_border
+        self.min_bbox_size = min_bbox_size
+        self.min_area_ratio = min_area_ratio
+        self.max_aspect_ratio = max_aspect_ratio
+
+    def _get_random_homography_matrix(
+            self, img_shapes: Tensor) -> Tuple[Tensor, Tensor]:
+        """Sample the warp matrices of shape (N, 3, 3) and the scaling ratios
+        of shape (N, ) of images of ``img_shapes`` (N, 2)."""
+        num_imgs = len(img_shapes)
+
+        def uniform(low, high):
+            return img_shapes.new_empty((num_imgs, )).uniform_(low, high)
+
+        radian = torch.deg2rad(
+            uniform(-self.max_rotate_degree, self.max_rotate_degree))
+        scale = uniform(*self.scaling_ratio_range)
+        shear_x = torch.tan(
+            torch.deg2rad(
+                uniform(-self.max_shear_degree, self.max_shear_degree)))
+        shear_y = torch.tan(
+            torch.deg2rad(
+                uniform(-self.max_shear_degree, self.max_shear_degree)))
+        trans_x = uniform(-self.max_translate_ratio,
+                          self.max_translate_ratio) * img_shapes[:, 1]
+        trans_y = uniform(-self.max_translate_ratio,
+                          self.max_translate_ratio) * img_shapes[:, 0]
+
+        eye = torch.eye(3, device=img_shapes.device).repeat(num_imgs, 1, 1)
+        rotation = eye.clone()
+        rotation[:, 0, 0] = torch.cos(radian)
+        rotation[:, 0, 1] = -torch.sin(radian)
+        rotation[:, 1, 0] = torch.sin(radian)
+        rotation[:, 1, 1] = torch.cos(radian)
+        scaling = eye.clone()
+        scaling[:, 0, 0] = scale
+        scaling[:, 1, 1] = scale
+        shear = eye.clone()
+        shear[:, 0, 1] = shear_x
+        shear[:, 1, 0] = shear_y
+        translation = eye.clone()
+        translation[:, 0, 2] = trans_x
+        translation[:, 1, 2] = trans_y
+        return translation @ shear @ rotation @ scaling, scale
+
+    def filter_gt_bboxes(self, origin_bboxes: BaseBoxes,
+                         wrapped_bboxes: BaseBoxes) -> Tensor:
+        """Get the valid mask of the wrapped bboxes, i.e. the ones which are
+        neither too small nor too thin and keep enough of the area of the
+        ``origin_bboxes``. The thresholds which are None are skipped."""
+        wrapped_w = wrapped_bboxes.widths
+        wrapped_h = wrapped_bboxes.heights
+        valid = wrapped_w.new_ones(wrapped_w.shape, dtype=torch.bool)
+        if self.min_bbox_size is not None:
+            valid &= (wrapped_w > self.min_bbox_size) & \
+                     (wrapped_h > self.min_bbox_size)
+        if self.min_area_ratio is not None:
+            origin_area = origin_bboxes.widths * origin_bboxes.heights
+            valid &= wrapped_w * wrapped_h / (origin_area +
+                                              1e-16) > self.min_area_ratio
+        if self.max_aspect_ratio is not None:
+            aspect_ratio = torch.maximum(wrapped_w / (wrapped_h + 1e-16),
+                                         wrapped_h / (wrapped_w + 1e-16))
+            valid &= aspect_ratio < self.max_aspect_ratio
+        return valid
+
+    def forward(
+        self, inputs: Tensor, data_samples: List[DetDataSample]
+    ) -> Tuple[Tensor, List[DetDataSample]]:
+        """Randomly warp a batch of images and their bboxes."""
+        num_imgs, _, height, width = inputs.shape
+        img_shapes = inputs.new_tensor(
+            [data_sample.img_shape[:2] for data_sample in data_samples],
+            dtype=torch.float32)
+        warp_matrices, scales = self._get_random_homography_matrix(img_shapes)
+
+        # the source pixel of every target pixel, as in cv2.warpPerspective
+        ys, xs = torch.meshgrid(
+            torch.arange(height, device=inputs.device, dtype=torch.float32),
+            torch.arange(width, device=inputs.device, dtype=torch.float32),
+            indexing='ij')
+        points = torch.stack([xs, ys, torch.ones_like(xs)], dim=-1)
+        src = points.view(1, -1, 3) @ torch.inverse(warp_matrices).transpose(
+            1, 2)
+        src = src[..., :2] / src[..., 2:]
+        grid = torch.stack([
+            src[..., 0] * 2 / max(width - 1, 1) - 1,
+            src[..., 1] * 2 / max(height - 1, 1) - 1
+        ],
+                           dim=-1).view(num_imgs, height, width, 2)
+
+        # sample the offsets to the border value so that pixels outside the
+        # images are filled by the border value
+        border_val = inputs.new_tensor(self.border_val).view(1, -1, 1, 1)
+        if self.rgb:
+            border_val = border_val.flip(1)
+        border_val = self.from_pixels(border_val)
+        valid = _valid_mask(inputs, data_samples)
+        offsets = torch.where(valid, inputs - border_val,
+                              torch.zeros_like(inputs))
+        warped = F.grid_sample(
+            offsets.float(), grid, align_corners=True).to(
+                inputs.dtype) + border_val
+        inputs = torch.where(valid, warped, inputs)
+
+        for data_sample, warp_matrix, scale in zip(data_samples, warp_matrices,
+                                                   scales):
+            h, w = data_sample.img_shape[:2]
+
+            def warp_instances(instances):
+                if 'masks' in instances:
+                    raise NotImplementedError(
+                        'BatchRandomAffine only supports bbox.')
+                bboxes = instances.bboxes
+                if len(bboxes) == 0:
+                    return instances
+                boxes = _to_boxes(bboxes)
+                origin_boxes = boxes.clone()
+                origin_boxes.rescale_((scale.item(), scale.item()))
+                boxes.project_(warp_matrix.to(boxes.device))
+                if self.bbox_clip_border:
+                    boxes.clip_((h, w))
+                instances.bboxes = _from_boxes(boxes, bboxes)
+                valid = boxes.is_inside(
+                    (h, w)) & self.filter_gt_bboxes(origin_boxes, boxes)
+                return instances[valid]
+
+            _update_instances(data_sample, warp_instances)
+            _record_homography_matrix(data_sample, warp_matrix.cpu().numpy())
+        return inputs, data_samples
@@ -71,7 +71,12 @@ class DetDataPreprocessor(ImgDataPreprocessor):
             bboxes data to ``Tensor`` type. Defaults to True.
         non_blocking (bool): Whether block current process
             when transferring data to device. Defaults to False.
-        batch_augments (list[dict], optional): Batch-level augmentations
+        batch_augments (list[dict], optional): Batch-level augmentations.
+            Besides resizing and padding, the device counterparts of the
+            heavy data transforms, e.g. :class:`BatchRandomFlip`,
+            :class:`BatchPhotoMetricDistortion`, :class:`BatchRandomCrop`,
+            :class:`BatchRandomAffine` and :class:`BatchYOLOXHSVRandomAug`,
+            can be moved here from the dataset pipeline.
     """
 
     def __init__(self,
@@ -99,6 +104,13 @@ class DetDataPreprocessor(ImgDataPreprocessor):
         if batch_augments is not None:
             self.batch_augments = nn.ModuleList(
                 [MODELS.build(aug) for aug in batch_augments])
+            for batch_aug in self.batch_augments:
+                # augmentations on pixel values undo the normalization
+                if hasattr(batch_aug, 'set_normalization'):
+                    batch_aug.set_normalization(
+                        self.mean if self._enable_normalize else None,
+                        self.std if self._enable_normalize else None,
+                        rgb=bgr_to_rgb)
         else:
             self.batch_augments = None
         self.pad_mask = pad_mask
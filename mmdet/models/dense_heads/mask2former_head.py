@@ -409,12 +409,9 @@ class Mask2FormerHead(MaskFormerHead):
             decoder_input = decoder_input.flatten(2).permute(0, 2, 1)
             level_embed = self.level_embed.weight[i].view(1, 1, -1)
             decoder_input = decoder_input + level_embed
-            # shape (batch_size, c, h, w) -> (batch_size, h*w, c)
-            mask = decoder_input.new_zeros(
-                (batch_size, ) + multi_scale_memorys[i].shape[-2:],
-                dtype=torch.bool)
+            # no padding, shape (batch_size, c, h, w) -> (batch_size, h*w, c)
             decoder_positional_encoding = self.decoder_positional_encoding(
-                mask)
+                None, input=multi_scale_memorys[i])
             decoder_positional_encoding = decoder_positional_encoding.flatten(
                 2).permute(0, 2, 1)
             decoder_inputs.append(decoder_input)
@@ -2,7 +2,8 @@
 import copy
 import re
 import warnings
-from typing import Optional, Tuple, Union
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional, Tuple, Union
 
 import torch
 from torch import Tensor
@@ -189,6 +190,49 @@ def chunks(lst: list, n: int) -> list:
     return all_
 
 
+class PromptCache:
+    """An LRU cache of the results computed from text prompts, e.g. the
+    token positive maps and the text embeddings, for inference with a fixed
+    vocabulary.
+
+    Args:
+        max_size (int): The maximum number of cached results. The cache is
+            disabled if it is 0. Defaults to 16.
+    """
+
+    def __init__(self, max_size: int = 16) -> None:
+        self.max_size = max_size
+        self._cache = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def get(self, key: Hashable, compute_fn: Callable[[], Any]) -> Any:
+        """Get the cached result of a key, or compute and cache it.
+
+        Args:
+            key (Hashable): The key of the result.
+            compute_fn (Callable): The function computing the result.
+
+        Returns:
+            Any: The result.
+        """
+        if self.max_size <= 0:
+            return compute_fn()
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+        value = compute_fn()
+        self._cache[key] = value
+        if len(self._cache) > self.max_size:
+            self._cache.popitem(last=False)
+        return value
+
+    def clear(self) -> None:
+        """Clear the cache."""
+        self._cache.clear()
+
+
 @MODELS.register_module()
 class GLIP(SingleStageDetector):
     """Implementation of `GLIP <https://arxiv.org/abs/2112.03857>`_
@@ -200,7 +244,9 @@ class GLIP(SingleStageDetector):
         train_cfg (:obj:`ConfigDict` or dict, optional): The training config
             of GLIP. Defaults to None.
         test_cfg (:obj:`ConfigDict` or dict, optional): The testing config
-            of GLIP. Defaults to None.
+            of GLIP. ``prompt_cache_size`` in it sets the number of prompts
+            whose token positive maps and text embeddings are cached for
+            inference. Defaults to None.
         data_preprocessor (:obj:`ConfigDict` or dict, optional): Config of
             :class:`DetDataPreprocessor` to process the input data.
             Defaults to None.
@@ -229,6 +275,75 @@ class GLIP(SingleStageDetector):
         self.language_model = MODELS.build(language_model)
 
         self._special_tokens = '. '
+        self._prompt_cache = PromptCache((test_cfg
+                                          or {}).get('prompt_cache_size', 16))
+
+    def train(self, mode: bool = True) -> 'GLIP':
+        """Set the training mode, and clear the prompt cache since the cached
+        text embeddings are stale once the weights are updated."""
+        self._prompt_cache.clear()
+        return super().train(mode)
+
+    def _apply(self, fn: Callable, *args, **kwargs) -> 'GLIP':
+        """Clear the prompt cache when the parameters are moved or cast, e.g.
+        by ``to()`` or ``half()``, since the cached text embeddings are left
+        on the old device and dtype."""
+        self._prompt_cache.clear()
+        return super()._apply(fn, *args, **kwargs)
+
+    def get_cached_tokens_positive_and_prompts(
+            self, *args) -> Tuple[dict, str, Tensor, list]:
+        """Get the tokens positive and prompts for the caption through the
+        prompt cache.
+
+        The arguments are the same as
+        :meth:`get_tokens_positive_and_prompts`.
+        """
+        if self.training:
+            return self.get_tokens_positive_and_prompts(*args)
+        key = ('prompt', repr(args), self.test_cfg.get('chunked_size', -1))
+        return self._prompt_cache.get(
+            key, lambda: self.get_tokens_positive_and_prompts(*args))
+
+    def get_cached_text_feats(self, text_prompts: list) -> dict:
+        """Get the language features of the text prompts through the prompt
+        cache.
+
+        Args:
+            text_prompts (list[str]): The text prompts of a batch.
+
+        Returns:
+            dict: The language features.
+        """
+        if self.training:
+            return self.language_model(text_prompts)
+        language_dict_features = self._prompt_cache.get(
+            ('text', tuple(text_prompts)),
+            lambda: self.language_model(text_prompts))
+        # the fusion layers replace the items of the features
+        return dict(language_dict_features)
+
+    def get_cached_chunked_text_feats(self, text_prompts: list) -> list:
+        """Get the language features of each chunk of a chunked text prompt
+        through the prompt cache.
+
+        The features of all the chunks of a prompt are cached under one key,
+        so that a vocabulary split into more chunks than
+        ``prompt_cache_size`` is still cached.
+
+        Args:
+            text_prompts (list[str]): The text prompts of the chunks.
+
+        Returns:
+            list[dict]: The language features of each chunk.
+        """
+        if self.training:
+            return [self.language_model([prompt]) for prompt in text_prompts]
+        chunked_features = self._prompt_cache.get(
+            ('chunked_text', tuple(text_prompts)),
+            lambda: [self.language_model([prompt]) for prompt in text_prompts])
+        # the fusion layers replace the items of the features
+        return [dict(features) for features in chunked_features]
 
     def to_enhance_text_prompts(self, original_caption, enhanced_text_prompts):
         caption_string = ''
@@ -513,16 +628,15 @@ class GLIP(SingleStageDetector):
             # All the text prompts are the same,
             # so there is no need to calculate them multiple times.
             _positive_maps_and_prompts = [
-                self.get_tokens_positive_and_prompts(
+                self.get_cached_tokens_positive_and_prompts(
                     text_prompts[0], custom_entities, enhanced_text_prompts[0],
                     tokens_positives[0])
             ] * len(batch_inputs)
         else:
             _positive_maps_and_prompts = [
-                self.get_tokens_positive_and_prompts(text_prompt,
-                                                     custom_entities,
-                                                     enhanced_text_prompt,
-                                                     tokens_positive)
+                self.get_cached_tokens_positive_and_prompts(
+                    text_prompt, custom_entities, enhanced_text_prompt,
+                    tokens_positive)
                 for text_prompt, enhanced_text_prompt, tokens_positive in zip(
                     text_prompts, enhanced_text_prompts, tokens_positives)
             ]
@@ -539,11 +653,12 @@ class GLIP(SingleStageDetector):
             results_list = []
 
             entities = [[item for lst in entities[0] for item in lst]]
+            chunked_features = self.get_cached_chunked_text_feats(
+                text_prompts[0])
 
             for b in range(len(text_prompts[0])):
-                text_prompts_once = [text_prompts[0][b]]
                 token_positive_maps_once = token_positive_maps[0][b]
-                language_dict_features = self.language_model(text_prompts_once)
+                language_dict_features = chunked_features[b]
                 batch_data_samples[
                     0].token_positive_map = token_positive_maps_once
 
@@ -559,7 +674,8 @@ class GLIP(SingleStageDetector):
                 results_list.append(pred_instances)
             results_list = [results_list[0].cat(results_list)]
         else:
-            language_dict_features = self.language_model(list(text_prompts))
+            language_dict_features = self.get_cached_text_feats(
+                list(text_prompts))
 
             for i, data_samples in enumerate(batch_data_samples):
                 data_samples.token_positive_map = token_positive_maps[i]
@@ -1,8 +1,7 @@
 # Copyright (c) OpenMMLab. All rights reserved.
-import copy
 import re
 import warnings
-from typing import Dict, Optional, Tuple, Union
+from typing import Callable, Dict, Optional, Tuple, Union
 
 import torch
 import torch.nn as nn
@@ -10,14 +9,14 @@ from mmengine.runner.amp import autocast
 from torch import Tensor
 
 from mmdet.registry import MODELS
-from mmdet.structures import OptSampleList, SampleList
-from mmdet.utils import ConfigType
+from mmdet.structures import DetDataSample, OptSampleList, SampleList
+from mmdet.utils import ConfigType, InstanceList
 from ..layers import SinePositionalEncoding
 from ..layers.transformer.grounding_dino_layers import (
     GroundingDinoTransformerDecoder, GroundingDinoTransformerEncoder)
 from .dino import DINO
-from .glip import (create_positive_map, create_positive_map_label_to_token,
-                   run_ner)
+from .glip import (PromptCache, create_positive_map,
+                   create_positive_map_label_to_token, run_ner)
 
 
 def clean_label_name(name: str) -> str:
@@ -41,6 +40,37 @@ def chunks(lst: list, n: int) -> list:
     return all_
 
 
+def merge_chunk_results(chunk_results: InstanceList, chunk_img_inds: list,
+                        chunk_num_entities: list,
+                        num_imgs: int) -> InstanceList:
+    """Merge the predictions of the chunked text prompts of each image.
+
+    The labels of a chunk are offset by the number of entities in the
+    previous chunks of the same image.
+
+    Args:
+        chunk_results (list[:obj:`InstanceData`]): The predictions of all
+            the chunks of all the images.
+        chunk_img_inds (list[int]): The image index of each chunk.
+        chunk_num_entities (list[int]): The number of entities in each
+            chunk.
+        num_imgs (int): The number of images.
+
+    Returns:
+        list[:obj:`InstanceData`]: The merged predictions of each image.
+    """
+    results_list = [[] for _ in range(num_imgs)]
+    counts = [0] * num_imgs
+    for i, num_entities, pred_instances in zip(chunk_img_inds,
+                                               chunk_num_entities,
+                                               chunk_results):
+        if len(pred_instances) > 0:
+            pred_instances.labels += counts[i]
+        counts[i] += num_entities
+        results_list[i].append(pred_instances)
+    return [img_results[0].cat(img_results) for img_results in results_list]
+
+
 @MODELS.register_module()
 class GroundingDINO(DINO):
     """Implementation of `Grounding DINO: Marrying DINO with Grounded Pre-
@@ -50,6 +80,17 @@ class GroundingDINO(DINO):
 
     Code is modified from the `official github repo
     <https://github.com/IDEA-Research/GroundingDINO>`_.
+
+    For inference, the token positive maps and the text embeddings of the
+    latest ``test_cfg.prompt_cache_size`` (16 by default) prompts are cached,
+    so the language model runs once per vocabulary instead of once per
+    batch.
+
+    When a large vocabulary is split into chunks by ``test_cfg.chunked_size``,
+    the chunks of all the images in a batch are packed along the batch
+    dimension and share the image features, and at most
+    ``test_cfg.max_chunks_per_batch`` chunks (all by default) are decoded in
+    a single pass.
     """
 
     def __init__(self,
@@ -62,6 +103,8 @@ class GroundingDINO(DINO):
         self._special_tokens = '. '
         self.use_autocast = use_autocast
         super().__init__(*args, **kwargs)
+        self._prompt_cache = PromptCache((self.test_cfg
+                                          or {}).get('prompt_cache_size', 16))
 
     def _init_layers(self) -> None:
         """Initialize layers except for backbone, neck and bbox_head."""
@@ -94,6 +137,89 @@ class GroundingDINO(DINO):
         nn.init.constant_(self.text_feat_map.bias.data, 0)
         nn.init.xavier_uniform_(self.text_feat_map.weight.data)
 
+    def train(self, mode: bool = True) -> 'GroundingDINO':
+        """Set the training mode, and clear the prompt cache since the cached
+        text embeddings are stale once the weights are updated."""
+        self._prompt_cache.clear()
+        return super().train(mode)
+
+    def _apply(self, fn: Callable, *args, **kwargs) -> 'GroundingDINO':
+        """Clear the prompt cache when the parameters are moved or cast, e.g.
+        by ``to()`` or ``half()``, since the cached text embeddings are left
+        on the old device and dtype."""
+        self._prompt_cache.clear()
+        return super()._apply(fn, *args, **kwargs)
+
+    def get_cached_tokens_positive_and_prompts(
+            self, *args) -> Tuple[dict, str, Tensor, list]:
+        """Get the tokens positive and prompts for the caption through the
+        prompt cache.
+
+        The arguments are the same as
+        :meth:`get_tokens_positive_and_prompts`.
+        """
+        if self.training:
+            return self.get_tokens_positive_and_prompts(*args)
+        key = ('prompt', repr(args), self.test_cfg.get('chunked_size', -1))
+        return self._prompt_cache.get(
+            key, lambda: self.get_tokens_positive_and_prompts(*args))
+
+    def get_text_feats(self, text_prompts: list) -> dict:
+        """Get the text features of the text prompts mapped to
+        ``embed_dims``."""
+        text_dict = self.language_model(text_prompts)
+        # text feature map layer
+        if self.text_feat_map is not None:
+            text_dict['embedded'] = self.text_feat_map(text_dict['embedded'])
+        return text_dict
+
+    def get_cached_text_feats(self, text_prompts: list) -> dict:
+        """Get the text features of the text prompts through the prompt
+        cache.
+
+        Args:
+            text_prompts (list[str]): The text prompts of a batch.
+
+        Returns:
+            dict: The text features.
+        """
+        if self.training:
+            return self.get_text_feats(text_prompts)
+        text_dict = self._prompt_cache.get(
+            ('text', tuple(text_prompts)),
+            lambda: self.get_text_feats(text_prompts))
+        return dict(text_dict)
+
+    def get_cached_chunked_text_feats(self, text_prompts: list,
+                                      max_chunks: int) -> list:
+        """Get the text features of the chunks of text prompts, computed
+        ``max_chunks`` chunks per pass, through the prompt cache.
+
+        The features of all the passes are cached under one key, so that a
+        vocabulary split into more passes than ``prompt_cache_size`` is
+        still cached.
+
+        Args:
+            text_prompts (list[str]): The text prompts of the chunks.
+            max_chunks (int): The number of chunks of a pass.
+
+        Returns:
+            list[dict]: The text features of each pass.
+        """
+
+        def get_chunked_text_feats():
+            return [
+                self.get_text_feats(text_prompts[start:start + max_chunks])
+                for start in range(0, len(text_prompts), max_chunks)
+            ]
+
+        if self.training:
+            return get_chunked_text_feats()
+        chunked_text_dicts = self._prompt_cache.get(
+            ('chunked_text', tuple(text_prompts), max_chunks),
+            get_chunked_text_feats)
+        return [dict(text_dict) for text_dict in chunked_text_dicts]
+
     def to_enhance_text_prompts(self, original_caption, enhanced_text_prompts):
         caption_string = ''
         tokens_positive = []
@@ -477,9 +603,7 @@ class GroundingDINO(DINO):
                     positive_maps.append(positive_map)
                     new_text_prompts.append(caption_string)
 
-        text_dict = self.language_model(new_text_prompts)
-        if self.text_feat_map is not None:
-            text_dict['embedded'] = self.text_feat_map(text_dict['embedded'])
+        text_dict = self.get_text_feats(new_text_prompts)
 
         for i, data_samples in enumerate(batch_data_samples):
             positive_map = positive_maps[i].to(
@@ -523,16 +647,15 @@ class GroundingDINO(DINO):
             # All the text prompts are the same,
             # so there is no need to calculate them multiple times.
             _positive_maps_and_prompts = [
-                self.get_tokens_positive_and_prompts(
+                self.get_cached_tokens_positive_and_prompts(
                     text_prompts[0], custom_entities, enhanced_text_prompts[0],
                     tokens_positives[0])
             ] * len(batch_inputs)
         else:
             _positive_maps_and_prompts = [
-                self.get_tokens_positive_and_prompts(text_prompt,
-                                                     custom_entities,
-                                                     enhanced_text_prompt,
-                                                     tokens_positive)
+                self.get_cached_tokens_positive_and_prompts(
+                    text_prompt, custom_entities, enhanced_text_prompt,
+                    tokens_positive)
                 for text_prompt, enhanced_text_prompt, tokens_positive in zip(
                     text_prompts, enhanced_text_prompts, tokens_positives)
             ]
@@ -543,45 +666,61 @@ class GroundingDINO(DINO):
         visual_feats = self.extract_feat(batch_inputs)
 
         if isinstance(text_prompts[0], list):
-            # chunked text prompts, only bs=1 is supported
-            assert len(batch_inputs) == 1
-            count = 0
-            results_list = []
-
-            entities = [[item for lst in entities[0] for item in lst]]
-
-            for b in range(len(text_prompts[0])):
-                text_prompts_once = [text_prompts[0][b]]
-                token_positive_maps_once = token_positive_maps[0][b]
-                text_dict = self.language_model(text_prompts_once)
-                # text feature map layer
-                if self.text_feat_map is not None:
-                    text_dict['embedded'] = self.text_feat_map(
-                        text_dict['embedded'])
-
-                batch_data_samples[
-                    0].token_positive_map = token_positive_maps_once
-
+            # chunked text prompts, the chunks of all the images are packed
+            # along the batch dimension and predicted together
+            chunk_img_inds = []
+            chunk_prompts = []
+            chunk_data_samples = []
+            for i, data_samples in enumerate(batch_data_samples):
+                for text_prompt, token_positive_map in zip(
+                        text_prompts[i], token_positive_maps[i]):
+                    chunk_data_sample = DetDataSample(
+                        metainfo=data_samples.metainfo)
+                    chunk_data_sample.token_positive_map = token_positive_map
+                    chunk_img_inds.append(i)
+                    chunk_prompts.append(text_prompt)
+                    chunk_data_samples.append(chunk_data_sample)
+
+            # the chunks can be split into several passes to save memory
+            max_chunks = self.test_cfg.get('max_chunks_per_batch', -1)
+            if max_chunks <= 0:
+                max_chunks = len(chunk_prompts)
+            chunked_text_dicts = self.get_cached_chunked_text_feats(
+                chunk_prompts, max_chunks)
+            chunk_results = []
+            for start, text_dict in zip(
+                    range(0, len(chunk_prompts), max_chunks),
+                    chunked_text_dicts):
+                end = start + max_chunks
+                img_inds = chunk_img_inds[start:end]
+                if len(batch_inputs) == 1:
+                    # the image features are expanded without being copied
+                    chunk_feats = tuple(
+                        feat.expand(len(img_inds), *feat.shape[1:])
+                        for feat in visual_feats)
+                else:
+                    img_inds = torch.tensor(
+                        img_inds, device=visual_feats[0].device)
+                    chunk_feats = tuple(feat[img_inds]
+                                        for feat in visual_feats)
                 head_inputs_dict = self.forward_transformer(
-                    copy.deepcopy(visual_feats), text_dict, batch_data_samples)
-                pred_instances = self.bbox_head.predict(
-                    **head_inputs_dict,
-                    rescale=rescale,
-                    batch_data_samples=batch_data_samples)[0]
-
-                if len(pred_instances) > 0:
-                    pred_instances.labels += count
-                count += len(token_positive_maps_once)
-                results_list.append(pred_instances)
-            results_list = [results_list[0].cat(results_list)]
+                    chunk_feats, text_dict, chunk_data_samples[start:end])
+                chunk_results.extend(
+                    self.bbox_head.predict(
+                        **head_inputs_dict,
+                        rescale=rescale,
+                        batch_data_samples=chunk_data_samples[start:end]))
+
+            results_list = merge_chunk_results(chunk_results, chunk_img_inds, [
+                len(chunk_data_sample.token_positive_map)
+                for chunk_data_sample in chunk_data_samples
+            ], len(batch_data_samples))
+            entities = [[item for lst in img_entities for item in lst]
+                        for img_entities in entities]
             is_rec_tasks = [False] * len(results_list)
         else:
             # extract text feats
-            text_dict = self.language_model(list(text_prompts))
-            # text feature map layer
-            if self.text_feat_map is not None:
-                text_dict['embedded'] = self.text_feat_map(
-                    text_dict['embedded'])
+            text_dict = self.get_cached_text_feats(list(text_prompts))
 
             is_rec_tasks = []
             for i, data_samples in enumerate(batch_data_samples):
@@ -1,13 +1,14 @@
 # Copyright (c) OpenMMLab. All rights reserved.
-import copy
 from typing import Dict, List, Optional, Tuple, Union
 
+import numpy as np
 import torch
 import torch.nn as nn
 from torch import Tensor
 
-from mmdet.models.utils import (filter_gt_instances, rename_loss_dict,
-                                reweight_loss_dict)
+from mmdet.models.utils import (filter_gt_instances, pack_gt_instances,
+                                rename_loss_dict, reweight_loss_dict,
+                                split_gt_instances)
 from mmdet.registry import MODELS
 from mmdet.structures import SampleList
 from mmdet.structures.bbox import bbox_project
@@ -152,10 +153,11 @@ class SemiBaseDetector(BaseDetector):
         batch_info = {}
         for data_samples, results in zip(batch_data_samples, results_list):
             data_samples.gt_instances = results.pred_instances
-            data_samples.gt_instances.bboxes = bbox_project(
-                data_samples.gt_instances.bboxes,
-                torch.from_numpy(data_samples.homography_matrix).inverse().to(
-                    self.data_preprocessor.device), data_samples.ori_shape)
+        homography_matrix = self._stack_homography_matrix(
+            batch_data_samples).inverse()
+        ori_shape = self._stack_img_shape(batch_data_samples, 'ori_shape')
+        self._project_packed_instances(batch_data_samples, homography_matrix,
+                                       ori_shape)
         return batch_data_samples, batch_info
 
     def project_pseudo_instances(self, batch_pseudo_instances: SampleList,
@@ -163,15 +165,56 @@ class SemiBaseDetector(BaseDetector):
         """Project pseudo instances."""
         for pseudo_instances, data_samples in zip(batch_pseudo_instances,
                                                   batch_data_samples):
-            data_samples.gt_instances = copy.deepcopy(
-                pseudo_instances.gt_instances)
-            data_samples.gt_instances.bboxes = bbox_project(
-                data_samples.gt_instances.bboxes,
-                torch.tensor(data_samples.homography_matrix).to(
-                    self.data_preprocessor.device), data_samples.img_shape)
+            data_samples.gt_instances = pseudo_instances.gt_instances
+        homography_matrix = self._stack_homography_matrix(batch_data_samples)
+        img_shape = self._stack_img_shape(batch_data_samples, 'img_shape')
+        # the projected instances are new, so the pseudo instances are kept
+        self._project_packed_instances(batch_data_samples, homography_matrix,
+                                       img_shape)
         wh_thr = self.semi_train_cfg.get('min_pseudo_bbox_wh', (1e-2, 1e-2))
         return filter_gt_instances(batch_data_samples, wh_thr=wh_thr)
 
+    def _stack_homography_matrix(self,
+                                 batch_data_samples: SampleList) -> Tensor:
+        """Stack the homography matrices of a batch to shape (N, 3, 3)."""
+        return torch.from_numpy(
+            np.stack([
+                data_samples.homography_matrix
+                for data_samples in batch_data_samples
+            ])).to(self.data_preprocessor.device)
+
+    def _stack_img_shape(self, batch_data_samples: SampleList,
+                         key: str) -> Tensor:
+        """Stack the image shapes of a batch to shape (N, 2)."""
+        img_shape = [
+            data_samples.metainfo[key][:2]
+            for data_samples in batch_data_samples
+        ]
+        return torch.tensor(img_shape, device=self.data_preprocessor.device)
+
+    @staticmethod
+    def _project_packed_instances(batch_data_samples: SampleList,
+                                  homography_matrix: Tensor,
+                                  img_shape: Tensor) -> None:
+        """Project the `gt_instances` of a batch at once.
+
+        Args:
+            batch_data_samples (SampleList): The Data Samples whose
+                `gt_instances` are replaced by the projected instances.
+            homography_matrix (Tensor): The homography matrix of each image
+                with shape (N, 3, 3).
+            img_shape (Tensor): The shape (h, w) of each image to clip the
+                projected bboxes with shape (N, 2).
+        """
+        if len(batch_data_samples) == 0:
+            return
+        packed_instances, batch_idx = pack_gt_instances(
+            batch_data_samples, fields=('bboxes', ))
+        packed_instances.bboxes = bbox_project(packed_instances.bboxes,
+                                               homography_matrix[batch_idx],
+                                               img_shape[batch_idx])
+        split_gt_instances(batch_data_samples, packed_instances, batch_idx)
+
     def predict(self, batch_inputs: Tensor,
                 batch_data_samples: SampleList) -> SampleList:
         """Predict results from a batch of inputs and data samples with post-
@@ -10,7 +10,7 @@ from mmdet.models.utils import (filter_gt_instances, rename_loss_dict,
                                 reweight_loss_dict)
 from mmdet.registry import MODELS
 from mmdet.structures import SampleList
-from mmdet.structures.bbox import bbox2roi, bbox_project
+from mmdet.structures.bbox import bbox2roi, bbox_project, get_box_tensor
 from mmdet.utils import ConfigType, InstanceList, OptConfigType, OptMultiConfig
 from ..utils.misc import unpack_gt_instances
 from .semi_base import SemiBaseDetector
@@ -115,10 +115,10 @@ class SoftTeacher(SemiBaseDetector):
 
         for data_samples, reg_uncs in zip(batch_data_samples, reg_uncs_list):
             data_samples.gt_instances['reg_uncs'] = reg_uncs
-            data_samples.gt_instances.bboxes = bbox_project(
-                data_samples.gt_instances.bboxes,
-                torch.from_numpy(data_samples.homography_matrix).inverse().to(
-                    self.data_preprocessor.device), data_samples.ori_shape)
+        self._project_packed_instances(
+            batch_data_samples,
+            self._stack_homography_matrix(batch_data_samples).inverse(),
+            self._stack_img_shape(batch_data_samples, 'ori_shape'))
 
         batch_info = {
             'feat': x,
@@ -301,78 +301,82 @@ class SoftTeacher(SemiBaseDetector):
                 or `pseudo_sem_seg` in fact.
 
         Returns:
-            list[Tensor]: A list of uncertainty for pseudo bboxes.
+            list[Tensor]: A list of uncertainty for pseudo bboxes, with the
+            shape (n, ) for an image with n pseudo bboxes.
         """
-        auged_results_list = self.aug_box(batch_data_samples,
-                                          self.semi_train_cfg.jitter_times,
-                                          self.semi_train_cfg.jitter_scale)
-        # flatten
-        auged_results_list = [
-            InstanceData(bboxes=auged.reshape(-1, auged.shape[-1]))
-            for auged in auged_results_list
-        ]
-
-        self.teacher.roi_head.test_cfg = None
-        results_list = self.teacher.roi_head.predict(
-            x, auged_results_list, batch_data_samples, rescale=False)
-        self.teacher.roi_head.test_cfg = self.teacher.test_cfg.rcnn
-
-        reg_channel = max(
-            [results.bboxes.shape[-1] for results in results_list]) // 4
-        bboxes = [
-            results.bboxes.reshape(self.semi_train_cfg.jitter_times, -1,
-                                   results.bboxes.shape[-1])
-            if results.bboxes.numel() > 0 else results.bboxes.new_zeros(
-                self.semi_train_cfg.jitter_times, 0, 4 * reg_channel).float()
-            for results in results_list
+        jitter_times = self.semi_train_cfg.jitter_times
+        num_bboxes = [
+            len(data_samples.gt_instances)
+            for data_samples in batch_data_samples
         ]
-
-        box_unc = [bbox.std(dim=0) for bbox in bboxes]
-        bboxes = [bbox.mean(dim=0) for bbox in bboxes]
-        labels = [
+        device = x[0].device
+        if sum(num_bboxes) == 0:
+            return [torch.zeros((0, ), device=device) for _ in num_bboxes]
+
+        # the jittered bboxes of all the images are predicted by a single
+        # forward of the bbox head, with the shape (jitter_times, n, 4)
+        auged_bboxes = torch.cat(
+            self.aug_box(batch_data_samples, jitter_times,
+                         self.semi_train_cfg.jitter_scale),
+            dim=1)
+        img_inds = torch.arange(
+            len(num_bboxes), device=device).repeat_interleave(
+                torch.tensor(num_bboxes, device=device))
+        roi_inds = img_inds.to(auged_bboxes.dtype).expand(jitter_times, -1)
+        rois = torch.cat([roi_inds[..., None], auged_bboxes], dim=-1)
+        rois = rois.reshape(-1, 5)
+        bbox_head = self.teacher.roi_head.bbox_head
+        bbox_pred = self.teacher.roi_head._bbox_forward(x, rois)['bbox_pred']
+
+        # only decode the regression of the class of each pseudo bbox
+        labels = torch.cat([
             data_samples.gt_instances.labels
             for data_samples in batch_data_samples
-        ]
-        if reg_channel != 1:
-            bboxes = [
-                bbox.reshape(bbox.shape[0], reg_channel,
-                             4)[torch.arange(bbox.shape[0]), label]
-                for bbox, label in zip(bboxes, labels)
-            ]
-            box_unc = [
-                unc.reshape(unc.shape[0], reg_channel,
-                            4)[torch.arange(unc.shape[0]), label]
-                for unc, label in zip(box_unc, labels)
-            ]
-
-        box_shape = [(bbox[:, 2:4] - bbox[:, :2]).clamp(min=1.0)
-                     for bbox in bboxes]
-        box_unc = [
-            torch.mean(
-                unc / wh[:, None, :].expand(-1, 2, 2).reshape(-1, 4), dim=-1)
-            if wh.numel() > 0 else unc for unc, wh in zip(box_unc, box_shape)
-        ]
-        return box_unc
+        ])
+        bbox_pred = bbox_pred.view(rois.shape[0], -1,
+                                   bbox_head.bbox_coder.encode_size)
+        if not bbox_head.reg_class_agnostic:
+            bbox_pred = bbox_pred[torch.arange(rois.shape[0]),
+                                  labels.repeat(jitter_times)]
+        else:
+            bbox_pred = bbox_pred[:, 0]
+        bboxes = get_box_tensor(
+            bbox_head.bbox_coder.decode(rois[:, 1:], bbox_pred))
+        # clip the bboxes to the shapes of their images
+        img_shapes = torch.tensor(
+            [data_samples.img_shape for data_samples in batch_data_samples],
+            dtype=bboxes.dtype,
+            device=device)[img_inds.repeat(jitter_times)]
+        bboxes = torch.min(bboxes.clamp(min=0), img_shapes[:, [1, 0, 1, 0]])
+        bboxes = bboxes.view(jitter_times, -1, 4)
+
+        box_unc = bboxes.std(dim=0)
+        bboxes = bboxes.mean(dim=0)
+        box_shape = (bboxes[:, 2:4] - bboxes[:, :2]).clamp(min=1.0)
+        box_unc = torch.mean(
+            box_unc / box_shape[:, None, :].expand(-1, 2, 2).reshape(-1, 4),
+            dim=-1)
+        return list(box_unc.split(num_bboxes))
 
     @staticmethod
     def aug_box(batch_data_samples, times, frac):
         """Augment bboxes with jitter."""
-
-        def _aug_single(box):
-            box_scale = box[:, 2:4] - box[:, :2]
-            box_scale = (
-                box_scale.clamp(min=1)[:, None, :].expand(-1, 2,
-                                                          2).reshape(-1, 4))
-            aug_scale = box_scale * frac  # [n,4]
-
-            offset = (
-                torch.randn(times, box.shape[0], 4, device=box.device) *
-                aug_scale[None, ...])
-            new_box = box.clone()[None, ...].expand(times, box.shape[0],
-                                                    -1) + offset
-            return new_box
-
-        return [
-            _aug_single(data_samples.gt_instances.bboxes)
+        # jitter the bboxes of all the images at once
+        num_bboxes = [
+            len(data_samples.gt_instances)
             for data_samples in batch_data_samples
         ]
+        bboxes = torch.cat([
+            data_samples.gt_instances.bboxes
+            for data_samples in batch_data_samples
+        ])
+        box_scale = bboxes[:, 2:4] - bboxes[:, :2]
+        box_scale = (
+            box_scale.clamp(min=1)[:, None, :].expand(-1, 2, 2).reshape(-1, 4))
+        aug_scale = box_scale * frac  # [n,4]
+
+        offset = (
+            torch.randn(times, bboxes.shape[0], 4, device=bboxes.device) *
+            aug_scale[None, ...])
+        new_bboxes = bboxes[None, ...] + offset
+        return list(new_bboxes.split(num_bboxes, dim=1))
@@ -6,7 +6,7 @@ from .brick_wrappers import (AdaptiveAvgPool2d, FrozenBatchNorm2d,
 from .conv_upsample import ConvUpsample
 from .csp_layer import CSPLayer
 from .dropblock import DropBlock
-from .ema import ExpMomentumEMA
+from .ema import ExpMomentumEMA, fused_ema_update
 from .inverted_residual import InvertedResidual
 from .matrix_nms import mask_matrix_nms
 from .msdeformattn_pixel_decoder import MSDeformAttnPixelDecoder
@@ -35,8 +35,9 @@ from .transformer import (MLP, AdaptivePadding, CdnQueryGenerator,
                           Mask2FormerTransformerDecoder,
                           Mask2FormerTransformerDecoderLayer,
                           Mask2FormerTransformerEncoder, PatchEmbed,
-                          PatchMerging, coordinate_to_encoding,
-                          inverse_sigmoid, nchw_to_nlc, nlc_to_nchw)
+                          PatchMerging, SDPAMultiheadAttention,
+                          coordinate_to_encoding, inverse_sigmoid,
+                          nchw_to_nlc, nlc_to_nchw)
 
 # yapf: enable
 
@@ -61,5 +62,6 @@ __all__ = [
     'ConditionalDetrTransformerDecoderLayer', 'DinoTransformerDecoder',
     'CdnQueryGenerator', 'Mask2FormerTransformerEncoder',
     'Mask2FormerTransformerDecoderLayer', 'Mask2FormerTransformerDecoder',
-    'SinePositionalEncoding3D', 'FrozenBatchNorm2d'
+    'SinePositionalEncoding3D', 'FrozenBatchNorm2d', 'fused_ema_update',
+    'SDPAMultiheadAttention'
 ]
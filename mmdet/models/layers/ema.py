@@ -1,6 +1,7 @@
 # Copyright (c) OpenMMLab. All rights reserved.
 import math
-from typing import Optional
+from collections import defaultdict
+from typing import List, Optional
 
 import torch
 import torch.nn as nn
@@ -10,6 +11,36 @@ from torch import Tensor
 from mmdet.registry import MODELS
 
 
+def fused_ema_update(averaged_params: List[Tensor],
+                     source_params: List[Tensor], momentum: float) -> None:
+    """Update the averaged tensors in place by ``averaged_param = (1 -
+    momentum) * averaged_param + momentum * source_param``.
+
+    The tensors are grouped by device and dtype, and each group is updated
+    with multi-tensor ``foreach`` operations, which launch a few kernels
+    instead of one per tensor.
+
+    Args:
+        averaged_params (list[Tensor]): The averaged tensors.
+        source_params (list[Tensor]): The source tensors.
+        momentum (float): The momentum of the update.
+    """
+    groups = defaultdict(lambda: ([], []))
+    for averaged_param, source_param in zip(averaged_params, source_params):
+        averaged, source = groups[(averaged_param.device,
+                                   averaged_param.dtype)]
+        averaged.append(averaged_param)
+        source.append(
+            source_param.to(
+                device=averaged_param.device, dtype=averaged_param.dtype))
+    for averaged, source in groups.values():
+        if hasattr(torch, '_foreach_lerp_'):
+            torch._foreach_lerp_(averaged, source, momentum)
+        else:
+            torch._foreach_mul_(averaged, 1 - momentum)
+            torch._foreach_add_(averaged, source, alpha=momentum)
+
+
 @MODELS.register_module()
 class ExpMomentumEMA(ExponentialMovingAverage):
     """Exponential moving average (EMA) with exponential momentum strategy,
@@ -32,6 +63,9 @@ class ExpMomentumEMA(ExponentialMovingAverage):
         update_buffers (bool): if True, it will compute running averages for
             both the parameters and the buffers of the model. Defaults to
             False.
+        compensate_momentum (bool): Whether to compensate the momentum for
+            the iterations skipped by ``interval``, i.e. to update with
+            ``1 - (1 - momentum) ** interval``. Defaults to False.
     """
 
     def __init__(self,
@@ -40,7 +74,8 @@ class ExpMomentumEMA(ExponentialMovingAverage):
                  gamma: int = 2000,
                  interval=1,
                  device: Optional[torch.device] = None,
-                 update_buffers: bool = False) -> None:
+                 update_buffers: bool = False,
+                 compensate_momentum: bool = False) -> None:
         super().__init__(
             model=model,
             momentum=momentum,
@@ -49,6 +84,50 @@ class ExpMomentumEMA(ExponentialMovingAverage):
             update_buffers=update_buffers)
         assert gamma > 0, f'gamma must be greater than 0, but got {gamma}'
         self.gamma = gamma
+        self.compensate_momentum = compensate_momentum
+
+    def get_momentum(self, steps: int) -> float:
+        """Get the momentum of an update.
+
+        Args:
+            steps (int): The number of times the parameters have been
+                updated.
+
+        Returns:
+            float: The momentum.
+        """
+        momentum = (1 - self.momentum) * math.exp(
+            -float(1 + steps) / self.gamma) + self.momentum
+        if self.compensate_momentum:
+            momentum = 1 - (1 - momentum)**self.interval
+        return momentum
+
+    def update_parameters(self, model: nn.Module) -> None:
+        """Update the parameters of the model with fused multi-tensor
+        operations.
+
+        Args:
+            model (nn.Module): The model whose parameters will be averaged.
+        """
+        if self.steps == 0 or self.steps % self.interval != 0:
+            super().update_parameters(model)
+            return
+        src_parameters = (
+            model.state_dict()
+            if self.update_buffers else dict(model.named_parameters()))
+        averaged_params, source_params = [], []
+        for k, p_avg in self.avg_parameters.items():
+            if p_avg.dtype.is_floating_point:
+                averaged_params.append(p_avg.data)
+                source_params.append(src_parameters[k].data)
+        fused_ema_update(averaged_params, source_params,
+                         self.get_momentum(int(self.steps)))
+        if not self.update_buffers:
+            # If not update the buffers,
+            # keep the buffers in sync with the source model.
+            for b_avg, b_src in zip(self.module.buffers(), model.buffers()):
+                b_avg.data.copy_(b_src.data.to(b_avg.device))
+        self.steps += 1
 
     def avg_func(self, averaged_param: Tensor, source_param: Tensor,
                  steps: int) -> None:
@@ -61,6 +140,4 @@ class ExpMomentumEMA(ExponentialMovingAverage):
             steps (int): The number of times the parameters have been
                 updated.
         """
-        momentum = (1 - self.momentum) * math.exp(
-            -float(1 + steps) / self.gamma) + self.momentum
-        averaged_param.lerp_(source_param, momentum)
+        averaged_param.lerp_(source_param, self.get_momentum(steps))
@@ -170,7 +170,7 @@ class MSDeformAttnPixelDecoder(BaseModule):
             # no padding
             padding_mask_resized = feat.new_zeros(
                 (batch_size, ) + feat.shape[-2:], dtype=torch.bool)
-            pos_embed = self.postional_encoding(padding_mask_resized)
+            pos_embed = self.postional_encoding(None, input=feat)
             level_embed = self.level_encoding.weight[i]
             level_pos_embed = level_embed.view(1, -1, 1, 1) + pos_embed
             # (h_i * w_i, 2)
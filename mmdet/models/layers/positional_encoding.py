@@ -1,6 +1,7 @@
 # Copyright (c) OpenMMLab. All rights reserved.
 import math
-from typing import Optional
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional
 
 import torch
 import torch.nn as nn
@@ -11,6 +12,21 @@ from mmdet.registry import MODELS
 from mmdet.utils import MultiConfig, OptMultiConfig
 
 
+def _get_cached(cache: OrderedDict, key: Hashable, cache_size: int,
+                encode: Callable[[], Tensor]) -> Tensor:
+    """Get the position embedding from a LRU cache, or encode and cache
+    it."""
+    pos = cache.get(key)
+    if pos is None:
+        pos = encode()
+        cache[key] = pos
+        if len(cache) > cache_size:
+            cache.popitem(last=False)
+    else:
+        cache.move_to_end(key)
+    return pos
+
+
 @MODELS.register_module()
 class SinePositionalEncoding(BaseModule):
     """Position encoding with sine and cosine functions.
@@ -33,6 +49,13 @@ class SinePositionalEncoding(BaseModule):
             numerical stability. Defaults to 1e-6.
         offset (float): offset add to embed when do the normalization.
             Defaults to 0.
+        cache_size (int): The maximum number of position embeddings to
+            cache. The embedding only depends on the shape of the mask and
+            the valid region of each image, so it is cached for the inputs
+            with a fixed size. It is only used for the masks whose valid
+            regions are top-left rectangles, which needs a synchronization
+            with the device to get the sizes of the regions. Defaults to 0,
+            which means no cache.
         init_cfg (dict or list[dict], optional): Initialization config dict.
             Defaults to None
     """
@@ -44,6 +67,7 @@ class SinePositionalEncoding(BaseModule):
                  scale: float = 2 * math.pi,
                  eps: float = 1e-6,
                  offset: float = 0.,
+                 cache_size: int = 0,
                  init_cfg: OptMultiConfig = None) -> None:
         super().__init__(init_cfg=init_cfg)
         if normalize:
@@ -56,6 +80,36 @@ class SinePositionalEncoding(BaseModule):
         self.scale = scale
         self.eps = eps
         self.offset = offset
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+
+    def _cache_key(self, mask: Optional[Tensor],
+                   input: Optional[Tensor]) -> Optional[Hashable]:
+        """Get the key of the cached position embedding.
+
+        Returns:
+            Hashable, optional: The shape of the mask, the sizes of the valid
+            regions and the device, or None if a valid region is not a
+            top-left rectangle.
+        """
+        if mask is None:
+            # single image or batch image with no padding
+            B, _, H, W = input.shape
+            return B, H, W, (H, ) * B, (W, ) * B, input.device
+        B, H, W = mask.size()
+        not_mask = mask == 0
+        valid_h = not_mask.any(2).sum(1)
+        valid_w = not_mask.any(1).sum(1)
+        ys = torch.arange(H, device=mask.device)
+        xs = torch.arange(W, device=mask.device)
+        rect_mask = (ys[None, :, None] < valid_h[:, None, None]) & (
+            xs[None, None, :] < valid_w[:, None, None])
+        is_rect = (rect_mask == not_mask).all()
+        # get the sizes and the check with a single synchronization
+        sizes = torch.cat([valid_h, valid_w, is_rect[None]]).tolist()
+        if not sizes[-1]:
+            return None
+        return B, H, W, tuple(sizes[:B]), tuple(sizes[B:2 * B]), mask.device
 
     def forward(self, mask: Tensor, input: Optional[Tensor] = None) -> Tensor:
         """Forward function for `SinePositionalEncoding`.
@@ -72,7 +126,18 @@ class SinePositionalEncoding(BaseModule):
                 [bs, num_feats*2, h, w].
         """
         assert not (mask is None and input is None)
+        if self.cache_size <= 0:
+            return self._encode(mask, input)
+
+        key = self._cache_key(mask, input)
+        if key is None:
+            return self._encode(mask, input)
+        return _get_cached(self._cache, key, self.cache_size,
+                           lambda: self._encode(mask, input))
 
+    def _encode(self, mask: Optional[Tensor],
+                input: Optional[Tensor]) -> Tensor:
+        """Compute the position embedding."""
         if mask is not None:
             B, H, W = mask.size()
             device = mask.device
@@ -137,6 +202,10 @@ class LearnedPositionalEncoding(BaseModule):
             Defaults to 50.
         col_num_embed (int, optional): The dictionary size of col embeddings.
             Defaults to 50.
+        cache_size (int): The maximum number of position embeddings to
+            cache in eval mode without gradients, keyed by the shape of the
+            mask. The cache is cleared when the mode or the weights change.
+            Defaults to 0, which means no cache.
         init_cfg (dict or list[dict], optional): Initialization config dict.
     """
 
@@ -145,6 +214,7 @@ class LearnedPositionalEncoding(BaseModule):
         num_feats: int,
         row_num_embed: int = 50,
         col_num_embed: int = 50,
+        cache_size: int = 0,
         init_cfg: MultiConfig = dict(type='Uniform', layer='Embedding')
     ) -> None:
         super().__init__(init_cfg=init_cfg)
@@ -153,6 +223,18 @@ class LearnedPositionalEncoding(BaseModule):
         self.num_feats = num_feats
         self.row_num_embed = row_num_embed
         self.col_num_embed = col_num_embed
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+
+    def train(self, mode: bool = True) -> nn.Module:
+        """Set the module in training mode and clear the cache."""
+        self._cache.clear()
+        return super().train(mode)
+
+    def _load_from_state_dict(self, *args, **kwargs) -> None:
+        """Load the weights and clear the cache."""
+        self._cache.clear()
+        super()._load_from_state_dict(*args, **kwargs)
 
     def forward(self, mask: Tensor) -> Tensor:
         """Forward function for `LearnedPositionalEncoding`.
@@ -166,6 +248,13 @@ class LearnedPositionalEncoding(BaseModule):
             pos (Tensor): Returned position embedding with shape
                 [bs, num_feats*2, h, w].
         """
+        if self.training or torch.is_grad_enabled() or self.cache_size <= 0:
+            return self._encode(mask)
+        return _get_cached(self._cache, (*mask.shape, mask.device),
+                           self.cache_size, lambda: self._encode(mask))
+
+    def _encode(self, mask: Tensor) -> Tensor:
+        """Compute the position embedding."""
         h, w = mask.shape[-2:]
         x = torch.arange(w, device=mask.device)
         y = torch.arange(h, device=mask.device)
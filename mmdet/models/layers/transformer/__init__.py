@@ -19,8 +19,9 @@ from .mask2former_layers import (Mask2FormerTransformerDecoder,
                                  Mask2FormerTransformerDecoderLayer,
                                  Mask2FormerTransformerEncoder)
 from .utils import (MLP, AdaptivePadding, ConditionalAttention, DynamicConv,
-                    PatchEmbed, PatchMerging, coordinate_to_encoding,
-                    inverse_sigmoid, nchw_to_nlc, nlc_to_nchw)
+                    PatchEmbed, PatchMerging, SDPAMultiheadAttention,
+                    coordinate_to_encoding, inverse_sigmoid, nchw_to_nlc,
+                    nlc_to_nchw)
 
 __all__ = [
     'nlc_to_nchw', 'nchw_to_nlc', 'AdaptivePadding', 'PatchEmbed',
@@ -37,5 +38,5 @@ __all__ = [
     'CdnQueryGenerator', 'Mask2FormerTransformerEncoder',
     'Mask2FormerTransformerDecoderLayer', 'Mask2FormerTransformerDecoder',
     'GroundingDinoTransformerDecoderLayer', 'GroundingDinoTransformerEncoder',
-    'GroundingDinoTransformerDecoder'
+    'GroundingDinoTransformerDecoder', 'SDPAMultiheadAttention'
 ]
@@ -3,14 +3,14 @@ from typing import Optional, Tuple, Union
 
 import torch
 from mmcv.cnn import build_norm_layer
-from mmcv.cnn.bricks.transformer import FFN, MultiheadAttention
+from mmcv.cnn.bricks.transformer import FFN
 from mmcv.ops import MultiScaleDeformableAttention
 from mmengine.model import ModuleList
 from torch import Tensor, nn
 
 from .detr_layers import (DetrTransformerDecoder, DetrTransformerDecoderLayer,
                           DetrTransformerEncoder, DetrTransformerEncoderLayer)
-from .utils import inverse_sigmoid
+from .utils import build_multihead_attention, inverse_sigmoid
 
 try:
     from fairscale.nn.checkpoint import checkpoint_wrapper
@@ -254,7 +254,7 @@ class DeformableDetrTransformerDecoderLayer(DetrTransformerDecoderLayer):
 
     def _init_layers(self) -> None:
         """Initialize self_attn, cross-attn, ffn, and norms."""
-        self.self_attn = MultiheadAttention(**self.self_attn_cfg)
+        self.self_attn = build_multihead_attention(self.self_attn_cfg)
         self.cross_attn = MultiScaleDeformableAttention(**self.cross_attn_cfg)
         self.embed_dims = self.self_attn.embed_dims
         self.ffn = FFN(**self.ffn_cfg)
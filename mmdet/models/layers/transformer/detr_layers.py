@@ -3,12 +3,13 @@ from typing import Union
 
 import torch
 from mmcv.cnn import build_norm_layer
-from mmcv.cnn.bricks.transformer import FFN, MultiheadAttention
+from mmcv.cnn.bricks.transformer import FFN
 from mmengine import ConfigDict
 from mmengine.model import BaseModule, ModuleList
 from torch import Tensor
 
 from mmdet.utils import ConfigType, OptConfigType
+from .utils import build_multihead_attention
 
 try:
     from fairscale.nn.checkpoint import checkpoint_wrapper
@@ -164,7 +165,8 @@ class DetrTransformerEncoderLayer(BaseModule):
 
     Args:
         self_attn_cfg (:obj:`ConfigDict` or dict, optional): Config for self
-            attention.
+            attention. Its `attn_backend` selects the implementation, see
+            `build_multihead_attention`.
         ffn_cfg (:obj:`ConfigDict` or dict, optional): Config for FFN.
         norm_cfg (:obj:`ConfigDict` or dict, optional): Config for
             normalization layers. All the layers will share the same
@@ -201,7 +203,7 @@ class DetrTransformerEncoderLayer(BaseModule):
 
     def _init_layers(self) -> None:
         """Initialize self-attention, FFN, and normalization."""
-        self.self_attn = MultiheadAttention(**self.self_attn_cfg)
+        self.self_attn = build_multihead_attention(self.self_attn_cfg)
         self.embed_dims = self.self_attn.embed_dims
         self.ffn = FFN(**self.ffn_cfg)
         norms_list = [
@@ -243,9 +245,11 @@ class DetrTransformerDecoderLayer(BaseModule):
 
     Args:
         self_attn_cfg (:obj:`ConfigDict` or dict, optional): Config for self
-            attention.
+            attention. Its `attn_backend` selects the implementation, see
+            `build_multihead_attention`.
         cross_attn_cfg (:obj:`ConfigDict` or dict, optional): Config for cross
-            attention.
+            attention. Its `attn_backend` selects the implementation as
+            `self_attn_cfg` does.
         ffn_cfg (:obj:`ConfigDict` or dict, optional): Config for FFN.
         norm_cfg (:obj:`ConfigDict` or dict, optional): Config for
             normalization layers. All the layers will share the same
@@ -299,8 +303,8 @@ class DetrTransformerDecoderLayer(BaseModule):
 
     def _init_layers(self) -> None:
         """Initialize self-attention, FFN, and normalization."""
-        self.self_attn = MultiheadAttention(**self.self_attn_cfg)
-        self.cross_attn = MultiheadAttention(**self.cross_attn_cfg)
+        self.self_attn = build_multihead_attention(self.self_attn_cfg)
+        self.cross_attn = build_multihead_attention(self.cross_attn_cfg)
         self.embed_dims = self.self_attn.embed_dims
         self.ffn = FFN(**self.ffn_cfg)
         norms_list = [
@@ -2,7 +2,7 @@
 import torch
 import torch.nn as nn
 from mmcv.cnn import build_norm_layer
-from mmcv.cnn.bricks.transformer import FFN, MultiheadAttention
+from mmcv.cnn.bricks.transformer import FFN
 from mmcv.ops import MultiScaleDeformableAttention
 from mmengine.model import ModuleList
 from torch import Tensor
@@ -14,7 +14,7 @@ from .deformable_detr_layers import (DeformableDetrTransformerDecoderLayer,
                                      DeformableDetrTransformerEncoderLayer)
 from .detr_layers import DetrTransformerEncoderLayer
 from .dino_layers import DinoTransformerDecoder
-from .utils import MLP, get_text_sine_pos_embed
+from .utils import MLP, build_multihead_attention, get_text_sine_pos_embed
 
 try:
     from fairscale.nn.checkpoint import checkpoint_wrapper
@@ -40,8 +40,9 @@ class GroundingDinoTransformerDecoderLayer(
 
     def _init_layers(self) -> None:
         """Initialize self_attn, cross-attn, ffn, and norms."""
-        self.self_attn = MultiheadAttention(**self.self_attn_cfg)
-        self.cross_attn_text = MultiheadAttention(**self.cross_attn_text_cfg)
+        self.self_attn = build_multihead_attention(self.self_attn_cfg)
+        self.cross_attn_text = build_multihead_attention(
+            self.cross_attn_text_cfg)
         self.cross_attn = MultiScaleDeformableAttention(**self.cross_attn_cfg)
         self.embed_dims = self.self_attn.embed_dims
         self.ffn = FFN(**self.ffn_cfg)
@@ -8,12 +8,13 @@ import torch.nn.functional as F
 from mmcv.cnn import (Linear, build_activation_layer, build_conv_layer,
                       build_norm_layer)
 from mmcv.cnn.bricks.drop import Dropout
+from mmcv.cnn.bricks.transformer import MultiheadAttention
 from mmengine.model import BaseModule, ModuleList
 from mmengine.utils import to_2tuple
 from torch import Tensor, nn
 
 from mmdet.registry import MODELS
-from mmdet.utils import OptConfigType, OptMultiConfig
+from mmdet.utils import ConfigType, OptConfigType, OptMultiConfig
 
 
 def nlc_to_nchw(x: Tensor, hw_shape: Sequence[int]) -> Tensor:
@@ -733,6 +734,163 @@ class ConditionalAttention(BaseModule):
         return query
 
 
+@MODELS.register_module()
+class SDPAMultiheadAttention(MultiheadAttention):
+    """`MultiheadAttention` computed by `F.scaled_dot_product_attention`.
+
+    It has the same arguments, weights and outputs as `MultiheadAttention`
+    of mmcv, but does not materialize the attention weights when a fused
+    kernel is available. It falls back to `nn.MultiheadAttention` if
+    `F.scaled_dot_product_attention` is not available (PyTorch < 2.0), or
+    `add_bias_kv` or `add_zero_attn` is set.
+    """
+
+    def forward(self,
+                query: Tensor,
+                key: Tensor = None,
+                value: Tensor = None,
+                identity: Tensor = None,
+                query_pos: Tensor = None,
+                key_pos: Tensor = None,
+                attn_mask: Tensor = None,
+                key_padding_mask: Tensor = None,
+                **kwargs) -> Tensor:
+        """Forward function for `SDPAMultiheadAttention`.
+
+        The arguments and the returned tensor are the same as
+        `MultiheadAttention.forward` of mmcv. `attn_mask` and
+        `key_padding_mask` can be boolean, in which True values are not
+        allowed to attend, or float masks added to the attention weights.
+        """
+        attn = self.attn
+        if not hasattr(F, 'scaled_dot_product_attention') or \
+                attn.bias_k is not None or attn.add_zero_attn:
+            return super().forward(query, key, value, identity, query_pos,
+                                   key_pos, attn_mask, key_padding_mask,
+                                   **kwargs)
+
+        if key is None:
+            key = query
+        if value is None:
+            value = key
+        if identity is None:
+            identity = query
+        if key_pos is None:
+            if query_pos is not None:
+                # use query_pos if key_pos is not available
+                if query_pos.shape == key.shape:
+                    key_pos = query_pos
+                else:
+                    warnings.warn(f'position encoding of key is'
+                                  f'missing in {self.__class__.__name__}.')
+        if query_pos is not None:
+            query = query + query_pos
+        if key_pos is not None:
+            key = key + key_pos
+        if not self.batch_first:
+            query = query.transpose(0, 1)
+            key = key.transpose(0, 1)
+            value = value.transpose(0, 1)
+
+        bs, num_queries, _ = query.shape
+        num_keys = key.size(1)
+        head_dims = self.embed_dims // self.num_heads
+        if attn._qkv_same_embed_dim:
+            q_weight, k_weight, v_weight = attn.in_proj_weight.chunk(3)
+        else:
+            q_weight = attn.q_proj_weight
+            k_weight = attn.k_proj_weight
+            v_weight = attn.v_proj_weight
+        q_bias = k_bias = v_bias = None
+        if attn.in_proj_bias is not None:
+            q_bias, k_bias, v_bias = attn.in_proj_bias.chunk(3)
+        # (bs, n, embed_dims) -> (bs, num_heads, n, head_dims)
+        q = F.linear(query, q_weight, q_bias)
+        q = q.view(bs, num_queries, self.num_heads, head_dims).transpose(1, 2)
+        k = F.linear(key, k_weight, k_bias)
+        k = k.view(bs, num_keys, self.num_heads, head_dims).transpose(1, 2)
+        v = F.linear(value, v_weight, v_bias)
+        v = v.view(bs, num_keys, self.num_heads, head_dims).transpose(1, 2)
+
+        attn_mask = self._merge_masks(attn_mask, key_padding_mask, bs,
+                                      num_queries, num_keys, q.dtype)
+        out = F.scaled_dot_product_attention(
+            q,
+            k,
+            v,
+            attn_mask=attn_mask,
+            dropout_p=attn.dropout if self.training else 0.)
+        out = out.transpose(1, 2).reshape(bs, num_queries, self.embed_dims)
+        out = attn.out_proj(out)
+
+        if not self.batch_first:
+            out = out.transpose(0, 1)
+        return identity + self.dropout_layer(self.proj_drop(out))
+
+    def _merge_masks(self, attn_mask: Optional[Tensor],
+                     key_padding_mask: Optional[Tensor], bs: int,
+                     num_queries: int, num_keys: int,
+                     dtype: torch.dtype) -> Optional[Tensor]:
+        """Merge the masks of `nn.MultiheadAttention` to the mask of
+        `F.scaled_dot_product_attention`, which is broadcastable to
+        (bs, num_heads, num_queries, num_keys)."""
+        masks = []
+        if attn_mask is not None:
+            if attn_mask.dim() == 3:
+                attn_mask = attn_mask.view(bs, self.num_heads, num_queries,
+                                           num_keys)
+            masks.append(attn_mask)
+        if key_padding_mask is not None:
+            masks.append(key_padding_mask.view(bs, 1, 1, num_keys))
+        if len(masks) == 0:
+            return None
+
+        masks = [
+            mask.bool() if mask.dtype == torch.uint8 else mask
+            for mask in masks
+        ]
+        if all(mask.dtype == torch.bool for mask in masks):
+            # True values are allowed to attend in
+            # `F.scaled_dot_product_attention`, opposite to
+            # `nn.MultiheadAttention`
+            merged_mask = masks[0]
+            for mask in masks[1:]:
+                merged_mask = merged_mask | mask
+            return ~merged_mask
+        merged_mask = None
+        for mask in masks:
+            if mask.dtype == torch.bool:
+                mask = torch.zeros_like(
+                    mask, dtype=dtype).masked_fill_(mask, float('-inf'))
+            else:
+                mask = mask.to(dtype)
+            merged_mask = mask if merged_mask is None else merged_mask + mask
+        return merged_mask
+
+
+def build_multihead_attention(cfg: ConfigType) -> MultiheadAttention:
+    """Build the multi-head attention of the DETR-like transformer layers.
+
+    Args:
+        cfg (:obj:`ConfigDict` or dict): The config of `MultiheadAttention`
+            of mmcv. The optional `attn_backend` selects the implementation,
+            'torch' for `nn.MultiheadAttention` and 'sdpa' for
+            `F.scaled_dot_product_attention`, which saves the memory of the
+            attention weights and gives the same outputs with the same
+            weights. Defaults to 'torch'.
+
+    Returns:
+        :obj:`MultiheadAttention`: The attention module.
+    """
+    cfg = dict(cfg)
+    attn_backend = cfg.pop('attn_backend', 'torch')
+    assert attn_backend in ('torch', 'sdpa'), \
+        f'attn_backend should be "torch" or "sdpa", got {attn_backend}'
+    if attn_backend == 'sdpa':
+        return SDPAMultiheadAttention(**cfg)
+    return MultiheadAttention(**cfg)
+
+
 class MLP(BaseModule):
     """Very simple multi-layer perceptron (also called FFN) with relu. Mostly
     used in DETR series detectors.
@@ -117,6 +117,13 @@ class MaxIoUAssigner(BaseAssigner):
             on CPU device. Negative values mean not assign on CPU.
         iou_calculator (dict): Config of overlaps Calculator.
         perm_repeat_gt_cfg (dict): Config of permute repeated gt bboxes.
+        overlaps_chunk_numel (int): The upper bound of the number of elements
+            in the gt-prior overlaps tile computed at once. When positive,
+            the overlaps are computed tile by tile over the priors on their
+            original device while keeping the running max and argmax, so the
+            peak memory does not grow with ``num_gts * num_priors`` and
+            ``gpu_assign_thr`` is ignored. Negative values mean computing the
+            whole overlaps matrix at once. Defaults to -1.
     """
 
     def __init__(self,
@@ -129,7 +136,8 @@ class MaxIoUAssigner(BaseAssigner):
                  match_low_quality: bool = True,
                  gpu_assign_thr: float = -1,
                  iou_calculator: dict = dict(type='BboxOverlaps2D'),
-                 perm_repeat_gt_cfg=None):
+                 perm_repeat_gt_cfg=None,
+                 overlaps_chunk_numel: int = -1):
         self.pos_iou_thr = pos_iou_thr
         self.neg_iou_thr = neg_iou_thr
         self.min_pos_iou = min_pos_iou
@@ -140,6 +148,7 @@ class MaxIoUAssigner(BaseAssigner):
         self.match_low_quality = match_low_quality
         self.iou_calculator = TASK_UTILS.build(iou_calculator)
         self.perm_repeat_gt_cfg = perm_repeat_gt_cfg
+        self.overlaps_chunk_numel = overlaps_chunk_numel
 
     def assign(self,
                pred_instances: InstanceData,
@@ -201,7 +210,8 @@ class MaxIoUAssigner(BaseAssigner):
             gt_bboxes_ignore = None
 
         assign_on_cpu = True if (self.gpu_assign_thr > 0) and (
-            gt_bboxes.shape[0] > self.gpu_assign_thr) else False
+            gt_bboxes.shape[0] > self.gpu_assign_thr) and (
+                self.overlaps_chunk_numel <= 0) else False
         # compute overlap and assign gt on CPU when number of GT is large
         if assign_on_cpu:
             device = priors.device
@@ -217,6 +227,14 @@ class MaxIoUAssigner(BaseAssigner):
                                                   self.perm_repeat_gt_cfg)
         else:
             gt_bboxes_unique = gt_bboxes
+
+        if self.overlaps_chunk_numel > 0:
+            # the overlaps are computed in bounded-memory tiles, so there is
+            # no need to fall back to CPU for large number of gts
+            return self.assign_wrt_overlaps_chunked(gt_bboxes_unique, priors,
+                                                    gt_labels,
+                                                    gt_bboxes_ignore)
+
         overlaps = self.iou_calculator(gt_bboxes_unique, priors)
 
         if (self.ignore_iof_thr > 0 and gt_bboxes_ignore is not None
@@ -280,19 +298,9 @@ class MaxIoUAssigner(BaseAssigner):
         # for each gt, the max iou of all proposals
         gt_max_overlaps, gt_argmax_overlaps = overlaps.max(dim=1)
 
-        # 2. assign negative: below
-        # the negative inds are set to be 0
-        if isinstance(self.neg_iou_thr, float):
-            assigned_gt_inds[(max_overlaps >= 0)
-                             & (max_overlaps < self.neg_iou_thr)] = 0
-        elif isinstance(self.neg_iou_thr, tuple):
-            assert len(self.neg_iou_thr) == 2
-            assigned_gt_inds[(max_overlaps >= self.neg_iou_thr[0])
-                             & (max_overlaps < self.neg_iou_thr[1])] = 0
-
-        # 3. assign positive: above positive IoU threshold
-        pos_inds = max_overlaps >= self.pos_iou_thr
-        assigned_gt_inds[pos_inds] = argmax_overlaps[pos_inds] + 1
+        # 2. assign negative and 3. assign positive
+        self._assign_wrt_max_overlaps(assigned_gt_inds, max_overlaps,
+                                      argmax_overlaps)
 
         if self.match_low_quality:
             # Low-quality matching will overwrite the assigned_gt_inds assigned
@@ -311,6 +319,142 @@ class MaxIoUAssigner(BaseAssigner):
                     else:
                         assigned_gt_inds[gt_argmax_overlaps[i]] = i + 1
 
+        return self._get_assign_result(num_gts, assigned_gt_inds, max_overlaps,
+                                       gt_labels)
+
+    def assign_wrt_overlaps_chunked(
+            self,
+            gt_bboxes: Tensor,
+            priors: Tensor,
+            gt_labels: Tensor,
+            gt_bboxes_ignore: Optional[Tensor] = None) -> AssignResult:
+        """Assign w.r.t. the overlaps computed in tiles of priors.
+
+        The result is the same as :meth:`assign_wrt_overlaps` on the full
+        overlaps matrix, but at most ``overlaps_chunk_numel`` overlaps are
+        alive at the same time. The tiles are computed twice when
+        ``match_low_quality`` and ``gt_max_assign_all`` are both enabled.
+
+        Args:
+            gt_bboxes (Tensor): Ground truth bboxes, shape (k, 4).
+            priors (Tensor): Priors to be assigned, shape (n, 4).
+            gt_labels (Tensor): Labels of k gt_bboxes, shape (k, ).
+            gt_bboxes_ignore (Tensor, optional): Ignored gt bboxes, shape
+                (m, 4). Defaults to None.
+
+        Returns:
+            :obj:`AssignResult`: The assign result.
+        """
+        num_gts, num_bboxes = gt_bboxes.size(0), priors.size(0)
+        if num_gts == 0 or num_bboxes == 0:
+            return self.assign_wrt_overlaps(
+                priors.new_zeros((num_gts, num_bboxes)), gt_labels)
+
+        with_ignore = (
+            self.ignore_iof_thr > 0 and gt_bboxes_ignore is not None
+            and gt_bboxes_ignore.numel() > 0)
+        chunk_size = max(self.overlaps_chunk_numel // num_gts, 1)
+
+        def tile_overlaps(start: int) -> Tensor:
+            tile_priors = priors[start:start + chunk_size]
+            overlaps = self.iou_calculator(gt_bboxes, tile_priors)
+            if with_ignore:
+                if self.ignore_wrt_candidates:
+                    ignore_overlaps = self.iou_calculator(
+                        tile_priors, gt_bboxes_ignore, mode='iof')
+                    ignore_max_overlaps, _ = ignore_overlaps.max(dim=1)
+                else:
+                    ignore_overlaps = self.iou_calculator(
+                        gt_bboxes_ignore, tile_priors, mode='iof')
+                    ignore_max_overlaps, _ = ignore_overlaps.max(dim=0)
+                overlaps[:, ignore_max_overlaps > self.ignore_iof_thr] = -1
+            return overlaps
+
+        # every tile holds all the gts, so the max over gts of each prior is
+        # exact, while the max over priors of each gt is reduced across tiles
+        max_overlaps, argmax_overlaps = [], []
+        gt_max_overlaps, gt_argmax_overlaps = None, None
+        for start in range(0, num_bboxes, chunk_size):
+            overlaps = tile_overlaps(start)
+            tile_max_overlaps, tile_argmax_overlaps = overlaps.max(dim=0)
+            max_overlaps.append(tile_max_overlaps)
+            argmax_overlaps.append(tile_argmax_overlaps)
+
+            tile_gt_max_overlaps, tile_gt_argmax_overlaps = overlaps.max(dim=1)
+            tile_gt_argmax_overlaps += start
+            if gt_max_overlaps is None:
+                gt_max_overlaps = tile_gt_max_overlaps
+                gt_argmax_overlaps = tile_gt_argmax_overlaps
+            else:
+                # keep the first prior on ties, the same as a single max
+                update = tile_gt_max_overlaps > gt_max_overlaps
+                gt_max_overlaps = torch.where(update, tile_gt_max_overlaps,
+                                              gt_max_overlaps)
+                gt_argmax_overlaps = torch.where(update,
+                                                 tile_gt_argmax_overlaps,
+                                                 gt_argmax_overlaps)
+        max_overlaps = torch.cat(max_overlaps)
+        argmax_overlaps = torch.cat(argmax_overlaps)
+
+        # 1. assign -1 by default
+        assigned_gt_inds = max_overlaps.new_full((num_bboxes, ),
+                                                 -1,
+                                                 dtype=torch.long)
+        # 2. assign negative and 3. assign positive
+        self._assign_wrt_max_overlaps(assigned_gt_inds, max_overlaps,
+                                      argmax_overlaps)
+
+        # 4. assign the nearest priors of each gt, see assign_wrt_overlaps
+        if self.match_low_quality:
+            valid_gts = gt_max_overlaps >= self.min_pos_iou
+            if self.gt_max_assign_all:
+                gt_inds = torch.arange(
+                    1, num_gts + 1, device=assigned_gt_inds.device)
+                for start in range(0, num_bboxes, chunk_size):
+                    overlaps = tile_overlaps(start)
+                    matched = (overlaps == gt_max_overlaps[:, None]) & \
+                        valid_gts[:, None]
+                    # the gt with the largest index wins, the same as
+                    # overwriting the assignment gt by gt
+                    tile_gt_inds, _ = torch.where(matched, gt_inds[:, None],
+                                                  0).max(dim=0)
+                    tile_assigned_gt_inds = \
+                        assigned_gt_inds[start:start + chunk_size]
+                    tile_matched = tile_gt_inds > 0
+                    tile_assigned_gt_inds[tile_matched] = \
+                        tile_gt_inds[tile_matched]
+            else:
+                for i in range(num_gts):
+                    if valid_gts[i]:
+                        assigned_gt_inds[gt_argmax_overlaps[i]] = i + 1
+
+        return self._get_assign_result(num_gts, assigned_gt_inds, max_overlaps,
+                                       gt_labels)
+
+    def _assign_wrt_max_overlaps(self, assigned_gt_inds: Tensor,
+                                 max_overlaps: Tensor,
+                                 argmax_overlaps: Tensor) -> None:
+        """Assign negative and positive priors in place w.r.t. the max
+        overlaps of each prior."""
+        # 2. assign negative: below
+        # the negative inds are set to be 0
+        if isinstance(self.neg_iou_thr, float):
+            assigned_gt_inds[(max_overlaps >= 0)
+                             & (max_overlaps < self.neg_iou_thr)] = 0
+        elif isinstance(self.neg_iou_thr, tuple):
+            assert len(self.neg_iou_thr) == 2
+            assigned_gt_inds[(max_overlaps >= self.neg_iou_thr[0])
+                             & (max_overlaps < self.neg_iou_thr[1])] = 0
+
+        # 3. assign positive: above positive IoU threshold
+        pos_inds = max_overlaps >= self.pos_iou_thr
+        assigned_gt_inds[pos_inds] = argmax_overlaps[pos_inds] + 1
+
+    def _get_assign_result(self, num_gts: int, assigned_gt_inds: Tensor,
+                           max_overlaps: Tensor,
+                           gt_labels: Tensor) -> AssignResult:
+        """Gather the labels of the assigned gts into an AssignResult."""
+        num_bboxes = assigned_gt_inds.size(0)
         assigned_labels = assigned_gt_inds.new_full((num_bboxes, ), -1)
         pos_inds = torch.nonzero(
             assigned_gt_inds > 0, as_tuple=False).squeeze()
@@ -1,4 +1,6 @@
 # Copyright (c) OpenMMLab. All rights reserved.
+from typing import Tuple
+
 import cv2
 import numpy as np
 import torch
@@ -63,8 +65,14 @@ class CameraMotionCompensation:
         return means
 
     def track(self, img: Tensor, ref_img: Tensor, tracks: dict,
-              num_samples: int, frame_id: int, metainfo: dict) -> dict:
-        """Tracking forward."""
+              num_samples: int, frame_id: int, metainfo: dict,
+              means: np.ndarray) -> Tuple[dict, np.ndarray]:
+        """Tracking forward.
+
+        The bboxes of the tracks are warped in place, and the Kalman filter
+        means of the tracks, of shape (N, 8) in the order of ``tracks``, are
+        warped and returned.
+        """
         img = img.squeeze(0).cpu().numpy().transpose((1, 2, 0))
         ref_img = ref_img.squeeze(0).cpu().numpy().transpose((1, 2, 0))
         warp_matrix = self.get_warp_matrix(img, ref_img)
@@ -76,7 +84,6 @@ class CameraMotionCompensation:
 
         bboxes = []
         num_bboxes = []
-        means = []
         for k, v in tracks.items():
             if int(v['frame_ids'][-1]) < frame_id - 1:
                 _num = 1
@@ -84,8 +91,6 @@ class CameraMotionCompensation:
                 _num = min(num_samples, len(v.bboxes))
             num_bboxes.append(_num)
             bboxes.extend(v.bboxes[-_num:])
-            if len(v.mean) > 0:
-                means.append(v.mean)
         bboxes = torch.cat(bboxes, dim=0)
         warped_bboxes = self.warp_bboxes(bboxes, warp_matrix.to(bboxes.device))
 
@@ -95,10 +100,7 @@ class CameraMotionCompensation:
             b = torch.split(b, [1] * _num)
             tracks[k].bboxes[-_num:] = b
 
-        if means:
-            means = np.asarray(means)
-            warped_means = self.warp_means(means, warp_matrix)
-            for m, (k, v) in zip(warped_means, tracks.items()):
-                tracks[k].mean = m
+        if len(means) > 0:
+            means = self.warp_means(means, warp_matrix)
 
-        return tracks
+        return tracks, means
@@ -1,13 +1,6 @@
 # Copyright (c) OpenMMLab. All rights reserved.
 import numpy as np
 
-try:
-    from sklearn.gaussian_process import GaussianProcessRegressor as GPR
-    from sklearn.gaussian_process.kernels import RBF
-    HAS_SKIKIT_LEARN = True
-except ImportError:
-    HAS_SKIKIT_LEARN = False
-
 from mmdet.registry import TASK_UTILS
 
 
@@ -15,6 +8,9 @@ from mmdet.registry import TASK_UTILS
 class InterpolateTracklets:
     """Interpolate tracks to make tracks more complete.
 
+    All the tracks of a sequence are interpolated and smoothed together with
+    vectorized numpy operations.
+
     Args:
         min_num_frames (int, optional): The minimum length of a track that will
             be interpolated. Defaults to 5.
@@ -30,67 +26,74 @@ class InterpolateTracklets:
                  max_num_frames: int = 20,
                  use_gsi: bool = False,
                  smooth_tau: int = 10):
-        if not HAS_SKIKIT_LEARN:
-            raise RuntimeError('sscikit-learn is not installed,\
-                 please install it by: pip install scikit-learn')
         self.min_num_frames = min_num_frames
         self.max_num_frames = max_num_frames
         self.use_gsi = use_gsi
         self.smooth_tau = smooth_tau
 
-    def _interpolate_track(self,
-                           track: np.ndarray,
-                           track_id: int,
-                           max_num_frames: int = 20) -> np.ndarray:
-        """Interpolate a track linearly to make the track more complete.
+    def _interpolate_tracks(self,
+                            tracks: np.ndarray,
+                            max_num_frames: int = 20) -> np.ndarray:
+        """Interpolate tracks linearly to make the tracks more complete.
 
         This function is proposed in
         "ByteTrack: Multi-Object Tracking by Associating Every Detection Box."
         `ByteTrack<https://arxiv.org/abs/2110.06864>`_.
 
+        All the disconnected frames of all the tracks are filled at once.
+
         Args:
-            track (ndarray): With shape (N, 7). Each row denotes
-                (frame_id, track_id, x1, y1, x2, y2, score).
+            tracks (ndarray): With shape (N, 7). Each row denotes
+                (frame_id, track_id, x1, y1, x2, y2, score). The rows of a
+                track are contiguous and sorted by frame_id.
             max_num_frames (int, optional): The maximum disconnected length in
                 the track. Defaults to 20.
 
         Returns:
-            ndarray: The interpolated track with shape (N, 7). Each row denotes
-                (frame_id, track_id, x1, y1, x2, y2, score)
+            ndarray: The interpolated tracks with shape (M, 7). Each row
+                denotes (frame_id, track_id, x1, y1, x2, y2, score). The
+                interpolated rows of a track follow its original rows.
         """
-        assert (track[:, 1] == track_id).all(), \
-            'The track id should not changed when interpolate a track.'
-
-        frame_ids = track[:, 0]
-        interpolated_track = np.zeros((0, 7))
-        # perform interpolation for the disconnected frames in the track.
-        for i in np.where(np.diff(frame_ids) > 1)[0]:
-            left_frame_id = frame_ids[i]
-            right_frame_id = frame_ids[i + 1]
-            num_disconnected_frames = int(right_frame_id - left_frame_id)
-
-            if 1 < num_disconnected_frames < max_num_frames:
-                left_bbox = track[i, 2:6]
-                right_bbox = track[i + 1, 2:6]
-
-                # perform interpolation for two adjacent tracklets.
-                for j in range(1, num_disconnected_frames):
-                    cur_bbox = j / (num_disconnected_frames) * (
-                        right_bbox - left_bbox) + left_bbox
-                    cur_result = np.ones((7, ))
-                    cur_result[0] = j + left_frame_id
-                    cur_result[1] = track_id
-                    cur_result[2:6] = cur_bbox
-
-                    interpolated_track = np.concatenate(
-                        (interpolated_track, cur_result[None]), axis=0)
-
-        interpolated_track = np.concatenate((track, interpolated_track),
-                                            axis=0)
-        return interpolated_track
+        frame_ids = tracks[:, 0]
+        num_disconnected_frames = np.diff(frame_ids)
+        # perform interpolation for the disconnected frames in each track.
+        gap_inds = np.where((tracks[1:, 1] == tracks[:-1, 1])
+                            & (num_disconnected_frames > 1)
+                            & (num_disconnected_frames < max_num_frames))[0]
+        gaps = num_disconnected_frames[gap_inds].astype(np.int64)
+        num_interpolated = gaps - 1
+
+        gap_of_rows = np.repeat(np.arange(len(gap_inds)), num_interpolated)
+        # j in [1, num_disconnected_frames) for each gap
+        steps = np.arange(len(gap_of_rows)) - np.repeat(
+            np.cumsum(num_interpolated) - num_interpolated,
+            num_interpolated) + 1
+        left_inds = gap_inds[gap_of_rows]
+        left_bboxes = tracks[left_inds, 2:6]
+        right_bboxes = tracks[left_inds + 1, 2:6]
+
+        interpolated_tracks = np.ones((len(gap_of_rows), 7))
+        interpolated_tracks[:, 0] = frame_ids[left_inds] + steps
+        interpolated_tracks[:, 1] = tracks[left_inds, 1]
+        interpolated_tracks[:, 2:6] = (steps / gaps[gap_of_rows])[:, None] * (
+            right_bboxes - left_bboxes) + left_bboxes
+
+        # keep the interpolated rows right behind the rows of their tracks
+        all_tracks = np.concatenate((tracks, interpolated_tracks), axis=0)
+        is_interpolated = np.r_[np.zeros(len(tracks)),
+                                np.ones(len(interpolated_tracks))]
+        track_order = self._track_order(tracks[:, 1])
+        inds = np.lexsort((np.arange(len(all_tracks)), is_interpolated,
+                           np.r_[track_order, track_order[left_inds]]))
+        return all_tracks[inds]
+
+    @staticmethod
+    def _track_order(track_ids: np.ndarray) -> np.ndarray:
+        """The index of the track of each row of contiguous tracks."""
+        return np.cumsum(np.diff(track_ids, prepend=track_ids[:1]) != 0)
 
     def gaussian_smoothed_interpolation(self,
-                                        track: np.ndarray,
+                                        tracks: np.ndarray,
                                         smooth_tau: int = 10) -> np.ndarray:
         """Gaussian-Smoothed Interpolation.
 
@@ -98,9 +101,14 @@ class InterpolateTracklets:
         "StrongSORT: Make DeepSORT Great Again"
         `StrongSORT<https://arxiv.org/abs/2202.13514>`_.
 
+        The posterior mean of a Gaussian process regression with a fixed RBF
+        kernel is computed in closed form. The tracks with the same length
+        share the same kernel length scale and are smoothed in batch.
+
         Args:
-            track (ndarray): With shape (N, 7). Each row denotes
-                (frame_id, track_id, x1, y1, x2, y2, score).
+            tracks (ndarray): With shape (N, 7). Each row denotes
+                (frame_id, track_id, x1, y1, x2, y2, score). The rows of a
+                track are contiguous.
             smooth_tau (int, optional): smoothing parameter in GSI.
                 Defaults to 10.
 
@@ -108,27 +116,27 @@ class InterpolateTracklets:
             ndarray: The interpolated tracks with shape (N, 7). Each row
                 denotes (frame_id, track_id, x1, y1, x2, y2, score)
         """
-        len_scale = np.clip(smooth_tau * np.log(smooth_tau**3 / len(track)),
-                            smooth_tau**-1, smooth_tau**2)
-        gpr = GPR(RBF(len_scale, 'fixed'))
-        t = track[:, 0].reshape(-1, 1)
-        x1 = track[:, 2].reshape(-1, 1)
-        y1 = track[:, 3].reshape(-1, 1)
-        x2 = track[:, 4].reshape(-1, 1)
-        y2 = track[:, 5].reshape(-1, 1)
-        gpr.fit(t, x1)
-        x1_gpr = gpr.predict(t)
-        gpr.fit(t, y1)
-        y1_gpr = gpr.predict(t)
-        gpr.fit(t, x2)
-        x2_gpr = gpr.predict(t)
-        gpr.fit(t, y2)
-        y2_gpr = gpr.predict(t)
-        gsi_track = [[
-            t[i, 0], track[i, 1], x1_gpr[i], y1_gpr[i], x2_gpr[i], y2_gpr[i],
-            track[i, 6]
-        ] for i in range(len(t))]
-        return np.array(gsi_track)
+        gsi_tracks = tracks.copy()
+        track_order = self._track_order(tracks[:, 1])
+        starts = np.where(np.r_[True, np.diff(track_order) > 0])[0]
+        lengths = np.diff(np.r_[starts, len(tracks)])
+        for length in np.unique(lengths):
+            len_scale = np.clip(smooth_tau * np.log(smooth_tau**3 / length),
+                                smooth_tau**-1, smooth_tau**2)
+            # (B, L) row indices of the tracks with this length
+            inds = starts[lengths == length][:, None] + np.arange(length)
+            t = tracks[inds, 0]
+            dists = (t[:, :, None] - t[:, None, :]) / len_scale
+            kernel = np.exp(-0.5 * dists**2)
+            # the same regularization as the default alpha of
+            # sklearn.gaussian_process.GaussianProcessRegressor
+            chol_factor = np.linalg.cholesky(kernel + 1e-10 * np.eye(length))
+            bboxes = tracks[inds, 2:6]
+            weights = np.linalg.solve(
+                chol_factor.transpose(0, 2, 1),
+                np.linalg.solve(chol_factor, bboxes))
+            gsi_tracks[inds, 2:6] = np.matmul(kernel, weights)
+        return gsi_tracks
 
     def forward(self, pred_tracks: np.ndarray) -> np.ndarray:
         """Forward function.
@@ -140,29 +148,27 @@ class InterpolateTracklets:
             ndarray: The interpolated tracks with shape (N, 7). Each row
             denotes (frame_id, track_id, x1, y1, x2, y2, score).
         """
-        max_track_id = int(np.max(pred_tracks[:, 1]))
-        min_track_id = int(np.min(pred_tracks[:, 1]))
-
-        # perform interpolation for each track
-        interpolated_tracks = []
-        for track_id in range(min_track_id, max_track_id + 1):
-            inds = pred_tracks[:, 1] == track_id
-            track = pred_tracks[inds]
-            num_frames = len(track)
-            if num_frames <= 2:
-                continue
-
-            if num_frames > self.min_num_frames:
-                interpolated_track = self._interpolate_track(
-                    track, track_id, self.max_num_frames)
-            else:
-                interpolated_track = track
-
-            if self.use_gsi:
-                interpolated_track = self.gaussian_smoothed_interpolation(
-                    interpolated_track, self.smooth_tau)
-
-            interpolated_tracks.append(interpolated_track)
-
-        interpolated_tracks = np.concatenate(interpolated_tracks)
+        # group the rows of each track together while keeping their order
+        pred_tracks = pred_tracks[np.argsort(pred_tracks[:, 1], kind='stable')]
+        track_ids, num_frames = np.unique(
+            pred_tracks[:, 1], return_counts=True)
+        num_frames = np.repeat(num_frames, num_frames)
+        pred_tracks = pred_tracks[num_frames > 2]
+        num_frames = num_frames[num_frames > 2]
+        if len(pred_tracks) == 0:
+            return np.zeros((0, 7))
+
+        # perform interpolation for long enough tracks
+        long_tracks = num_frames > self.min_num_frames
+        interpolated_tracks = self._interpolate_tracks(
+            pred_tracks[long_tracks], self.max_num_frames)
+        interpolated_tracks = np.concatenate(
+            (interpolated_tracks, pred_tracks[~long_tracks]), axis=0)
+        interpolated_tracks = interpolated_tracks[np.argsort(
+            interpolated_tracks[:, 1], kind='stable')]
+
+        if self.use_gsi:
+            interpolated_tracks = self.gaussian_smoothed_interpolation(
+                interpolated_tracks, self.smooth_tau)
+
         return interpolated_tracks[interpolated_tracks[:, 0].argsort()]
@@ -1,5 +1,5 @@
 # Copyright (c) OpenMMLab. All rights reserved.
-from typing import Tuple
+from typing import Optional, Tuple
 
 import numpy as np
 import torch
@@ -241,27 +241,213 @@ class KalmanFilter:
         squared_maha = np.sum(z * z, axis=0)
         return squared_maha
 
-    def track(self, tracks: dict,
-              bboxes: torch.Tensor) -> Tuple[dict, np.array]:
+    def multi_initiate(self,
+                       measurements: np.array) -> Tuple[np.array, np.array]:
+        """Create tracks from a batch of unassociated measurements.
+
+        Args:
+            measurements (ndarray): An Nx4 dimensional matrix of N bounding
+                boxes (x, y, a, h) with center position (x, y), aspect ratio
+                a, and height h.
+
+        Returns:
+             (ndarray, ndarray): Returns the Nx8 dimensional mean matrix and
+                Nx8x8 dimensional covariance matrices of the new tracks.
+                Unobserved velocities are initialized to 0 mean.
+        """
+        mean = np.concatenate((measurements, np.zeros_like(measurements)),
+                              axis=1)
+        height = measurements[:, 3]
+        std = np.stack([
+            2 * self._std_weight_position * height,
+            2 * self._std_weight_position * height,
+            np.full_like(height, 1e-2), 2 * self._std_weight_position * height,
+            10 * self._std_weight_velocity * height,
+            10 * self._std_weight_velocity * height,
+            np.full_like(height, 1e-5), 10 * self._std_weight_velocity * height
+        ],
+                       axis=1)
+        covariance = self._batch_diag(np.square(std))
+        return mean, covariance
+
+    def multi_predict(self, mean: np.array,
+                      covariance: np.array) -> Tuple[np.array, np.array]:
+        """Run Kalman filter prediction step for a batch of tracks.
+
+        Args:
+            mean (ndarray): The Nx8 dimensional mean matrix of the object
+                states at the previous time step.
+            covariance (ndarray): The Nx8x8 dimensional covariance matrices
+                of the object states at the previous time step.
+
+        Returns:
+            (ndarray, ndarray): Returns the mean matrix and covariance
+                matrices of the predicted states.
+        """
+        height = mean[:, 3]
+        std = np.stack([
+            self._std_weight_position * height,
+            self._std_weight_position * height,
+            np.full_like(height, 1e-2), self._std_weight_position * height,
+            self._std_weight_velocity * height,
+            self._std_weight_velocity * height,
+            np.full_like(height, 1e-5), self._std_weight_velocity * height
+        ],
+                       axis=1)
+        motion_cov = self._batch_diag(np.square(std))
+
+        mean = np.dot(mean, self._motion_mat.T)
+        covariance = np.matmul(
+            np.matmul(self._motion_mat, covariance),
+            self._motion_mat.T) + motion_cov
+
+        return mean, covariance
+
+    def multi_project(
+            self,
+            mean: np.array,
+            covariance: np.array,
+            bbox_scores: Optional[np.array] = None
+    ) -> Tuple[np.array, np.array]:
+        """Project a batch of state distributions to measurement space.
+
+        Args:
+            mean (ndarray): The states' mean matrix (Nx8 dimensional).
+            covariance (ndarray): The states' covariance matrices (Nx8x8
+                dimensional).
+            bbox_scores (ndarray, optional): The confidence scores of the
+                bboxes, of shape (N, ). Defaults to None, which is the same
+                as 0 scores.
+
+        Returns:
+            (ndarray, ndarray):  Returns the projected mean matrix and
+            covariance matrices of the given state estimates.
+        """
+        height = mean[:, 3]
+        std = np.stack([
+            self._std_weight_position * height,
+            self._std_weight_position * height,
+            np.full_like(height, 1e-1), self._std_weight_position * height
+        ],
+                       axis=1)
+
+        if self.use_nsa and bbox_scores is not None:
+            std = (1 - bbox_scores)[:, None] * std
+
+        innovation_cov = self._batch_diag(np.square(std))
+
+        mean = np.dot(mean, self._update_mat.T)
+        covariance = np.matmul(
+            np.matmul(self._update_mat, covariance), self._update_mat.T)
+        return mean, covariance + innovation_cov
+
+    def multi_update(
+            self,
+            mean: np.array,
+            covariance: np.array,
+            measurements: np.array,
+            bbox_scores: Optional[np.array] = None
+    ) -> Tuple[np.array, np.array]:
+        """Run Kalman filter correction step for a batch of tracks.
+
+        Args:
+            mean (ndarray): The predicted states' mean matrix (Nx8
+                dimensional).
+            covariance (ndarray): The states' covariance matrices (Nx8x8
+                dimensional).
+            measurements (ndarray): The Nx4 dimensional measurement matrix,
+                each row in format (x, y, a, h) where (x, y) is the center
+                position, a the aspect ratio, and h the height of the
+                bounding box.
+            bbox_scores (ndarray, optional): The confidence scores of the
+                bboxes, of shape (N, ). Defaults to None.
+
+        Returns:
+             (ndarray, ndarray): Returns the measurement-corrected state
+             distributions.
+        """
+        projected_mean, projected_cov = \
+            self.multi_project(mean, covariance, bbox_scores)
+
+        # the projected covariances are symmetric, so the kalman gains can
+        # be solved from them without transposing
+        kalman_gain = np.linalg.solve(
+            projected_cov,
+            np.matmul(covariance, self._update_mat.T).transpose(0, 2, 1))
+        kalman_gain = kalman_gain.transpose(0, 2, 1)
+        innovation = measurements - projected_mean
+
+        new_mean = mean + np.einsum('nij,nj->ni', kalman_gain, innovation)
+        new_covariance = covariance - np.matmul(
+            np.matmul(kalman_gain, projected_cov),
+            kalman_gain.transpose(0, 2, 1))
+        return new_mean, new_covariance
+
+    def multi_gating_distance(self,
+                              mean: np.array,
+                              covariance: np.array,
+                              measurements: np.array,
+                              only_position: bool = False) -> np.array:
+        """Compute gating distance between a batch of state distributions
+        and measurements.
+
+        Args:
+            mean (ndarray): Mean matrix over the state distributions (Nx8
+                dimensional).
+            covariance (ndarray): Covariance matrices of the state
+                distributions (Nx8x8 dimensional).
+            measurements (ndarray): An Mx4 dimensional matrix of M
+                measurements, each in format (x, y, a, h) where (x, y) is the
+                bounding box center position, a the aspect ratio, and h the
+                height.
+            only_position (bool, optional): If True, distance computation is
+                done with respect to the bounding box center position only.
+                Defaults to False.
+
+        Returns:
+            ndarray: Returns an array of shape (N, M), where the (i, j)-th
+            element contains the squared Mahalanobis distance between the
+            i-th state distribution and `measurements[j]`.
+        """
+        mean, covariance = self.multi_project(mean, covariance)
+        if only_position:
+            mean, covariance = mean[:, :2], covariance[:, :2, :2]
+            measurements = measurements[:, :2]
+
+        cholesky_factor = np.linalg.cholesky(covariance)
+        d = measurements[None] - mean[:, None]
+        z = np.linalg.solve(cholesky_factor, d.transpose(0, 2, 1))
+        squared_maha = np.sum(z * z, axis=1)
+        return squared_maha
+
+    @staticmethod
+    def _batch_diag(diagonals: np.array) -> np.array:
+        """Build a batch of diagonal matrices from the rows of
+        ``diagonals``."""
+        return diagonals[:, :, None] * np.eye(diagonals.shape[1])
+
+    def track(self, mean: np.array, covariance: np.array,
+              bboxes: torch.Tensor) -> Tuple[np.array, np.array, np.array]:
         """Track forward.
 
+        The states of all the tracks are predicted and gated against the
+        detections in batch.
+
         Args:
-            tracks (dict[int:dict]): Track buffer.
+            mean (ndarray): The Nx8 dimensional mean matrix of the states of
+                the tracks.
+            covariance (ndarray): The Nx8x8 dimensional covariance matrices
+                of the states of the tracks.
             bboxes (Tensor): Detected bounding boxes.
 
         Returns:
-            (dict[int:dict], ndarray): Updated tracks and bboxes.
+            (ndarray, ndarray, ndarray): The predicted mean matrix and
+            covariance matrices of the tracks, and the gating distances
+            between the tracks and the bboxes.
         """
-        costs = []
-        for id, track in tracks.items():
-            track.mean, track.covariance = self.predict(
-                track.mean, track.covariance)
-            gating_distance = self.gating_distance(track.mean,
-                                                   track.covariance,
-                                                   bboxes.cpu().numpy(),
-                                                   self.center_only)
-            costs.append(gating_distance)
-
-        costs = np.stack(costs, 0)
+        mean, covariance = self.multi_predict(mean, covariance)
+        costs = self.multi_gating_distance(mean, covariance,
+                                           bboxes.cpu().numpy(),
+                                           self.center_only)
         costs[costs > self.gating_threshold] = np.nan
-        return tracks, costs
+        return mean, covariance, costs
@@ -1,15 +1,14 @@
 # Copyright (c) OpenMMLab. All rights reserved.
-from typing import List, Tuple
+from typing import List, Union
 
 import torch
 from mmcv.ops import batched_nms
 from mmengine.model import BaseTTAModel
 from mmengine.registry import MODELS
 from mmengine.structures import InstanceData
-from torch import Tensor
 
 from mmdet.structures import DetDataSample
-from mmdet.structures.bbox import bbox_flip
+from ..utils import weighted_boxes_fusion
 
 
 @MODELS.register_module()
@@ -44,42 +43,55 @@ class DetTTAModel(BaseTTAModel):
         >>>                         'img_shape', 'scale_factor', 'flip',
         >>>                         'flip_direction'))
         >>>         ]])]
+
+    The predictions of all the images and views in a batch are fused at
+    once: the flips are undone on the concatenated bboxes and a single
+    batched NMS, with the bboxes of different images offset apart, suppresses
+    the bboxes of every image. Weighted boxes fusion can be used instead of
+    NMS by giving ``tta_cfg=dict(wbf=dict(iou_thr=0.55), max_per_img=100)``,
+    where the views are fused as the predictions of different models.
+
+    Args:
+        tta_cfg (dict, optional): Config of merging the predictions, with
+            ``nms`` or ``wbf`` and ``max_per_img``.
+        batch_augs (bool): Whether to forward all the views of a batch in a
+            single pass instead of one pass per view. The views are padded
+            to the same shape, which uses more memory but makes better use
+            of the device. Defaults to False.
     """
 
-    def __init__(self, tta_cfg=None, **kwargs):
+    def __init__(self, tta_cfg=None, batch_augs: bool = False, **kwargs):
         super().__init__(**kwargs)
         self.tta_cfg = tta_cfg
+        self.batch_augs = batch_augs
+
+    def test_step(self, data: Union[dict, tuple, list]) -> list:
+        """Get the merged predictions of the augmented data.
 
-    def merge_aug_bboxes(self, aug_bboxes: List[Tensor],
-                         aug_scores: List[Tensor],
-                         img_metas: List[str]) -> Tuple[Tensor, Tensor]:
-        """Merge augmented detection bboxes and scores.
+        If ``batch_augs`` is True, all the views of all the images are
+        forwarded together.
 
         Args:
-            aug_bboxes (list[Tensor]): shape (n, 4*#class)
-            aug_scores (list[Tensor] or None): shape (n, #class)
+            data (dict or tuple or list): Augmented data batch sampled from
+                the dataloader.
+
         Returns:
-            tuple[Tensor]: ``bboxes`` with shape (n,4), where
-            4 represent (tl_x, tl_y, br_x, br_y)
-            and ``scores`` with shape (n,).
+            list[:obj:`DetDataSample`]: Merged predictions.
         """
-        recovered_bboxes = []
-        for bboxes, img_info in zip(aug_bboxes, img_metas):
-            ori_shape = img_info['ori_shape']
-            flip = img_info['flip']
-            flip_direction = img_info['flip_direction']
-            if flip:
-                bboxes = bbox_flip(
-                    bboxes=bboxes,
-                    img_shape=ori_shape,
-                    direction=flip_direction)
-            recovered_bboxes.append(bboxes)
-        bboxes = torch.cat(recovered_bboxes, dim=0)
-        if aug_scores is None:
-            return bboxes
-        else:
-            scores = torch.cat(aug_scores, dim=0)
-            return bboxes, scores
+        if not self.batch_augs or not isinstance(data, dict):
+            return super().test_step(data)
+        num_augs = len(data['inputs'])
+        # flatten the views, the index of a view is aug_idx * num_imgs + i
+        batch_data = {key: [] for key in data}
+        for key, values in data.items():
+            for aug_values in values:
+                batch_data[key].extend(aug_values)
+        num_imgs = len(batch_data['inputs']) // num_augs
+        predictions = self.module.test_step(batch_data)
+        data_samples_list = [[
+            predictions[aug_idx * num_imgs + i] for aug_idx in range(num_augs)
+        ] for i in range(num_imgs)]
+        return self.merge_preds(data_samples_list)
 
     def merge_preds(self, data_samples_list: List[List[DetDataSample]]):
         """Merge batch predictions of enhanced data.
@@ -92,9 +104,85 @@ class DetTTAModel(BaseTTAModel):
         Returns:
             List[DetDataSample]: Merged batch prediction.
         """
+        # TODO: support instance segmentation TTA
+        assert data_samples_list[0][0].pred_instances.get(
+            'masks', None) is None, \
+            'TTA of instance segmentation does not support now.'
+        bboxes, scores, labels, num_bboxes = [], [], [], []
+        # per view: image index, view index, flip directions and ori shape
+        view_info = []
+        for i, data_samples in enumerate(data_samples_list):
+            for aug_idx, data_sample in enumerate(data_samples):
+                pred_instances = data_sample.pred_instances
+                bboxes.append(pred_instances.bboxes)
+                scores.append(pred_instances.scores)
+                labels.append(pred_instances.labels)
+                num_bboxes.append(len(pred_instances))
+                direction = data_sample.flip_direction \
+                    if data_sample.flip else None
+                flip_h = direction in ('horizontal', 'diagonal')
+                flip_v = direction in ('vertical', 'diagonal')
+                ori_h, ori_w = data_sample.ori_shape
+                view_info.append([i, aug_idx, flip_h, flip_v, ori_w, ori_h])
+        bboxes = torch.cat(bboxes)
+        scores = torch.cat(scores)
+        labels = torch.cat(labels)
+        view_info = torch.tensor(
+            view_info, dtype=torch.long,
+            device=bboxes.device).repeat_interleave(
+                torch.tensor(num_bboxes, device=bboxes.device), dim=0)
+        img_inds, aug_inds = view_info[:, 0], view_info[:, 1]
+
+        # undo the flips of all the views at once
+        flip_mask = view_info[:, [2, 3]].bool().repeat(1, 2)
+        shapes = view_info[:, [4, 5]].to(bboxes.dtype).repeat(1, 2)
+        flipped = (shapes - bboxes)[:, [2, 3, 0, 1]]
+        bboxes = torch.where(flip_mask, flipped, bboxes)
+
+        max_per_img = self.tta_cfg.max_per_img
+        if bboxes.numel() == 0:
+            keep_bboxes = bboxes.new_zeros((0, 4))
+            keep_scores = keep_bboxes.new_zeros((0, ))
+            keep_labels = labels
+            keep_img_inds = img_inds
+        elif 'wbf' in self.tta_cfg:
+            # the views are fused as predictions of different models, labels
+            # are offset so that bboxes of different images are not fused
+            num_classes = int(labels.max()) + 1
+            offset_labels = img_inds * num_classes + labels
+            num_augs = len(data_samples_list[0])
+            view_masks = [aug_inds == aug_idx for aug_idx in range(num_augs)]
+            keep_bboxes, keep_scores, keep_labels = weighted_boxes_fusion(
+                [bboxes[mask] for mask in view_masks],
+                [scores[mask] for mask in view_masks],
+                [offset_labels[mask]
+                 for mask in view_masks], **self.tta_cfg.wbf)
+            keep_labels = keep_labels.long()
+            keep_img_inds = keep_labels // num_classes
+            keep_labels = keep_labels % num_classes
+        else:
+            num_classes = int(labels.max()) + 1
+            det_bboxes, keep_idxs = batched_nms(
+                bboxes, scores, img_inds * num_classes + labels,
+                self.tta_cfg.nms)
+            keep_bboxes = det_bboxes[:, :-1]
+            keep_scores = det_bboxes[:, -1]
+            keep_labels = labels[keep_idxs]
+            keep_img_inds = img_inds[keep_idxs]
+
         merged_data_samples = []
-        for data_samples in data_samples_list:
-            merged_data_samples.append(self._merge_single_sample(data_samples))
+        for i, data_samples in enumerate(data_samples_list):
+            img_mask = keep_img_inds == i
+            det_results = data_samples[0]
+            if not (img_inds == i).any():
+                merged_data_samples.append(det_results)
+                continue
+            results = InstanceData()
+            results.bboxes = keep_bboxes[img_mask][:max_per_img].clone()
+            results.scores = keep_scores[img_mask][:max_per_img]
+            results.labels = keep_labels[img_mask][:max_per_img]
+            det_results.pred_instances = results
+            merged_data_samples.append(det_results)
         return merged_data_samples
 
     def _merge_single_sample(
@@ -108,37 +196,4 @@ class DetTTAModel(BaseTTAModel):
         Returns:
             List[DetDataSample]: Merged prediction.
         """
-        aug_bboxes = []
-        aug_scores = []
-        aug_labels = []
-        img_metas = []
-        # TODO: support instance segmentation TTA
-        assert data_samples[0].pred_instances.get('masks', None) is None, \
-            'TTA of instance segmentation does not support now.'
-        for data_sample in data_samples:
-            aug_bboxes.append(data_sample.pred_instances.bboxes)
-            aug_scores.append(data_sample.pred_instances.scores)
-            aug_labels.append(data_sample.pred_instances.labels)
-            img_metas.append(data_sample.metainfo)
-
-        merged_bboxes, merged_scores = self.merge_aug_bboxes(
-            aug_bboxes, aug_scores, img_metas)
-        merged_labels = torch.cat(aug_labels, dim=0)
-
-        if merged_bboxes.numel() == 0:
-            return data_samples[0]
-
-        det_bboxes, keep_idxs = batched_nms(merged_bboxes, merged_scores,
-                                            merged_labels, self.tta_cfg.nms)
-
-        det_bboxes = det_bboxes[:self.tta_cfg.max_per_img]
-        det_labels = merged_labels[keep_idxs][:self.tta_cfg.max_per_img]
-
-        results = InstanceData()
-        _det_bboxes = det_bboxes.clone()
-        results.bboxes = _det_bboxes[:, :-1]
-        results.scores = _det_bboxes[:, -1]
-        results.labels = det_labels
-        det_results = data_samples[0]
-        det_results.pred_instances = results
-        return det_results
+        return self.merge_preds([data_samples])[0]
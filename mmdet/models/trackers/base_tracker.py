@@ -1,21 +1,103 @@
 # Copyright (c) OpenMMLab. All rights reserved.
 from abc import ABCMeta, abstractmethod
-from typing import List, Optional, Tuple
+from typing import List, Optional, Tuple, Union
 
+import numpy as np
 import torch
 import torch.nn.functional as F
 from addict import Dict
 
+from mmdet.structures.bbox import bbox_xyxy_to_cxcyah
+
+
+class TrackHistory:
+    """A list-like view of the history of an item of a track.
+
+    The history is kept in the ring buffers of :class:`BaseTracker`. Like the
+    list it replaces, indexing with an integer returns a tensor of shape
+    (1, ...) and indexing with a slice returns a list of such tensors, from
+    the oldest retained frame to the latest one.
+
+    Args:
+        tracker (:obj:`BaseTracker`): The tracker holding the buffers.
+        id (int): The id of the track.
+        item (str): The name of the item.
+    """
+
+    def __init__(self, tracker: 'BaseTracker', id: int, item: str) -> None:
+        self.tracker = tracker
+        self.id = id
+        self.item = item
+
+    def _locate(self) -> Tuple[int, int, int]:
+        """Get the row of the track, the number of its retained frames and
+        the ring buffer position of the oldest retained frame."""
+        row = self.tracker._id_to_row[self.id]
+        num_frames = int(self.tracker._num_frames[row])
+        history_len = self.tracker.history_len
+        length = min(num_frames, history_len)
+        return row, length, (num_frames - length) % history_len
+
+    def _positions(self, index: Union[int, slice]) -> Tuple[int, List[int]]:
+        """Get the row of the track and the ring buffer positions of the
+        indexed frames."""
+        row, length, start = self._locate()
+        if isinstance(index, slice):
+            inds = range(length)[index]
+        else:
+            inds = [range(length)[index]]
+        history_len = self.tracker.history_len
+        return row, [(start + i) % history_len for i in inds]
+
+    def __len__(self) -> int:
+        return self._locate()[1]
+
+    def __getitem__(self, index: Union[int, slice]):
+        row, positions = self._positions(index)
+        history = self.tracker._history[self.item]
+        outs = [history[row, pos][None] for pos in positions]
+        return outs if isinstance(index, slice) else outs[0]
+
+    def __setitem__(self, index: Union[int, slice], value) -> None:
+        row, positions = self._positions(index)
+        if not isinstance(index, slice):
+            value = [value]
+        assert len(positions) == len(value)
+        history = self.tracker._history[self.item]
+        latest = self.tracker._latest[self.item]
+        latest_pos = (int(self.tracker._num_frames[row]) -
+                      1) % self.tracker.history_len
+        for pos, v in zip(positions, value):
+            history[row, pos] = v.reshape(history.shape[2:])
+            if pos == latest_pos:
+                latest[row] = history[row, pos]
+
+    def __iter__(self):
+        return iter(self[:])
+
 
 class BaseTracker(metaclass=ABCMeta):
     """Base tracker model.
 
+    The items of the tracks are kept in struct-of-arrays buffers, one row per
+    track in the order of :attr:`ids`. Each item that is not updated by
+    momentum has a ring buffer holding its last ``num_frames_retain``
+    values of every track, as well as a buffer of the latest values so that
+    :attr:`memo` does not concatenate anything. ``self.tracks[id][item]``
+    is a :class:`TrackHistory` view of the ring buffer. Items which are not
+    tensors, e.g. :obj:`BitmapMasks`, are kept in a list of each track
+    instead and are not included in :attr:`memo`. The states of the tracks
+    which are not items of the frames, e.g. the means and covariances of a
+    Kalman filter, are kept in arrays with the same rows, see
+    :meth:`get_states` and :meth:`set_states`.
+
     Args:
         momentums (dict[str:float], optional): Momentums to update the buffers.
             The `str` indicates the name of the buffer while the `float`
             indicates the momentum. Defaults to None.
         num_frames_retain (int, optional). If a track is disappeared more than
-            `num_frames_retain` frames, it will be deleted in the memo.
+            `num_frames_retain` frames, it will be deleted in the memo. It is
+            also the number of frames kept in the history of each track.
              Defaults to 10.
     """
 
@@ -30,10 +112,21 @@ class BaseTracker(metaclass=ABCMeta):
 
         self.reset()
 
+    @property
+    def history_len(self) -> int:
+        """int: The number of frames kept in the history of a track."""
+        return max(self.num_frames_retain, 1)
+
     def reset(self) -> None:
         """Reset the buffer of the tracker."""
         self.num_tracks = 0
         self.tracks = dict()
+        # struct-of-arrays buffers, one row per track
+        self._id_to_row = dict()
+        self._num_frames = torch.zeros((0, ), dtype=torch.long)
+        self._history = dict()
+        self._latest = dict()
+        self._states = dict()
 
     @property
     def empty(self) -> bool:
@@ -50,6 +143,10 @@ class BaseTracker(metaclass=ABCMeta):
         """bool: whether the framework has a reid model"""
         return hasattr(self, 'reid') and self.reid is not None
 
+    def _with_momentum(self, item: str) -> bool:
+        """Whether the item is updated by momentum."""
+        return self.momentums is not None and item in self.momentums
+
     def update(self, **kwargs) -> None:
         """Update the tracker.
 
@@ -80,63 +177,212 @@ class BaseTracker(metaclass=ABCMeta):
             if len(v) != num_objs:
                 raise ValueError('kwargs value must both equal')
 
+        self.update_buffers(kwargs)
+        init_ids, update_ids = [], []
         for obj in zip(*kwargs.values()):
             id = int(obj[id_indice])
             if id in self.tracks:
                 self.update_track(id, obj)
+                update_ids.append(id)
             else:
                 self.init_track(id, obj)
+                init_ids.append(id)
+        self.update_states(init_ids, update_ids)
 
         self.pop_invalid_tracks(frame_id)
 
+    def update_buffers(self, items: dict) -> None:
+        """Write the items of all the objects of a frame into the buffers.
+
+        The rows of the existing tracks are updated in place, and the rows of
+        the new tracks are appended in the order of the objects.
+
+        Args:
+            items (dict[str: Tensor]): The items of the objects, including
+                ``ids``.
+        """
+        ids = items['ids'].tolist()
+        if len(ids) == 0:
+            return
+        rows = torch.tensor([self._id_to_row.get(id, -1) for id in ids])
+        exist = rows > -1
+        rows = rows[exist]
+        num_new = len(ids) - len(rows)
+        history_len = self.history_len
+        if len(rows) > 0:
+            positions = self._num_frames[rows] % history_len
+
+        for k, v in items.items():
+            if not isinstance(v, torch.Tensor):
+                continue
+            v = v.detach()
+            exist_v = v[exist.to(v.device)]
+            new_v = v[~exist.to(v.device)]
+            if self._with_momentum(k):
+                if len(rows) > 0:
+                    _rows = rows.to(v.device)
+                    m = self.momentums[k]
+                    self._latest[k][_rows] = (
+                        1 - m) * self._latest[k][_rows] + m * exist_v
+                if num_new > 0 and k in self._latest:
+                    self._latest[k] = torch.cat((self._latest[k], new_v),
+                                                dim=0)
+                elif num_new > 0:
+                    self._latest[k] = new_v
+                continue
+
+            if len(rows) > 0:
+                _rows = rows.to(v.device)
+                self._history[k][_rows, positions.to(v.device)] = exist_v
+                self._latest[k][_rows] = exist_v
+            if num_new > 0:
+                new_history = new_v.new_zeros(
+                    (num_new, history_len, *new_v.shape[1:]))
+                new_history[:, 0] = new_v
+                if k in self._history:
+                    self._history[k] = torch.cat(
+                        (self._history[k], new_history), dim=0)
+                    self._latest[k] = torch.cat((self._latest[k], new_v),
+                                                dim=0)
+                else:
+                    self._history[k] = new_history
+                    self._latest[k] = new_v
+
+        self._num_frames[rows] += 1
+        if num_new > 0:
+            num_rows = len(self._num_frames)
+            for id in items['ids'][~exist.to(items['ids'].device)].tolist():
+                self._id_to_row[id] = num_rows
+                num_rows += 1
+            self._num_frames = torch.cat(
+                (self._num_frames, self._num_frames.new_ones((num_new, ))))
+            for k, v in self._states.items():
+                self._states[k] = np.concatenate(
+                    (v, np.zeros((num_new, *v.shape[1:]), dtype=v.dtype)))
+
     def pop_invalid_tracks(self, frame_id: int) -> None:
         """Pop out invalid tracks."""
-        invalid_ids = []
-        for k, v in self.tracks.items():
-            if frame_id - v['frame_ids'][-1] >= self.num_frames_retain:
-                invalid_ids.append(k)
-        for invalid_id in invalid_ids:
-            self.tracks.pop(invalid_id)
+        if self.empty:
+            return
+        last_frame_ids = self.memo['frame_ids']
+        invalid = frame_id - last_frame_ids >= self.num_frames_retain
+        self.pop_tracks(invalid)
+
+    def pop_tracks(self, invalid: torch.Tensor) -> None:
+        """Pop out tracks from the tracker.
+
+        Args:
+            invalid (Tensor): A bool mask of the tracks to pop out, in the
+                order of :attr:`ids`.
+        """
+        invalid = invalid.cpu()
+        if not invalid.any():
+            return
+        for id in torch.tensor(self.ids)[invalid].tolist():
+            self.tracks.pop(id)
+        # remove the rows in a stable way to keep the order of the tracks
+        keep = ~invalid
+        for buffers in (self._history, self._latest):
+            for k, v in buffers.items():
+                buffers[k] = v[keep.to(v.device)]
+        for k, v in self._states.items():
+            self._states[k] = v[keep.numpy()]
+        self._num_frames = self._num_frames[keep]
+        self._id_to_row = {id: row for row, id in enumerate(self.tracks)}
+
+    def num_hits(self, id: int) -> int:
+        """Get the number of frames in which a track is updated.
+
+        Unlike the length of the history of the track, it is not capped by
+        ``num_frames_retain``, so it is used to confirm tentative tracks.
+
+        Args:
+            id (int): The id of the track.
+
+        Returns:
+            int: The number of frames in which the track is updated.
+        """
+        return int(self._num_frames[self._id_to_row[id]])
 
     def update_track(self, id: int, obj: Tuple[torch.Tensor]):
-        """Update a track."""
+        """Update a track.
+
+        The buffers of tensors are already updated by
+        :meth:`update_buffers`, so only the items which are not tensors are
+        updated here.
+        """
         for k, v in zip(self.memo_items, obj):
-            v = v[None]
-            if self.momentums is not None and k in self.momentums:
-                m = self.momentums[k]
-                self.tracks[id][k] = (1 - m) * self.tracks[id][k] + m * v
-            else:
-                self.tracks[id][k].append(v)
+            if k not in self._latest:
+                history = self.tracks[id][k]
+                history.append(v[None])
+                del history[:-self.history_len]
 
     def init_track(self, id: int, obj: Tuple[torch.Tensor]):
         """Initialize a track."""
         self.tracks[id] = Dict()
         for k, v in zip(self.memo_items, obj):
-            v = v[None]
-            if self.momentums is not None and k in self.momentums:
-                self.tracks[id][k] = v
-            else:
-                self.tracks[id][k] = [v]
+            if k not in self._latest:
+                self.tracks[id][k] = [v[None]]
+            elif not self._with_momentum(k):
+                self.tracks[id][k] = TrackHistory(self, id, k)
+
+    def update_states(self, init_ids: List[int],
+                      update_ids: List[int]) -> None:
+        """Update the states of the tracks in batch, after the tracks of a
+        frame are initialized or updated one by one.
+
+        Args:
+            init_ids (list[int]): The ids of the new tracks.
+            update_ids (list[int]): The ids of the updated tracks.
+        """
+        pass
+
+    def _update_kalman_states(self,
+                              init_ids: List[int],
+                              update_ids: List[int],
+                              with_scores: bool = False) -> None:
+        """Initiate the Kalman filter states of the new tracks and correct
+        the states of the updated tracks with their latest bboxes, in batch.
+
+        The Kalman filter is ``self.kf`` and the states are ``mean`` and
+        ``covariance``.
+
+        Args:
+            init_ids (list[int]): The ids of the new tracks.
+            update_ids (list[int]): The ids of the updated tracks.
+            with_scores (bool): Whether to pass the latest scores of the
+                tracks to the correction step, which uses them in the NSA
+                Kalman filter. Defaults to False.
+        """
+        if len(init_ids) > 0:
+            measurements = bbox_xyxy_to_cxcyah(self.get('bboxes', init_ids))
+            mean, covariance = self.kf.multi_initiate(
+                measurements.cpu().numpy().astype(np.float64))
+            self.set_states('mean', mean, init_ids)
+            self.set_states('covariance', covariance, init_ids)
+        if len(update_ids) > 0:
+            measurements = bbox_xyxy_to_cxcyah(self.get('bboxes', update_ids))
+            bbox_scores = None
+            if with_scores:
+                bbox_scores = self.get('scores', update_ids).cpu().numpy()
+            mean, covariance = self.kf.multi_update(
+                self.get_states('mean', update_ids),
+                self.get_states('covariance', update_ids),
+                measurements.cpu().numpy(), bbox_scores)
+            self.set_states('mean', mean, update_ids)
+            self.set_states('covariance', covariance, update_ids)
 
     @property
     def memo(self) -> dict:
-        """Return all buffers in the tracker."""
+        """Return all buffers in the tracker.
+
+        The returned tensors are the buffers themselves rather than copies,
+        so they should not be modified in place.
+        """
         outs = Dict()
         for k in self.memo_items:
-            outs[k] = []
-
-        for id, objs in self.tracks.items():
-            for k, v in objs.items():
-                if k not in outs:
-                    continue
-                if self.momentums is not None and k in self.momentums:
-                    v = v
-                else:
-                    v = v[-1]
-                outs[k].append(v)
-
-        for k, v in outs.items():
-            outs[k] = torch.cat(v, dim=0)
+            if k in self._latest:
+                outs[k] = self._latest[k]
         return outs
 
     def get(self,
@@ -150,33 +396,85 @@ class BaseTracker(metaclass=ABCMeta):
             item (str): The demanded item.
             ids (list[int], optional): The demanded ids. Defaults to None.
             num_samples (int, optional): Number of samples to calculate the
-                results. Defaults to None.
+                results. At most ``num_frames_retain`` samples are kept for
+                each track. Defaults to None.
             behavior (str, optional): Behavior to calculate the results.
                 Options are `mean` | None. Defaults to None.
 
         Returns:
             Tensor: The results of the demanded item.
         """
+        rows = self._get_rows(ids)
+        latest = self._latest[item]
+        if self._with_momentum(item) or num_samples is None:
+            return latest[rows.to(latest.device)]
+
+        history = self._history[item]
+        history_len = self.history_len
+        num_samples = min(num_samples, history_len)
+        num_frames = self._num_frames[rows]
+        # positions of the last `num_samples` frames, the oldest first
+        offsets = torch.arange(num_samples - 1, -1, -1)
+        frame_inds = num_frames[:, None] - 1 - offsets[None]
+        valid = frame_inds >= 0
+        positions = frame_inds.clamp(min=0) % history_len
+        _rows = rows.to(history.device)
+        out = history[_rows[:, None], positions.to(history.device)]
+        valid = valid.to(history.device)
+        if behavior == 'mean':
+            valid = valid.reshape(*valid.shape, *([1] * (out.dim() - 2)))
+            out = (out * valid).sum(dim=1) / valid.sum(dim=1)
+        elif behavior is None:
+            num_valid = valid.sum(dim=1)
+            if len(num_valid) > 0 and (num_valid != num_valid[0]).any():
+                raise ValueError('The tracks have different number of '
+                                 'samples, please use behavior="mean".')
+            if len(num_valid) > 0:
+                out = out[:, num_samples - int(num_valid[0]):]
+        else:
+            raise NotImplementedError()
+        return out
+
+    def _get_rows(self, ids: Optional[list] = None) -> torch.Tensor:
+        """Get the rows of the tracks of ``ids`` in the buffers, or the rows
+        of all the tracks if ``ids`` is None."""
         if ids is None:
-            ids = self.ids
-
-        outs = []
-        for id in ids:
-            out = self.tracks[id][item]
-            if isinstance(out, list):
-                if num_samples is not None:
-                    out = out[-num_samples:]
-                    out = torch.cat(out, dim=0)
-                    if behavior == 'mean':
-                        out = out.mean(dim=0, keepdim=True)
-                    elif behavior is None:
-                        out = out[None]
-                    else:
-                        raise NotImplementedError()
-                else:
-                    out = out[-1]
-            outs.append(out)
-        return torch.cat(outs, dim=0)
+            return torch.arange(len(self._num_frames))
+        return torch.tensor([self._id_to_row[id] for id in ids],
+                            dtype=torch.long)
+
+    def get_states(self, item: str, ids: Optional[list] = None) -> np.ndarray:
+        """Get the states of the tracks.
+
+        Args:
+            item (str): The name of the state, e.g. ``mean``.
+            ids (list[int], optional): The demanded ids. Defaults to None,
+                i.e. all the tracks in the order of :attr:`ids`.
+
+        Returns:
+            ndarray: The states of the tracks, one row per track. It is a
+            copy of the buffer.
+        """
+        return self._states[item][self._get_rows(ids).numpy()]
+
+    def set_states(self,
+                   item: str,
+                   states: np.ndarray,
+                   ids: Optional[list] = None) -> None:
+        """Set the states of the tracks.
+
+        The buffer of a new state is created with zeros for the other tracks.
+
+        Args:
+            item (str): The name of the state, e.g. ``mean``.
+            states (ndarray): The states of the tracks, one row per track.
+            ids (list[int], optional): The ids of the tracks. Defaults to
+                None, i.e. all the tracks in the order of :attr:`ids`.
+        """
+        if item not in self._states:
+            self._states[item] = np.zeros(
+                (len(self._num_frames), *states.shape[1:]), dtype=states.dtype)
+        self._states[item][self._get_rows(ids).numpy()] = states
 
     @abstractmethod
     def track(self, *args, **kwargs):
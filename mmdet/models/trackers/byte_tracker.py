@@ -11,8 +11,7 @@ from mmengine.structures import InstanceData
 
 from mmdet.registry import MODELS, TASK_UTILS
 from mmdet.structures import DetDataSample
-from mmdet.structures.bbox import (bbox_cxcyah_to_xyxy, bbox_overlaps,
-                                   bbox_xyxy_to_cxcyah)
+from mmdet.structures.bbox import bbox_cxcyah_to_xyxy, bbox_overlaps
 from .base_tracker import BaseTracker
 
 
@@ -82,40 +81,37 @@ class ByteTracker(BaseTracker):
             self.tracks[id].tentative = False
         else:
             self.tracks[id].tentative = True
-        bbox = bbox_xyxy_to_cxcyah(self.tracks[id].bboxes[-1])  # size = (1, 4)
-        assert bbox.ndim == 2 and bbox.shape[0] == 1
-        bbox = bbox.squeeze(0).cpu().numpy()
-        self.tracks[id].mean, self.tracks[id].covariance = self.kf.initiate(
-            bbox)
 
     def update_track(self, id: int, obj: Tuple[torch.Tensor]) -> None:
         """Update a track."""
         super().update_track(id, obj)
         if self.tracks[id].tentative:
-            if len(self.tracks[id]['bboxes']) >= self.num_tentatives:
+            if self.num_hits(id) >= self.num_tentatives:
                 self.tracks[id].tentative = False
-        bbox = bbox_xyxy_to_cxcyah(self.tracks[id].bboxes[-1])  # size = (1, 4)
-        assert bbox.ndim == 2 and bbox.shape[0] == 1
-        bbox = bbox.squeeze(0).cpu().numpy()
         track_label = self.tracks[id]['labels'][-1]
         label_idx = self.memo_items.index('labels')
         obj_label = obj[label_idx]
         assert obj_label == track_label
-        self.tracks[id].mean, self.tracks[id].covariance = self.kf.update(
-            self.tracks[id].mean, self.tracks[id].covariance, bbox)
+
+    def update_states(self, init_ids: List[int],
+                      update_ids: List[int]) -> None:
+        """Initiate and correct the Kalman filter states of the tracks in
+        batch."""
+        self._update_kalman_states(init_ids, update_ids)
 
     def pop_invalid_tracks(self, frame_id: int) -> None:
         """Pop out invalid tracks."""
-        invalid_ids = []
-        for k, v in self.tracks.items():
-            # case1: disappeared frames >= self.num_frames_retrain
-            case1 = frame_id - v['frame_ids'][-1] >= self.num_frames_retain
-            # case2: tentative tracks but not matched in this frame
-            case2 = v.tentative and v['frame_ids'][-1] != frame_id
-            if case1 or case2:
-                invalid_ids.append(k)
-        for invalid_id in invalid_ids:
-            self.tracks.pop(invalid_id)
+        if self.empty:
+            return
+        last_frame_ids = self.memo['frame_ids']
+        tentative = torch.tensor(
+            [track.tentative for track in self.tracks.values()],
+            device=last_frame_ids.device)
+        # case1: disappeared frames >= self.num_frames_retrain
+        case1 = frame_id - last_frame_ids >= self.num_frames_retain
+        # case2: tentative tracks but not matched in this frame
+        case2 = tentative & (last_frame_ids != frame_id)
+        self.pop_tracks(case1 | case2)
 
     def assign_ids(
             self,
@@ -143,10 +139,7 @@ class ByteTracker(BaseTracker):
             tuple(np.ndarray, np.ndarray): The assigning ids.
         """
         # get track_bboxes
-        track_bboxes = np.zeros((0, 4))
-        for id in ids:
-            track_bboxes = np.concatenate(
-                (track_bboxes, self.tracks[id].mean[:4][None]), axis=0)
+        track_bboxes = self.get_states('mean', ids)[:, :4]
         track_bboxes = torch.from_numpy(track_bboxes).to(det_bboxes)
         track_bboxes = bbox_cxcyah_to_xyxy(track_bboxes)
 
@@ -230,13 +223,17 @@ class ByteTracker(BaseTracker):
             second_det_ids = ids[second_det_inds]
 
             # 1. use Kalman Filter to predict current location
-            for id in self.confirmed_ids:
+            confirmed_ids = self.confirmed_ids
+            if len(confirmed_ids) > 0:
+                means = self.get_states('mean', confirmed_ids)
+                covariances = self.get_states('covariance', confirmed_ids)
                 # track is lost in previous frame
-                if self.tracks[id].frame_ids[-1] != frame_id - 1:
-                    self.tracks[id].mean[7] = 0
-                (self.tracks[id].mean,
-                 self.tracks[id].covariance) = self.kf.predict(
-                     self.tracks[id].mean, self.tracks[id].covariance)
+                lost = (self.get('frame_ids', confirmed_ids)
+                        != frame_id - 1).cpu().numpy()
+                means[lost, 7] = 0
+                means, covariances = self.kf.multi_predict(means, covariances)
+                self.set_states('mean', means, confirmed_ids)
+                self.set_states('covariance', covariances, confirmed_ids)
 
             # 2. first match
             first_match_track_inds, first_match_det_inds = self.assign_ids(
@@ -76,36 +76,33 @@ class SORTTracker(BaseTracker):
         """Initialize a track."""
         super().init_track(id, obj)
         self.tracks[id].tentative = True
-        bbox = bbox_xyxy_to_cxcyah(self.tracks[id].bboxes[-1])  # size = (1, 4)
-        assert bbox.ndim == 2 and bbox.shape[0] == 1
-        bbox = bbox.squeeze(0).cpu().numpy()
-        self.tracks[id].mean, self.tracks[id].covariance = self.kf.initiate(
-            bbox)
 
     def update_track(self, id: int, obj: Tuple[Tensor]) -> None:
         """Update a track."""
         super().update_track(id, obj)
         if self.tracks[id].tentative:
-            if len(self.tracks[id]['bboxes']) >= self.num_tentatives:
+            if self.num_hits(id) >= self.num_tentatives:
                 self.tracks[id].tentative = False
-        bbox = bbox_xyxy_to_cxcyah(self.tracks[id].bboxes[-1])  # size = (1, 4)
-        assert bbox.ndim == 2 and bbox.shape[0] == 1
-        bbox = bbox.squeeze(0).cpu().numpy()
-        self.tracks[id].mean, self.tracks[id].covariance = self.kf.update(
-            self.tracks[id].mean, self.tracks[id].covariance, bbox)
+
+    def update_states(self, init_ids: List[int],
+                      update_ids: List[int]) -> None:
+        """Initiate and correct the Kalman filter states of the tracks in
+        batch."""
+        self._update_kalman_states(init_ids, update_ids)
 
     def pop_invalid_tracks(self, frame_id: int) -> None:
         """Pop out invalid tracks."""
-        invalid_ids = []
-        for k, v in self.tracks.items():
-            # case1: disappeared frames >= self.num_frames_retrain
-            case1 = frame_id - v['frame_ids'][-1] >= self.num_frames_retain
-            # case2: tentative tracks but not matched in this frame
-            case2 = v.tentative and v['frame_ids'][-1] != frame_id
-            if case1 or case2:
-                invalid_ids.append(k)
-        for invalid_id in invalid_ids:
-            self.tracks.pop(invalid_id)
+        if self.empty:
+            return
+        last_frame_ids = self.memo['frame_ids']
+        tentative = torch.tensor(
+            [track.tentative for track in self.tracks.values()],
+            device=last_frame_ids.device)
+        # case1: disappeared frames >= self.num_frames_retrain
+        case1 = frame_id - last_frame_ids >= self.num_frames_retain
+        # case2: tentative tracks but not matched in this frame
+        case2 = tentative & (last_frame_ids != frame_id)
+        self.pop_tracks(case1 | case2)
 
     def track(self,
               model: torch.nn.Module,
@@ -182,8 +179,11 @@ class SORTTracker(BaseTracker):
                              dtype=torch.long).to(bboxes.device)
 
             # motion
-            self.tracks, costs = self.motion.track(self.tracks,
-                                                   bbox_xyxy_to_cxcyah(bboxes))
+            mean, covariance, costs = self.motion.track(
+                self.get_states('mean'), self.get_states('covariance'),
+                bbox_xyxy_to_cxcyah(bboxes))
+            self.set_states('mean', mean)
+            self.set_states('covariance', covariance)
 
             active_ids = self.confirmed_ids
             if self.with_reid:
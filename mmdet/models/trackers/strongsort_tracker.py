@@ -1,5 +1,5 @@
 # Copyright (c) OpenMMLab. All rights reserved.
-from typing import Optional, Tuple
+from typing import List, Optional
 
 import numpy as np
 import torch
@@ -81,25 +81,12 @@ class StrongSORTTracker(SORTTracker):
         super().__init__(motion, obj_score_thr, reid, match_iou_thr,
                          num_tentatives, **kwargs)
 
-    def update_track(self, id: int, obj: Tuple[Tensor]) -> None:
-        """Update a track."""
-        for k, v in zip(self.memo_items, obj):
-            v = v[None]
-            if self.momentums is not None and k in self.momentums:
-                m = self.momentums[k]
-                self.tracks[id][k] = (1 - m) * self.tracks[id][k] + m * v
-            else:
-                self.tracks[id][k].append(v)
-
-        if self.tracks[id].tentative:
-            if len(self.tracks[id]['bboxes']) >= self.num_tentatives:
-                self.tracks[id].tentative = False
-        bbox = bbox_xyxy_to_cxcyah(self.tracks[id].bboxes[-1])  # size = (1, 4)
-        assert bbox.ndim == 2 and bbox.shape[0] == 1
-        bbox = bbox.squeeze(0).cpu().numpy()
-        score = float(self.tracks[id].scores[-1].cpu())
-        self.tracks[id].mean, self.tracks[id].covariance = self.kf.update(
-            self.tracks[id].mean, self.tracks[id].covariance, bbox, score)
+    def update_states(self, init_ids: List[int],
+                      update_ids: List[int]) -> None:
+        """Initiate and correct the Kalman filter states of the tracks in
+        batch, the scores of the tracks are used by the NSA Kalman
+        filter."""
+        self._update_kalman_states(init_ids, update_ids, with_scores=True)
 
     def track(self,
               model: torch.nn.Module,
@@ -179,11 +166,17 @@ class StrongSORTTracker(SORTTracker):
             # motion
             if model.with_cmc:
                 num_samples = 1
-                self.tracks = model.cmc.track(self.last_img, img, self.tracks,
-                                              num_samples, frame_id, metainfo)
-
-            self.tracks, motion_dists = self.motion.track(
-                self.tracks, bbox_xyxy_to_cxcyah(bboxes))
+                self.tracks, mean = model.cmc.track(self.last_img, img,
+                                                    self.tracks, num_samples,
+                                                    frame_id, metainfo,
+                                                    self.get_states('mean'))
+                self.set_states('mean', mean)
+
+            mean, covariance, motion_dists = self.motion.track(
+                self.get_states('mean'), self.get_states('covariance'),
+                bbox_xyxy_to_cxcyah(bboxes))
+            self.set_states('mean', mean)
+            self.set_states('covariance', covariance)
 
             active_ids = self.confirmed_ids
             if self.with_reid:
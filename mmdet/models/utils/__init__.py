@@ -10,16 +10,17 @@ from .misc import (align_tensor, aligned_bilinear, center_of_mass,
                    empty_instances, filter_gt_instances,
                    filter_scores_and_topk, flip_tensor, generate_coordinate,
                    images_to_levels, interpolate_as, levels_to_images,
-                   mask2ndarray, multi_apply, relative_coordinate_maps,
-                   rename_loss_dict, reweight_loss_dict,
-                   samplelist_boxtype2tensor, select_single_mlvl,
-                   sigmoid_geometric_mean, unfold_wo_center, unmap,
+                   mask2ndarray, multi_apply, pack_gt_instances,
+                   relative_coordinate_maps, rename_loss_dict,
+                   reweight_loss_dict, samplelist_boxtype2tensor,
+                   select_single_mlvl, sigmoid_geometric_mean,
+                   split_gt_instances, unfold_wo_center, unmap,
                    unpack_gt_instances)
 from .panoptic_gt_processing import preprocess_panoptic_gt
 from .point_sample import (get_uncertain_point_coords_with_randomness,
                            get_uncertainty)
 from .vlfuse_helper import BertEncoderLayer, VLFuse, permute_and_flatten
-from .wbf import weighted_boxes_fusion
+from .wbf import batched_weighted_boxes_fusion, weighted_boxes_fusion
 
 __all__ = [
     'gaussian_radius', 'gen_gaussian_target', 'make_divisible',
@@ -33,5 +34,6 @@ __all__ = [
     'samplelist_boxtype2tensor', 'filter_gt_instances', 'rename_loss_dict',
     'reweight_loss_dict', 'relative_coordinate_maps', 'aligned_bilinear',
     'unfold_wo_center', 'imrenormalize', 'VLFuse', 'permute_and_flatten',
-    'BertEncoderLayer', 'align_tensor', 'weighted_boxes_fusion'
+    'BertEncoderLayer', 'align_tensor', 'weighted_boxes_fusion',
+    'batched_weighted_boxes_fusion', 'pack_gt_instances', 'split_gt_instances'
 ]
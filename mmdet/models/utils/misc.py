@@ -1,4 +1,5 @@
 # Copyright (c) OpenMMLab. All rights reserved.
+import copy
 from functools import partial
 from typing import List, Optional, Sequence, Tuple, Union
 
@@ -468,49 +469,109 @@ def floordiv(dividend, divisor, rounding_mode='trunc'):
         return dividend // divisor
 
 
-def _filter_gt_instances_by_score(batch_data_samples: SampleList,
-                                  score_thr: float) -> SampleList:
-    """Filter ground truth (GT) instances by score.
+def pack_gt_instances(
+    batch_data_samples: SampleList,
+    fields: Sequence[str] = ('bboxes', 'scores', 'labels')
+) -> Tuple[InstanceData, Tensor]:
+    """Concatenate the box fields of the ground truth (GT) instances of a
+    batch.
+
+    Only the given fields are concatenated, so the other fields, e.g. masks
+    of different sizes, may not be concatenable across the images.
 
     Args:
         batch_data_samples (SampleList): The Data
-            Samples. It usually includes information such as
-            `gt_instance`, `gt_panoptic_seg` and `gt_sem_seg`.
-        score_thr (float): The score filter threshold.
+            Samples. Their `gt_instances` should have the same fields.
+        fields (Sequence[str]): The fields to concatenate. The fields not in
+            `gt_instances` are skipped. Defaults to
+            ('bboxes', 'scores', 'labels').
 
     Returns:
-        SampleList: The Data Samples filtered by score.
+        tuple[:obj:`InstanceData`, Tensor]: The concatenated instances and
+        the index of the image of each instance. The concatenated instances
+        never share their data with the input instances.
     """
-    for data_samples in batch_data_samples:
-        assert 'scores' in data_samples.gt_instances, \
-            'there does not exit scores in instances'
-        if data_samples.gt_instances.bboxes.shape[0] > 0:
-            data_samples.gt_instances = data_samples.gt_instances[
-                data_samples.gt_instances.scores > score_thr]
+    batch_gt_instances = [
+        InstanceData(
+            **{
+                key: data_samples.gt_instances.get(key)
+                for key in fields if key in data_samples.gt_instances
+            }) for data_samples in batch_data_samples
+    ]
+    packed_instances = InstanceData.cat(batch_gt_instances)
+    if len(batch_gt_instances) == 1:
+        # `InstanceData.cat` returns the input itself for a single element
+        packed_instances = copy.deepcopy(packed_instances)
+    num_instances = [
+        len(data_samples.gt_instances) for data_samples in batch_data_samples
+    ]
+    device = packed_instances.bboxes.device
+    batch_idx = torch.arange(
+        len(batch_data_samples), device=device).repeat_interleave(
+            torch.tensor(num_instances, device=device))
+    return packed_instances, batch_idx
+
+
+def split_gt_instances(batch_data_samples: SampleList,
+                       packed_instances: InstanceData,
+                       batch_idx: Tensor) -> SampleList:
+    """Split the fields concatenated by :func:`pack_gt_instances` back to the
+    data samples of a batch.
+
+    The `gt_instances` of each image are replaced by new instances, which
+    take the split fields and keep the other fields of the image.
+
+    Args:
+        batch_data_samples (SampleList): The Data
+            Samples to set `gt_instances`.
+        packed_instances (:obj:`InstanceData`): The concatenated instances,
+            ordered by their images.
+        batch_idx (Tensor): The index of the image of each instance.
+
+    Returns:
+        SampleList: The Data Samples with the split instances.
+    """
+    num_instances = torch.bincount(
+        batch_idx, minlength=len(batch_data_samples)).tolist()
+    start = 0
+    for data_samples, num in zip(batch_data_samples, num_instances):
+        gt_instances = data_samples.gt_instances.new()
+        for key, value in packed_instances.items():
+            gt_instances[key] = value[start:start + num]
+        data_samples.gt_instances = gt_instances
+        start += num
     return batch_data_samples
 
 
-def _filter_gt_instances_by_size(batch_data_samples: SampleList,
-                                 wh_thr: tuple) -> SampleList:
+def _filter_gt_instances_by_score(gt_instances: InstanceData,
+                                  score_thr: float) -> Tensor:
+    """Filter ground truth (GT) instances by score.
+
+    Args:
+        gt_instances (:obj:`InstanceData`): The instances to filter.
+        score_thr (float): The score filter threshold.
+
+    Returns:
+        Tensor: Whether to keep each instance.
+    """
+    return gt_instances.scores > score_thr
+
+
+def _filter_gt_instances_by_size(gt_instances: InstanceData,
+                                 wh_thr: tuple) -> Tensor:
     """Filter ground truth (GT) instances by size.
 
     Args:
-        batch_data_samples (SampleList): The Data
-            Samples. It usually includes information such as
-            `gt_instance`, `gt_panoptic_seg` and `gt_sem_seg`.
+        gt_instances (:obj:`InstanceData`): The instances to filter.
         wh_thr (tuple):  Minimum width and height of bbox.
 
     Returns:
-        SampleList: The Data Samples filtered by score.
+        Tensor: Whether to keep each instance.
     """
-    for data_samples in batch_data_samples:
-        bboxes = data_samples.gt_instances.bboxes
-        if bboxes.shape[0] > 0:
-            w = bboxes[:, 2] - bboxes[:, 0]
-            h = bboxes[:, 3] - bboxes[:, 1]
-            data_samples.gt_instances = data_samples.gt_instances[
-                (w > wh_thr[0]) & (h > wh_thr[1])]
-    return batch_data_samples
+    bboxes = gt_instances.bboxes
+    w = bboxes[:, 2] - bboxes[:, 0]
+    h = bboxes[:, 3] - bboxes[:, 1]
+    return (w > wh_thr[0]) & (h > wh_thr[1])
 
 
 def filter_gt_instances(batch_data_samples: SampleList,
@@ -518,6 +579,9 @@ def filter_gt_instances(batch_data_samples: SampleList,
                         wh_thr: tuple = None):
     """Filter ground truth (GT) instances by score and/or size.
 
+    The boxes and scores of the whole batch are concatenated and filtered at
+    once, so their `gt_instances` should have the same fields.
+
     Args:
         batch_data_samples (SampleList): The Data
             Samples. It usually includes information such as
@@ -528,13 +592,29 @@ def filter_gt_instances(batch_data_samples: SampleList,
     Returns:
         SampleList: The Data Samples filtered by score and/or size.
     """
-
     if score_thr is not None:
-        batch_data_samples = _filter_gt_instances_by_score(
-            batch_data_samples, score_thr)
+        for data_samples in batch_data_samples:
+            assert 'scores' in data_samples.gt_instances, \
+                'there does not exit scores in instances'
+    if len(batch_data_samples) == 0 or (score_thr is None and wh_thr is None):
+        return batch_data_samples
+
+    packed_instances, _ = pack_gt_instances(
+        batch_data_samples, fields=('bboxes', 'scores'))
+    keep = None
+    if score_thr is not None:
+        keep = _filter_gt_instances_by_score(packed_instances, score_thr)
     if wh_thr is not None:
-        batch_data_samples = _filter_gt_instances_by_size(
-            batch_data_samples, wh_thr)
+        size_keep = _filter_gt_instances_by_size(packed_instances, wh_thr)
+        keep = size_keep if keep is None else keep & size_keep
+    # index the instances of each image with its own slice of `keep`, as
+    # the other fields may not be concatenable across the images
+    num_instances = [
+        len(data_samples.gt_instances) for data_samples in batch_data_samples
+    ]
+    for data_samples, img_keep in zip(batch_data_samples,
+                                      keep.split(num_instances)):
+        data_samples.gt_instances = data_samples.gt_instances[img_keep]
     return batch_data_samples
 
 
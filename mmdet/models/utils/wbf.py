@@ -1,10 +1,14 @@
 # Copyright (c) OpenMMLab. All rights reserved.
 
+import math
 import warnings
-from typing import Tuple
+from collections import defaultdict
+from multiprocessing import Pool
+from typing import List, Tuple
 
 import numpy as np
 import torch
+from mmengine.utils import track_parallel_progress, track_progress
 from torch import Tensor
 
 
@@ -65,75 +69,258 @@ def weighted_boxes_fusion(
 
     filtered_boxes = prefilter_boxes(bboxes_list, scores_list, labels_list,
                                      weights, skip_box_thr)
+    device = _get_device(bboxes_list)
     if len(filtered_boxes) == 0:
-        return torch.Tensor(), torch.Tensor(), torch.Tensor()
+        return torch.Tensor().to(device), torch.Tensor().to(
+            device), torch.Tensor().to(device)
 
     overall_boxes = []
 
     for label in filtered_boxes:
-        boxes = filtered_boxes[label]
-        new_boxes = []
-        weighted_boxes = np.empty((0, 8))
-
         # Clusterize boxes
-        for j in range(0, len(boxes)):
-            index, best_iou = find_matching_box_fast(weighted_boxes, boxes[j],
-                                                     iou_thr)
-
-            if index != -1:
-                new_boxes[index].append(boxes[j])
-                weighted_boxes[index] = get_weighted_box(
-                    new_boxes[index], conf_type)
-            else:
-                new_boxes.append([boxes[j].copy()])
-                weighted_boxes = np.vstack((weighted_boxes, boxes[j].copy()))
+        weighted_boxes, num_boxes, model_mask = cluster_boxes(
+            filtered_boxes[label], iou_thr, conf_type, len(weights))
 
         # Rescale confidence based on number of models and boxes
-        for i in range(len(new_boxes)):
-            clustered_boxes = new_boxes[i]
-            if conf_type == 'box_and_model_avg':
-                clustered_boxes = np.array(clustered_boxes)
-                # weighted average for boxes
-                weighted_boxes[i, 1] = weighted_boxes[i, 1] * len(
-                    clustered_boxes) / weighted_boxes[i, 2]
-                # identify unique model index by model index column
-                _, idx = np.unique(clustered_boxes[:, 3], return_index=True)
-                # rescale by unique model weights
-                weighted_boxes[i, 1] = weighted_boxes[i, 1] * clustered_boxes[
-                    idx, 2].sum() / weights.sum()
-            elif conf_type == 'absent_model_aware_avg':
-                clustered_boxes = np.array(clustered_boxes)
-                # get unique model index in the cluster
-                models = np.unique(clustered_boxes[:, 3]).astype(int)
-                # create a mask to get unused model weights
-                mask = np.ones(len(weights), dtype=bool)
-                mask[models] = False
-                # absent model aware weighted average
-                weighted_boxes[
-                    i, 1] = weighted_boxes[i, 1] * len(clustered_boxes) / (
-                        weighted_boxes[i, 2] + weights[mask].sum())
-            elif conf_type == 'max':
-                weighted_boxes[i, 1] = weighted_boxes[i, 1] / weights.max()
-            elif not allows_overflow:
-                weighted_boxes[i, 1] = weighted_boxes[i, 1] * min(
-                    len(weights), len(clustered_boxes)) / weights.sum()
-            else:
-                weighted_boxes[i, 1] = weighted_boxes[i, 1] * len(
-                    clustered_boxes) / weights.sum()
+        if conf_type == 'box_and_model_avg':
+            # weighted average for boxes
+            weighted_boxes[:, 1] = weighted_boxes[:, 1] * \
+                num_boxes / weighted_boxes[:, 2]
+            # rescale by unique model weights
+            weighted_boxes[:, 1] = weighted_boxes[:, 1] * (
+                model_mask * weights).sum(axis=1) / weights.sum()
+        elif conf_type == 'absent_model_aware_avg':
+            # absent model aware weighted average
+            weighted_boxes[:, 1] = weighted_boxes[:, 1] * num_boxes / (
+                weighted_boxes[:, 2] + (~model_mask * weights).sum(axis=1))
+        elif conf_type == 'max':
+            weighted_boxes[:, 1] = weighted_boxes[:, 1] / weights.max()
+        elif not allows_overflow:
+            weighted_boxes[:, 1] = weighted_boxes[:, 1] * np.minimum(
+                len(weights), num_boxes) / weights.sum()
+        else:
+            weighted_boxes[:, 1] = weighted_boxes[:, 1] * \
+                num_boxes / weights.sum()
         overall_boxes.append(weighted_boxes)
     overall_boxes = np.concatenate(overall_boxes, axis=0)
     overall_boxes = overall_boxes[overall_boxes[:, 1].argsort()[::-1]]
 
-    bboxes = torch.Tensor(overall_boxes[:, 4:])
-    scores = torch.Tensor(overall_boxes[:, 1])
-    labels = torch.Tensor(overall_boxes[:, 0]).int()
+    bboxes = torch.Tensor(overall_boxes[:, 4:]).to(device)
+    scores = torch.Tensor(overall_boxes[:, 1]).to(device)
+    labels = torch.Tensor(overall_boxes[:, 0]).int().to(device)
 
     return bboxes, scores, labels
 
 
+def batched_weighted_boxes_fusion(
+        bboxes_lists: list,
+        scores_lists: list,
+        labels_lists: list,
+        weights: list = None,
+        iou_thr: float = 0.55,
+        skip_box_thr: float = 0.0,
+        conf_type: str = 'avg',
+        allows_overflow: bool = False,
+        nproc: int = 1,
+        show_progress: bool = False) -> List[Tuple[Tensor, Tensor, Tensor]]:
+    """Run :func:`weighted_boxes_fusion` on the predictions of many images.
+
+    Args:
+        bboxes_lists (list): ``bboxes_list`` of each image, see
+            :func:`weighted_boxes_fusion`.
+        scores_lists (list): ``scores_list`` of each image.
+        labels_lists (list): ``labels_list`` of each image.
+        weights: list of weights for each model.
+        iou_thr: IoU value for boxes to be a match.
+        skip_box_thr: exclude boxes with score lower than this variable.
+        conf_type: how to calculate confidence in weighted boxes.
+        allows_overflow: false if we want confidence score not exceed 1.0.
+        nproc (int): Processes used for fusing the images in parallel.
+            Defaults to 1.
+        show_progress (bool): Whether to show a progress bar.
+            Defaults to False.
+
+    Returns:
+        list[tuple[Tensor, Tensor, Tensor]]: The fused bboxes, scores and
+        labels of each image.
+    """
+    assert len(bboxes_lists) == len(scores_lists) == len(labels_lists)
+    args = [(bboxes_list, scores_list, labels_list, weights, iou_thr,
+             skip_box_thr, conf_type, allows_overflow)
+            for bboxes_list, scores_list, labels_list in zip(
+                bboxes_lists, scores_lists, labels_lists)]
+    if nproc <= 1:
+        if show_progress:
+            return track_progress(_weighted_boxes_fusion, args)
+        return [_weighted_boxes_fusion(arg) for arg in args]
+    # tensors are sent to the workers as arrays and restored afterwards
+    devices = [_get_device(arg[0]) for arg in args]
+    args = [
+        tuple(_to_numpy_list(x) for x in arg[:3]) + arg[3:] for arg in args
+    ]
+    if show_progress:
+        results = track_parallel_progress(_weighted_boxes_fusion, args, nproc)
+    else:
+        with Pool(nproc) as pool:
+            results = pool.map(_weighted_boxes_fusion, args)
+    return [
+        tuple(x.to(device) for x in result)
+        for result, device in zip(results, devices)
+    ]
+
+
+def _weighted_boxes_fusion(args: tuple) -> Tuple[Tensor, Tensor, Tensor]:
+    """Run :func:`weighted_boxes_fusion` on a tuple of its arguments."""
+    return weighted_boxes_fusion(*args)
+
+
+def _get_device(bboxes_list: list) -> torch.device:
+    """The device of the first tensor in ``bboxes_list``, or cpu."""
+    for bboxes in bboxes_list:
+        if isinstance(bboxes, Tensor):
+            return bboxes.device
+    return torch.device('cpu')
+
+
+def _to_numpy_list(data_list: list) -> list:
+    """Convert the tensors in ``data_list`` to numpy arrays."""
+    return [
+        x.detach().cpu().numpy() if isinstance(x, Tensor) else x
+        for x in data_list
+    ]
+
+
+def cluster_boxes(
+        boxes: np.ndarray, iou_thr: float, conf_type: str,
+        num_models: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Greedily cluster the boxes of a label sorted by score.
+
+    Each box joins the fused box it overlaps most if the IoU is larger than
+    ``iou_thr``, otherwise it starts a new cluster. The clusters keep running
+    sums of their members, so a fused box is updated in constant time
+    instead of being recomputed from all of its members, and the fused boxes
+    are indexed by a uniform grid, so a box is only compared with the fused
+    boxes in the cells it covers. The result is the same as comparing each
+    box with all the fused boxes.
+
+    Note:
+        The clustering cannot be vectorized over the boxes, as the match of
+        a box depends on the fused boxes updated by all the boxes before it,
+        so the boxes are still visited one by one. The IoUs with the
+        candidates are computed at once. The grid works best when the boxes
+        of a label have similar sizes, as its cell size is the 0.9 quantile
+        of the box sizes. With much larger boxes or a negative ``iou_thr``,
+        a box is compared with many or all of the fused boxes.
+
+    Args:
+        boxes (np.ndarray): Boxes of a label returned by
+            :func:`prefilter_boxes`, with shape (n, 8).
+        iou_thr (float): IoU value for boxes to be a match.
+        conf_type (str): How to calculate confidence in weighted boxes.
+        num_models (int): Number of models.
+
+    Returns:
+        tuple[np.ndarray]: The fused boxes with shape (m, 8), the number of
+        boxes in each cluster with shape (m, ) and whether a model has a box
+        in each cluster with shape (m, num_models).
+    """
+    num_boxes = len(boxes)
+    weighted_boxes = np.empty((num_boxes, 8))
+    coords_sum = np.zeros((num_boxes, 4), dtype=np.float32)
+    # running sums of python floats add up exactly as in `get_weighted_box`
+    conf_sum = []
+    conf_max = []
+    weight_sum = []
+    cluster_sizes = []
+    cluster_models = []
+
+    # Boxes not intersecting a fused box have an IoU of 0 with it, so only
+    # the fused boxes sharing a grid cell can be matched if iou_thr >= 0
+    use_grid = num_boxes > 0 and iou_thr >= 0 and np.isfinite(boxes[:,
+                                                                    4:]).all()
+    if use_grid:
+        cell_size = float(
+            np.quantile(
+                np.maximum(boxes[:, 6] - boxes[:, 4],
+                           boxes[:, 7] - boxes[:, 5]), 0.9))
+        grid = defaultdict(set)
+        cluster_cells = []
+
+    def get_cells(coords):
+        x1, y1, x2, y2 = (math.floor(x / cell_size) for x in coords)
+        return [(i, j) for i in range(x1, x2 + 1) for j in range(y1, y2 + 1)]
+
+    num_clusters = 0
+    for box, box_list in zip(boxes, boxes.tolist()):
+        _, score, weight, model, *coords = box_list
+        if use_grid:
+            cells = get_cells(coords)
+            candidates = sorted(set().union(*(grid.get(cell, ())
+                                              for cell in cells)))
+        else:
+            candidates = range(num_clusters)
+        index = -1
+        if len(candidates) > 0:
+            candidates = np.asarray(candidates, dtype=np.int64)
+            ious = bb_iou_array(weighted_boxes[candidates, 4:], box[4:])
+            best = int(np.argmax(ious))
+            if ious[best] > iou_thr:
+                index = int(candidates[best])
+        if index == -1:
+            index = num_clusters
+            num_clusters += 1
+            weighted_boxes[index] = box
+            coords_sum[index] = box[1] * box[4:]
+            conf_sum.append(score)
+            conf_max.append(score)
+            weight_sum.append(weight)
+            cluster_sizes.append(1)
+            cluster_models.append({int(model)})
+            if use_grid:
+                cluster_cells.append(cells)
+                for cell in cells:
+                    grid[cell].add(index)
+            continue
+
+        coords_sum[index] += box[1] * box[4:]
+        conf_sum[index] += score
+        conf_max[index] = max(conf_max[index], score)
+        weight_sum[index] += weight
+        cluster_sizes[index] += 1
+        cluster_models[index].add(int(model))
+
+        # same as `get_weighted_box` on all the boxes of the cluster
+        weighted_box = np.zeros(8, dtype=np.float32)
+        weighted_box[4:] = coords_sum[index]
+        if conf_type == 'max':
+            weighted_box[1] = conf_max[index]
+        else:
+            weighted_box[1] = conf_sum[index] / cluster_sizes[index]
+        weighted_box[4:] /= np.float64(conf_sum[index])
+        fused = weighted_box[4:].tolist()
+        weighted_boxes[index] = [
+            box_list[0], weighted_box[1],
+            np.float32(weight_sum[index]), -1, *fused
+        ]
+        if use_grid:
+            new_cells = get_cells(fused)
+            if new_cells != cluster_cells[index]:
+                for cell in cluster_cells[index]:
+                    grid[cell].discard(index)
+                for cell in new_cells:
+                    grid[cell].add(index)
+                cluster_cells[index] = new_cells
+
+    model_mask = np.zeros((num_clusters, num_models), dtype=bool)
+    for index, models in enumerate(cluster_models):
+        model_mask[index, list(models)] = True
+    return (weighted_boxes[:num_clusters],
+            np.array(cluster_sizes, dtype=np.int64), model_mask)
+
+
 def prefilter_boxes(boxes, scores, labels, weights, thr):
 
-    new_boxes = dict()
+    all_boxes = []
 
     for t in range(len(boxes)):
 
@@ -149,46 +336,60 @@ def prefilter_boxes(boxes, scores, labels, weights, thr):
                       len(boxes[t]), len(labels[t])))
             exit()
 
-        for j in range(len(boxes[t])):
-            score = scores[t][j]
-            if score < thr:
-                continue
-            label = int(labels[t][j])
-            box_part = boxes[t][j]
-            x1 = float(box_part[0])
-            y1 = float(box_part[1])
-            x2 = float(box_part[2])
-            y2 = float(box_part[3])
-
-            # Box data checks
-            if x2 < x1:
-                warnings.warn('X2 < X1 value in box. Swap them.')
-                x1, x2 = x2, x1
-            if y2 < y1:
-                warnings.warn('Y2 < Y1 value in box. Swap them.')
-                y1, y2 = y2, y1
-            if (x2 - x1) * (y2 - y1) == 0.0:
-                warnings.warn('Zero area box skipped: {}.'.format(box_part))
-                continue
-
-            # [label, score, weight, model index, x1, y1, x2, y2]
-            b = [
-                int(label),
-                float(score) * weights[t], weights[t], t, x1, y1, x2, y2
-            ]
-
-            if label not in new_boxes:
-                new_boxes[label] = []
-            new_boxes[label].append(b)
-
-    # Sort each list in dict by score and transform it to numpy array
-    for k in new_boxes:
-        current_boxes = np.array(new_boxes[k])
-        new_boxes[k] = current_boxes[current_boxes[:, 1].argsort()[::-1]]
+        if len(boxes[t]) == 0:
+            continue
+        box_part = _to_array(boxes[t]).reshape(-1, 4)
+        score = _to_array(scores[t]).reshape(-1)
+        label = _to_array(labels[t]).reshape(-1).astype(np.int64)
+
+        keep = score >= thr
+        box_part, score, label = box_part[keep], score[keep], label[keep]
+
+        # Box data checks
+        if (box_part[:, 2] < box_part[:, 0]).any():
+            warnings.warn('X2 < X1 value in box. Swap them.')
+        if (box_part[:, 3] < box_part[:, 1]).any():
+            warnings.warn('Y2 < Y1 value in box. Swap them.')
+        x1 = np.minimum(box_part[:, 0], box_part[:, 2])
+        x2 = np.maximum(box_part[:, 0], box_part[:, 2])
+        y1 = np.minimum(box_part[:, 1], box_part[:, 3])
+        y2 = np.maximum(box_part[:, 1], box_part[:, 3])
+        valid = (x2 - x1) * (y2 - y1) != 0.0
+        if not valid.all():
+            warnings.warn('Zero area box skipped: {}.'.format(
+                box_part[~valid]))
+
+        # [label, score, weight, model index, x1, y1, x2, y2]
+        all_boxes.append(
+            np.stack([
+                label, score * weights[t],
+                np.full_like(score, weights[t]),
+                np.full_like(score, t), x1, y1, x2, y2
+            ],
+                     axis=1)[valid])
+
+    if len(all_boxes) == 0:
+        return dict()
+    all_boxes = np.concatenate(all_boxes, axis=0)
+
+    # Split by label in the order of the first box of each label, sort each
+    # group by score
+    new_boxes = dict()
+    unique_labels, first_index = np.unique(all_boxes[:, 0], return_index=True)
+    for k in unique_labels[np.argsort(first_index)]:
+        current_boxes = all_boxes[all_boxes[:, 0] == k]
+        new_boxes[int(k)] = current_boxes[current_boxes[:, 1].argsort()[::-1]]
 
     return new_boxes
 
 
+def _to_array(data) -> np.ndarray:
+    """Convert a list, array or tensor to a float64 numpy array."""
+    if isinstance(data, Tensor):
+        data = data.detach().cpu().numpy()
+    return np.asarray(data, dtype=np.float64)
+
+
 def get_weighted_box(boxes, conf_type='avg'):
 
     box = np.zeros(8, dtype=np.float32)
@@ -212,24 +413,25 @@ def get_weighted_box(boxes, conf_type='avg'):
     return box
 
 
-def find_matching_box_fast(boxes_list, new_box, match_iou):
+def bb_iou_array(boxes, new_box):
+    # bb intersection over union
+    xA = np.maximum(boxes[:, 0], new_box[0])
+    yA = np.maximum(boxes[:, 1], new_box[1])
+    xB = np.minimum(boxes[:, 2], new_box[2])
+    yB = np.minimum(boxes[:, 3], new_box[3])
+
+    interArea = np.maximum(xB - xA, 0) * np.maximum(yB - yA, 0)
 
-    def bb_iou_array(boxes, new_box):
-        # bb intersection over union
-        xA = np.maximum(boxes[:, 0], new_box[0])
-        yA = np.maximum(boxes[:, 1], new_box[1])
-        xB = np.minimum(boxes[:, 2], new_box[2])
-        yB = np.minimum(boxes[:, 3], new_box[3])
+    # compute the area of both the prediction and ground-truth rectangles
+    boxAArea = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    boxBArea = (new_box[2] - new_box[0]) * (new_box[3] - new_box[1])
 
-        interArea = np.maximum(xB - xA, 0) * np.maximum(yB - yA, 0)
+    iou = interArea / (boxAArea + boxBArea - interArea)
 
-        # compute the area of both the prediction and ground-truth rectangles
-        boxAArea = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
-        boxBArea = (new_box[2] - new_box[0]) * (new_box[3] - new_box[1])
+    return iou
 
-        iou = interArea / (boxAArea + boxBArea - interArea)
 
-        return iou
+def find_matching_box_fast(boxes_list, new_box, match_iou):
 
     if boxes_list.shape[0] == 0:
         return -1, match_iou
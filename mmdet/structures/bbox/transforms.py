@@ -321,15 +321,17 @@ def corner2bbox(corners: torch.Tensor) -> torch.Tensor:
 def bbox_project(
     bboxes: Union[torch.Tensor, np.ndarray],
     homography_matrix: Union[torch.Tensor, np.ndarray],
-    img_shape: Optional[Tuple[int, int]] = None
+    img_shape: Optional[Union[Tuple[int, int], torch.Tensor]] = None
 ) -> Union[torch.Tensor, np.ndarray]:
     """Geometric transformation for bbox.
 
     Args:
         bboxes (Union[torch.Tensor, np.ndarray]): Shape (n, 4) for bboxes.
         homography_matrix (Union[torch.Tensor, np.ndarray]):
-            Shape (3, 3) for geometric transformation.
-        img_shape (Tuple[int, int], optional): Image shape. Defaults to None.
+            Shape (3, 3) for geometric transformation, or shape (n, 3, 3)
+            for the transformation of each bbox.
+        img_shape (Tuple[int, int] | Tensor, optional): Image shape, or
+            shape (n, 2) for the image shape of each bbox. Defaults to None.
     Returns:
         Union[torch.Tensor, np.ndarray]: Converted bboxes.
     """
@@ -341,11 +343,21 @@ def bbox_project(
     corners = bbox2corner(bboxes)
     corners = torch.cat(
         [corners, corners.new_ones(corners.shape[0], 1)], dim=1)
-    corners = torch.matmul(homography_matrix, corners.t()).t()
+    if homography_matrix.dim() == 3:
+        homography_matrix = homography_matrix.repeat_interleave(4, dim=0)
+        corners = torch.matmul(homography_matrix, corners[..., None])[..., 0]
+    else:
+        corners = torch.matmul(homography_matrix, corners.t()).t()
     # Convert to homogeneous coordinates by normalization
     corners = corners[:, :2] / corners[:, 2:3]
     bboxes = corner2bbox(corners)
-    if img_shape is not None:
+    if isinstance(img_shape, torch.Tensor):
+        img_shape = img_shape.to(bboxes)
+        bboxes[:, 0::2] = torch.minimum(bboxes[:, 0::2].clamp(min=0),
+                                        img_shape[:, 1:2])
+        bboxes[:, 1::2] = torch.minimum(bboxes[:, 1::2].clamp(min=0),
+                                        img_shape[:, 0:1])
+    elif img_shape is not None:
         bboxes[:, 0::2] = bboxes[:, 0::2].clamp(0, img_shape[1])
         bboxes[:, 1::2] = bboxes[:, 1::2].clamp(0, img_shape[0])
     if bboxes_type is np.ndarray:
@@ -1,5 +1,5 @@
 # Copyright (c) OpenMMLab. All rights reserved.
-from typing import Sequence, Tuple
+from typing import List, Optional, Sequence, Tuple
 
 import torch
 from mmcv.ops import batched_nms
@@ -102,3 +102,123 @@ def merge_results_by_nms(results: SampleList, offsets: Sequence[Tuple[int,
     merged_result = results[0].clone()
     merged_result.pred_instances = merged_instances
     return merged_result
+
+
+class NeighborPatchMerger:
+    """Merge the predictions of a grid of patches row by row.
+
+    Different from :func:`merge_results_by_nms`, which runs one global NMS
+    over the predictions of all patches, the predictions are merged
+    incrementally while the rows of patches are inferred. The grid of patch
+    positions acts as a spatial index: a box that does not reach into a
+    neighboring patch can not overlap with the boxes of any other patch, so
+    it is final right away. Only the boxes in the overlaps of neighboring
+    patches are suppressed by NMS, together with the boxes of the previous
+    row which reach into the current one. Merged boxes are moved to the CPU
+    so that the device memory does not grow with the image size.
+
+    Only horizontal bboxes are merged; masks are dropped.
+
+    Args:
+        x_starts (Sequence[int]): Left positions of the patch columns.
+        y_starts (Sequence[int]): Top positions of the patch rows.
+        patch_shape (Tuple[int, int]): A (height, width) tuple of the patch
+            size.
+        nms_cfg (dict): NMS config used to merge overlapping boxes.
+        score_thr (float): Boxes with lower scores are dropped before
+            merging. Defaults to 0.
+    """
+
+    def __init__(self,
+                 x_starts: Sequence[int],
+                 y_starts: Sequence[int],
+                 patch_shape: Tuple[int, int],
+                 nms_cfg: dict,
+                 score_thr: float = 0.) -> None:
+        self.x_starts = list(x_starts)
+        self.y_starts = list(y_starts)
+        self.patch_shape = patch_shape
+        self.nms_cfg = nms_cfg
+        self.score_thr = score_thr
+        self.merged: List[InstanceData] = []
+        # boxes merged with the previous rows that reach the next row
+        self.pending: Optional[InstanceData] = None
+
+    def _shared_mask(self, bboxes: torch.Tensor, row: int,
+                     col: int) -> torch.Tensor:
+        """Whether the boxes of patch (row, col) reach into a neighboring
+        patch."""
+        patch_h, patch_w = self.patch_shape
+        shared = bboxes.new_zeros((bboxes.size(0), ), dtype=torch.bool)
+        if col > 0:
+            shared |= bboxes[:, 0] < self.x_starts[col - 1] + patch_w
+        if col + 1 < len(self.x_starts):
+            shared |= bboxes[:, 2] > self.x_starts[col + 1]
+        if row > 0:
+            shared |= bboxes[:, 1] < self.y_starts[row - 1] + patch_h
+        if row + 1 < len(self.y_starts):
+            shared |= bboxes[:, 3] > self.y_starts[row + 1]
+        return shared
+
+    def add_row(self, row: int, results: SampleList) -> None:
+        """Add the predictions of a row of patches.
+
+        Rows must be added from top to bottom.
+
+        Args:
+            row (int): Index of the row.
+            results (List[:obj:`DetDataSample`]): Results of the patches of
+                the row, from left to right.
+        """
+        assert len(results) == len(self.x_starts)
+        y_start = self.y_starts[row]
+        candidates = [] if self.pending is None else [self.pending]
+        for col, result in enumerate(results):
+            pred_instances = result.pred_instances
+            assert pred_instances.bboxes.size(-1) == 4, \
+                'Only horizontal bboxes are supported.'
+            keep = pred_instances.scores >= self.score_thr
+            bboxes = pred_instances.bboxes[keep]
+            instances = InstanceData(
+                bboxes=bboxes + bboxes.new_tensor([
+                    self.x_starts[col], y_start, self.x_starts[col], y_start
+                ]),
+                scores=pred_instances.scores[keep],
+                labels=pred_instances.labels[keep])
+            shared = self._shared_mask(instances.bboxes, row, col)
+            self.merged.append(instances[~shared].cpu())
+            candidates.append(instances[shared])
+
+        candidates = InstanceData.cat(candidates)
+        if len(candidates) > 0:
+            _, keeps = batched_nms(
+                boxes=candidates.bboxes,
+                scores=candidates.scores,
+                idxs=candidates.labels,
+                nms_cfg=self.nms_cfg)
+            candidates = candidates[keeps]
+        if row + 1 < len(self.y_starts):
+            # boxes reaching the next row may still be suppressed by it
+            waiting = candidates.bboxes[:, 3] > self.y_starts[row + 1]
+            self.merged.append(candidates[~waiting].cpu())
+            self.pending = candidates[waiting]
+        else:
+            self.merged.append(candidates.cpu())
+            self.pending = None
+
+    def merge(self) -> InstanceData:
+        """Return all the merged predictions.
+
+        Returns:
+            :obj:`InstanceData`: Merged predictions in the coordinates of the
+            large image.
+        """
+        merged = list(self.merged)
+        if self.pending is not None:
+            merged.append(self.pending.cpu())
+        if len(merged) == 0:
+            return InstanceData(
+                bboxes=torch.zeros((0, 4)),
+                scores=torch.zeros((0, )),
+                labels=torch.zeros((0, ), dtype=torch.long))
+        return InstanceData.cat(merged)
@@ -19,6 +19,7 @@ from ..registry import VISUALIZERS
 from ..structures import DetDataSample
 from ..structures.mask import BitmapMasks, PolygonMasks, bitmap_to_polygon
 from .palette import _get_adaptive_scales, get_palette, jitter_color
+from .raster import blend_masks, draw_bboxes, draw_labels, draw_mask_edges
 
 
 @VISUALIZERS.register_module()
@@ -45,6 +46,11 @@ class DetLocalVisualizer(Visualizer):
             Defaults to 3.
         alpha (int, float): The transparency of bboxes or mask.
             Defaults to 0.8.
+        draw_backend (str): The backend drawing instances and panoptic
+            segmentation, 'matplotlib' or 'cv2'. The 'cv2' backend blends
+            the masks and draws bboxes and texts on the image array
+            directly, which is much faster for images with many instances.
+            Defaults to 'matplotlib'.
 
     Examples:
         >>> import numpy as np
@@ -89,17 +95,21 @@ class DetLocalVisualizer(Visualizer):
                                             Tuple[int]]] = (200, 200, 200),
                  mask_color: Optional[Union[str, Tuple[int]]] = None,
                  line_width: Union[int, float] = 3,
-                 alpha: float = 0.8) -> None:
+                 alpha: float = 0.8,
+                 draw_backend: str = 'matplotlib') -> None:
         super().__init__(
             name=name,
             image=image,
             vis_backends=vis_backends,
             save_dir=save_dir)
+        assert draw_backend in ('matplotlib', 'cv2'), \
+            f'draw_backend should be matplotlib or cv2, but got {draw_backend}'
         self.bbox_color = bbox_color
         self.text_color = text_color
         self.mask_color = mask_color
         self.line_width = line_width
         self.alpha = alpha
+        self.draw_backend = draw_backend
         # Set default value. When calling
         # `DetLocalVisualizer().dataset_meta=xxx`,
         # it will override the default value.
@@ -121,6 +131,8 @@ class DetLocalVisualizer(Visualizer):
         Returns:
             np.ndarray: the drawn image which channel is RGB.
         """
+        if self.draw_backend == 'cv2':
+            return self._draw_instances_cv2(image, instances, classes, palette)
         self.set_image(image)
 
         if 'bboxes' in instances and instances.bboxes.sum() > 0:
@@ -276,6 +288,9 @@ class DetLocalVisualizer(Visualizer):
         mask_palette = get_palette(mask_color, max_label + 1)
         colors = [mask_palette[label] for label in labels]
 
+        if self.draw_backend == 'cv2':
+            return self._draw_panoptic_seg_cv2(image, segms, labels, colors,
+                                               classes)
         self.set_image(image)
 
         # draw segm
@@ -318,6 +333,176 @@ class DetLocalVisualizer(Visualizer):
                 horizontal_alignments='center')
         return self.get_image()
 
+    def _get_label_texts(self, instances: InstanceData,
+                         classes: Optional[List[str]]) -> List[str]:
+        """Get the label texts of instances."""
+        label_texts = []
+        for i, label in enumerate(instances.labels):
+            if 'label_names' in instances:
+                label_text = instances.label_names[i]
+            else:
+                label_text = classes[
+                    label] if classes is not None else f'class {label}'
+            if 'scores' in instances:
+                score = round(float(instances.scores[i]) * 100, 1)
+                label_text += f': {score}'
+            label_texts.append(label_text)
+        return label_texts
+
+    def _to_pixels(self, points: float) -> float:
+        """Convert a size in points of the matplotlib backend to pixels."""
+        return points * self.dpi / 72
+
+    def _line_width_pixels(self, image: np.ndarray,
+                           line_width: float) -> float:
+        """Get the pixels of a line width clipped like
+        :meth:`draw_polygons`."""
+        default_font_size = max(
+            np.sqrt(image.shape[0] * image.shape[1]) // 90, 10)
+        return self._to_pixels(min(max(line_width, 1), default_font_size / 4))
+
+    def _get_mask_label_positions(
+            self, masks: np.ndarray) -> Tuple[List[np.ndarray], np.ndarray]:
+        """Get the centroids and areas of the largest components of masks."""
+        areas = []
+        positions = []
+        for mask in masks:
+            _, _, stats, centroids = cv2.connectedComponentsWithStats(
+                mask.astype(np.uint8), connectivity=8)
+            if stats.shape[0] > 1:
+                largest_id = np.argmax(stats[1:, -1]) + 1
+                positions.append(centroids[largest_id])
+                areas.append(stats[largest_id, -1])
+        return positions, np.array(areas)
+
+    def _draw_instances_cv2(self, image: np.ndarray, instances: InstanceData,
+                            classes: Optional[List[str]],
+                            palette: Optional[List[tuple]]) -> np.ndarray:
+        """Draw instances of GT or prediction with the 'cv2' backend.
+
+        Args:
+            image (np.ndarray): The image to draw.
+            instances (:obj:`InstanceData`): Data structure for
+                instance-level annotations or predictions.
+            classes (List[str], optional): Category information.
+            palette (List[tuple], optional): Palette information
+                corresponding to the category.
+
+        Returns:
+            np.ndarray: the drawn image which channel is RGB.
+        """
+        labels = instances.labels
+        max_label = int(max(labels) if len(labels) > 0 else 0)
+        text_palette = get_palette(self.text_color, max_label + 1)
+        text_colors = [text_palette[label] for label in labels]
+        font_sizes = []
+        masks = None
+        if 'masks' in instances:
+            masks = instances.masks
+            if isinstance(masks, torch.Tensor):
+                masks = masks.numpy()
+            elif isinstance(masks, (PolygonMasks, BitmapMasks)):
+                masks = masks.to_ndarray()
+            masks = masks.astype(bool)
+
+        if 'bboxes' in instances and instances.bboxes.sum() > 0:
+            bboxes = instances.bboxes
+            if isinstance(bboxes, torch.Tensor):
+                bboxes = bboxes.numpy()
+            bbox_color = palette if self.bbox_color is None \
+                else self.bbox_color
+            bbox_palette = get_palette(bbox_color, max_label + 1)
+            bbox_colors = [bbox_palette[label] for label in labels]
+            positions = bboxes[:, :2] + self.line_width
+            areas = (bboxes[:, 3] - bboxes[:, 1]) * (
+                bboxes[:, 2] - bboxes[:, 0])
+            horizontal_alignment = 'left'
+        elif masks is not None:
+            # instances.bboxes.sum()==0 represent dummy bboxes.
+            # A typical example of SOLO does not exist bbox branch.
+            bboxes = None
+            positions, areas = self._get_mask_label_positions(masks)
+            positions = np.array(positions)
+            horizontal_alignment = 'center'
+        else:
+            return image
+        if len(labels) > 0:
+            font_sizes = [
+                self._to_pixels(int(13 * scale))
+                for scale in _get_adaptive_scales(areas)
+            ]
+        label_texts = self._get_label_texts(instances, classes)
+
+        def draw_overlays(image):
+            if bboxes is not None:
+                image = draw_bboxes(
+                    image, bboxes, bbox_colors,
+                    self._line_width_pixels(image, self.line_width),
+                    self.alpha)
+            if masks is not None:
+                image = draw_mask_edges(image, masks, (255, 255, 255),
+                                        self._line_width_pixels(image, 2),
+                                        self.alpha)
+            # texts are drawn above the other artists in matplotlib
+            return draw_labels(
+                image,
+                label_texts,
+                positions,
+                text_colors,
+                font_sizes,
+                pad=self._to_pixels(0.7),
+                horizontal_alignment=horizontal_alignment)
+
+        image = draw_overlays(image.astype(np.uint8))
+        if masks is not None:
+            mask_color = palette if self.mask_color is None \
+                else self.mask_color
+            mask_palette = get_palette(mask_color, max_label + 1)
+            colors = [jitter_color(mask_palette[label]) for label in labels]
+            # like matplotlib, the masks are blended over the drawn bboxes,
+            # texts and edges, which are drawn on the blended image again
+            image = draw_overlays(
+                blend_masks(image, masks, colors, self.alpha))
+        return image
+
+    def _draw_panoptic_seg_cv2(self, image: np.ndarray, segms: np.ndarray,
+                               labels: np.ndarray, colors: List[tuple],
+                               classes: List[str]) -> np.ndarray:
+        """Draw panoptic seg of GT or prediction with the 'cv2' backend.
+
+        Args:
+            image (np.ndarray): The image to draw.
+            segms (np.ndarray): The masks of the segments.
+            labels (np.ndarray): The labels of the segments.
+            colors (list[tuple]): The colors of the segments.
+            classes (List[str]): Category information.
+
+        Returns:
+            np.ndarray: the drawn image which channel is RGB.
+        """
+        line_width = self._line_width_pixels(image, 2)
+        # like matplotlib, the masks are blended over the drawn edges, which
+        # are drawn on the blended image again
+        image = draw_mask_edges(
+            image.astype(np.uint8), segms, (255, 255, 255), line_width,
+            self.alpha)
+        image = blend_masks(image, segms, colors, self.alpha)
+        image = draw_mask_edges(image, segms, (255, 255, 255), line_width,
+                                self.alpha)
+
+        positions, areas = self._get_mask_label_positions(segms)
+        scales = _get_adaptive_scales(areas)
+        max_label = int(max(labels) if len(labels) > 0 else 0)
+        text_palette = get_palette(self.text_color, max_label + 1)
+        text_colors = [text_palette[label] for label in labels]
+        return draw_labels(
+            image, [classes[label] for label in labels],
+            np.array(positions),
+            text_colors,
+            [self._to_pixels(int(13 * scale)) for scale in scales],
+            pad=self._to_pixels(0.7),
+            horizontal_alignment='center')
+
     def _draw_sem_seg(self, image: np.ndarray, sem_seg: PixelData,
                       classes: Optional[List],
                       palette: Optional[List]) -> np.ndarray:
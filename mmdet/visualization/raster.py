@@ -0,0 +1,232 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+from functools import lru_cache
+from typing import Callable, List, Sequence, Tuple
+
+import cv2
+import numpy as np
+from matplotlib.backends.backend_agg import get_hinting_flag
+from matplotlib.font_manager import FontProperties, findfont, get_font
+
+
+def _blend_overlay(image: np.ndarray, draw_fn: Callable[[np.ndarray], None],
+                   alpha: float) -> np.ndarray:
+    """Draw on a copy of the image and blend the drawn pixels back."""
+    overlay = image.copy()
+    draw_fn(overlay)
+    drawn = (overlay != image).any(axis=-1)
+    image = image.copy()
+    image[drawn] = (image[drawn] * (1 - alpha) + overlay[drawn] * alpha +
+                    0.5).astype(np.uint8)
+    return image
+
+
+def _thickness(line_width: float) -> int:
+    """Get the OpenCV thickness of lines about ``line_width`` pixels wide.
+
+    OpenCV draws lines of thickness ``t > 1`` about ``2 * t - 1`` pixels
+    wide.
+    """
+    return max(int(round((line_width + 1) / 2)), 1)
+
+
+def _mask_regions(masks: np.ndarray) -> List[Tuple[int, int, int, int]]:
+    """Get the bounding regions (x1, y1, x2, y2) of the masks."""
+    rows = masks.any(axis=2)
+    cols = masks.any(axis=1)
+    regions = []
+    for row, col in zip(rows, cols):
+        ys = np.flatnonzero(row)
+        xs = np.flatnonzero(col)
+        if len(ys) == 0:
+            regions.append((0, 0, 0, 0))
+        else:
+            regions.append((xs[0], ys[0], xs[-1] + 1, ys[-1] + 1))
+    return regions
+
+
+def blend_masks(image: np.ndarray, masks: np.ndarray,
+                colors: Sequence[Tuple[int]], alpha: float) -> np.ndarray:
+    """Blend the colors of binary masks onto an image.
+
+    The masks are composited in order into a single float buffer, and each
+    mask is only blended within its bounding region, which gives the same
+    result as blending the whole image once per mask.
+
+    Args:
+        image (np.ndarray): The RGB image with the shape (H, W, 3).
+        masks (np.ndarray): The boolean masks with the shape (N, H, W).
+        colors (Sequence[tuple]): The RGB colors of the masks.
+        alpha (float): The opacity of the masks.
+
+    Returns:
+        np.ndarray: The blended image.
+    """
+    if len(masks) == 0:
+        return image
+    canvas = image.astype(np.float32)
+    colors = np.asarray(colors, dtype=np.float32) * alpha
+    regions = _mask_regions(masks)
+    for (x1, y1, x2, y2), mask, color in zip(regions, masks, colors):
+        region = canvas[y1:y2, x1:x2]
+        mask = mask[y1:y2, x1:x2]
+        region[mask] = region[mask] * (1 - alpha) + color
+    return (canvas + 0.5).astype(np.uint8)
+
+
+def draw_mask_edges(image: np.ndarray, masks: np.ndarray, color: Tuple[int],
+                    line_width: float, alpha: float) -> np.ndarray:
+    """Draw the contours of binary masks.
+
+    Args:
+        image (np.ndarray): The RGB image with the shape (H, W, 3).
+        masks (np.ndarray): The boolean masks with the shape (N, H, W).
+        color (tuple[int]): The RGB color of the contours.
+        line_width (float): The width of the contours in pixels.
+        alpha (float): The opacity of the contours.
+
+    Returns:
+        np.ndarray: The drawn image.
+    """
+    contours = []
+    for (x1, y1, x2, y2), mask in zip(_mask_regions(masks), masks):
+        if x2 == x1:
+            continue
+        mask_contours, _ = cv2.findContours(
+            mask[y1:y2, x1:x2].astype(np.uint8),
+            cv2.RETR_CCOMP,
+            cv2.CHAIN_APPROX_NONE,
+            offset=(int(x1), int(y1)))
+        contours.extend(mask_contours)
+    if len(contours) == 0:
+        return image
+    thickness = _thickness(line_width)
+    color = tuple(int(c) for c in color)
+
+    def draw(overlay):
+        cv2.polylines(overlay, contours, True, color, thickness)
+
+    return _blend_overlay(image, draw, alpha)
+
+
+def draw_bboxes(image: np.ndarray, bboxes: np.ndarray,
+                colors: Sequence[Tuple[int]], line_width: float,
+                alpha: float) -> np.ndarray:
+    """Draw the edges of bboxes.
+
+    Args:
+        image (np.ndarray): The RGB image with the shape (H, W, 3).
+        bboxes (np.ndarray): The bboxes (x1, y1, x2, y2) with the shape
+            (N, 4).
+        colors (Sequence[tuple]): The RGB colors of the bboxes.
+        line_width (float): The width of the edges in pixels.
+        alpha (float): The opacity of the edges.
+
+    Returns:
+        np.ndarray: The drawn image.
+    """
+    if len(bboxes) == 0:
+        return image
+    thickness = _thickness(line_width)
+    bboxes = np.round(bboxes).astype(np.int64).tolist()
+    colors = [tuple(int(c) for c in color) for color in colors]
+
+    def draw(overlay):
+        for (x1, y1, x2, y2), color in zip(bboxes, colors):
+            cv2.rectangle(overlay, (x1, y1), (x2, y2), color, thickness)
+
+    return _blend_overlay(image, draw, alpha)
+
+
+def _get_font(font_size: float):
+    """Get the default font of matplotlib with the size in pixels."""
+    font = get_font(findfont(FontProperties()))
+    font.clear()
+    font.set_size(font_size, 72)
+    return font
+
+
+@lru_cache(maxsize=64)
+def _get_baseline(font_size: float) -> float:
+    """Get the distance in pixels from the top of a line to its baseline."""
+    font = _get_font(font_size)
+    font.set_text('lp', 0, flags=get_hinting_flag())
+    return (font.get_width_height()[1] - font.get_descent()) / 64
+
+
+@lru_cache(maxsize=1024)
+def _render_text(text: str, font_size: float) -> Tuple[np.ndarray, float]:
+    """Render a text with the default font of matplotlib.
+
+    Args:
+        text (str): The text.
+        font_size (float): The font size in pixels.
+
+    Returns:
+        tuple[np.ndarray, float]: The read-only coverage of the text in
+        [0, 1] with the shape (h, w), and the distance in pixels from the
+        top of the line to the bottom of the coverage.
+    """
+    baseline = _get_baseline(font_size)
+    font = _get_font(font_size)
+    font.set_text(text, 0, flags=get_hinting_flag())
+    font.draw_glyphs_to_bitmap(antialiased=True)
+    coverage = np.asarray(font.get_image(), dtype=np.float32) / 255
+    coverage.setflags(write=False)
+    return coverage, baseline + font.get_descent() / 64
+
+
+def draw_labels(image: np.ndarray,
+                texts: Sequence[str],
+                positions: np.ndarray,
+                colors: Sequence[Tuple[int]],
+                font_sizes: Sequence[float],
+                pad: float = 1.,
+                horizontal_alignment: str = 'left',
+                bg_alpha: float = 0.8) -> np.ndarray:
+    """Draw texts on black backgrounds.
+
+    The texts are rendered with the default font of matplotlib, so that
+    they look like the texts drawn by matplotlib.
+
+    Args:
+        image (np.ndarray): The RGB image with the shape (H, W, 3).
+        texts (Sequence[str]): The texts.
+        positions (np.ndarray): The positions (x, y) of the top of the texts
+            with the shape (N, 2).
+        colors (Sequence[tuple]): The RGB colors of the texts.
+        font_sizes (Sequence[float]): The font sizes of the texts in pixels.
+        pad (float): The padding of the backgrounds in pixels.
+            Defaults to 1.
+        horizontal_alignment (str): The horizontal alignment of the texts
+            to their positions, 'left' or 'center'. Defaults to 'left'.
+        bg_alpha (float): The opacity of the backgrounds. Defaults to 0.8.
+
+    Returns:
+        np.ndarray: The drawn image.
+    """
+    if len(texts) == 0:
+        return image
+    height, width = image.shape[:2]
+    image = image.astype(np.float32)
+    for text, (x, y), color, font_size in zip(texts, positions, colors,
+                                              font_sizes):
+        coverage, bottom = _render_text(text, font_size)
+        h, w = coverage.shape
+        if horizontal_alignment == 'center':
+            x = x - w / 2
+        x1, y1 = max(int(round(x - pad)), 0), max(int(round(y - pad)), 0)
+        x2 = max(int(round(x + w + pad)), 0)
+        y2 = max(int(round(y + font_size + pad)), 0)
+        image[y1:y2, x1:x2] *= 1 - bg_alpha
+
+        # clip the text to the image
+        x, y = int(round(x)), int(round(y + bottom)) - h
+        cx1, cy1 = max(-x, 0), max(-y, 0)
+        cx2, cy2 = min(width - x, w), min(height - y, h)
+        if cx2 <= cx1 or cy2 <= cy1:
+            continue
+        coverage = coverage[cy1:cy2, cx1:cx2, None]
+        region = image[y + cy1:y + cy2, x + cx1:x + cx2]
+        region *= 1 - coverage
+        region += coverage * np.asarray(color, dtype=np.float32)
+    return (image + 0.5).astype(np.uint8)
@@ -93,6 +93,39 @@ class TestDetInferencer(TestCase):
                                                 res_bs3['visualization']):
                 self.assertTrue(np.allclose(res_bs1_vis, res_bs3_vis))
 
+    @mock.patch('mmengine.infer.infer._load_checkpoint', return_value=None)
+    def test_stream(self, mock):
+        inferencer = DetInferencer('rtmdet-t')
+        img_dir = 'tests/data/VOCdevkit/VOC2007/JPEGImages/'
+        res = inferencer(img_dir, batch_size=2, return_vis=True)
+
+        # img dir
+        chunks = list(
+            inferencer.stream(img_dir, batch_size=2, return_vis=True))
+        self.assertEqual(len(chunks), (len(res['predictions']) + 1) // 2)
+        preds = [pred for chunk in chunks for pred in chunk['predictions']]
+        self.assert_predictions_equal(res['predictions'], preds)
+        vis = [img for chunk in chunks for img in chunk['visualization']]
+        self.assertEqual(len(vis), len(res['visualization']))
+
+        # glob pattern
+        preds = [
+            pred for chunk in inferencer.stream(
+                osp.join(img_dir, '*.jpg'), num_workers=0)
+            for pred in chunk['predictions']
+        ]
+        self.assertEqual(len(preds), len(res['predictions']))
+
+        # frame generator
+        imgs = (
+            mmcv.imread(osp.join(img_dir, p))
+            for p in sorted(mmengine.list_dir_or_file(img_dir)))
+        preds = [
+            pred for chunk in inferencer.stream(imgs, batch_size=3)
+            for pred in chunk['predictions']
+        ]
+        self.assertEqual(len(preds), len(res['predictions']))
+
     @parameterized.expand([
         'rtmdet-t', 'mask-rcnn_r50_fpn_1x_coco', 'panoptic_fpn_r50_fpn_1x_coco'
     ])
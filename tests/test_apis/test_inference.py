@@ -74,3 +74,15 @@ def test_inference_detector(config, devices):
         assert isinstance(result, DetDataSample)
         result = inference_detector(model, [img1, img2])
         assert isinstance(result, list) and len(result) == 2
+
+        # test batched inference with a preprocessing pool
+        imgs = [img1, img2, img1]
+        batch_results = inference_detector(
+            model, imgs, batch_size=2, num_workers=2, num_prefetch_batches=1)
+        assert isinstance(batch_results, list) and len(batch_results) == 3
+        single_results = inference_detector(model, imgs)
+        for batch_result, single_result in zip(batch_results, single_results):
+            assert torch.allclose(
+                batch_result.pred_instances.scores,
+                single_result.pred_instances.scores,
+                atol=1e-4)
@@ -0,0 +1,92 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+import os.path as osp
+import tempfile
+from unittest.mock import patch
+
+import numpy as np
+import torch
+from mmengine.structures import InstanceData
+
+from mmdet.apis import inference_large_image
+from mmdet.apis.large_image_inference import open_large_image
+from mmdet.structures import DetDataSample
+
+# objects of (x1, y1, x2, y2), filled with their index + 1 in the image
+OBJECTS = [(10, 10, 30, 40), (80, 60, 95, 90), (120, 20, 150, 50),
+           (200, 130, 250, 170), (60, 150, 90, 190), (165, 90, 185, 110)]
+
+
+def _make_image(height=200, width=260):
+    img = np.zeros((height, width, 3), dtype=np.uint8)
+    for i, (x1, y1, x2, y2) in enumerate(OBJECTS):
+        img[y1:y2, x1:x2] = i + 1
+    return img
+
+
+def _stub_inference_detector(patches_list):
+    """A stub of ``inference_detector`` detecting the objects which are
+    entirely inside a patch."""
+
+    def inference_detector(model, patches, batch_size=1):
+        results = []
+        for patch_img in patches:
+            patches_list.append(patch_img)
+            bboxes, labels = [], []
+            h, w = patch_img.shape[:2]
+            for value in np.unique(patch_img[..., 0]):
+                if value == 0:
+                    continue
+                ys, xs = np.nonzero(patch_img[..., 0] == value)
+                bbox = [xs.min(), ys.min(), xs.max() + 1, ys.max() + 1]
+                if bbox[0] > 0 and bbox[1] > 0 and bbox[2] < w and \
+                        bbox[3] < h:
+                    bboxes.append(bbox)
+                    labels.append(int(value) - 1)
+            results.append(
+                DetDataSample(
+                    pred_instances=InstanceData(
+                        bboxes=torch.tensor(
+                            bboxes, dtype=torch.float32).view(-1, 4),
+                        scores=torch.full((len(bboxes), ), 0.9),
+                        labels=torch.tensor(labels, dtype=torch.long))))
+        return results
+
+    return inference_detector
+
+
+def test_inference_large_image():
+    img = _make_image()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        npy_file = osp.join(tmp_dir, 'img.npy')
+        np.save(npy_file, img)
+        # .npy files are memory-mapped
+        assert isinstance(open_large_image(npy_file), np.memmap)
+
+        for image in (img, npy_file):
+            patches = []
+            with patch(
+                    'mmdet.apis.large_image_inference.inference_detector',
+                    _stub_inference_detector(patches)):
+                result = inference_large_image(
+                    None,
+                    image,
+                    patch_size=100,
+                    patch_overlap_ratio=0.25,
+                    batch_size=2)
+
+            # the patches are read row by row at the patch offsets, the last
+            # patch of an axis is aligned to the end of the image
+            offsets = [(x, y) for y in (0, 75, 100) for x in (0, 75, 150, 160)]
+            assert len(patches) == len(offsets)
+            for patch_img, (x, y) in zip(patches, offsets):
+                np.testing.assert_array_equal(patch_img,
+                                              img[y:y + 100, x:x + 100])
+
+            # each object is seen by several patches and kept once
+            assert result.ori_shape == (200, 260)
+            pred_instances = result.pred_instances
+            order = pred_instances.labels.argsort()
+            assert pred_instances.labels[order].tolist() == list(
+                range(len(OBJECTS)))
+            assert torch.equal(pred_instances.bboxes[order],
+                               torch.tensor(OBJECTS, dtype=torch.float32))
@@ -0,0 +1,48 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+import os
+
+import numpy as np
+import pytest
+
+from mmdet.apis import MultiStreamTracking, init_track_model
+from mmdet.utils import register_all_modules
+
+register_all_modules()
+
+
+@pytest.mark.parametrize('config', [
+    'configs/sort/sort_faster-rcnn_r50_fpn_8xb2-4e_mot17halftrain_test-'
+    'mot17halfval.py'
+])
+def test_multi_stream_tracking(config):
+    project_dir = os.path.abspath(os.path.dirname(os.path.dirname(__file__)))
+    project_dir = os.path.join(project_dir, '..')
+    model = init_track_model(os.path.join(project_dir, config), device='cpu')
+
+    rng = np.random.RandomState(0)
+    streams = dict(
+        cam0=[rng.randint(0, 255, (64, 96, 3), np.uint8) for _ in range(3)],
+        cam1=[rng.randint(0, 255, (96, 64, 3), np.uint8) for _ in range(2)])
+    runner = MultiStreamTracking(model, batch_size=4, queue_size=2)
+    results = list(runner(streams))
+
+    assert len(results) == 5
+    for name in streams:
+        frame_ids = [
+            frame_id for stream, frame_id, _ in results if stream == name
+        ]
+        assert frame_ids == list(range(len(streams[name])))
+    for name, frame_id, track_sample in results:
+        det_sample = track_sample[0]
+        assert det_sample.frame_id == frame_id
+        assert 'pred_track_instances' in det_sample
+        assert det_sample.ori_shape == streams[name][0].shape[:2]
+
+    stats = runner.stats
+    assert stats['cam0']['num_frames'] == 3
+    assert stats['cam1']['num_frames'] == 2
+    assert stats['cam0']['fps'] > 0
+
+    # trackers of the streams are independent from the model's tracker
+    assert runner.trackers['cam0'] is not model.tracker
+    assert runner.trackers['cam0'] is not runner.trackers['cam1']
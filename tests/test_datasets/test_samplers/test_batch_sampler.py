@@ -7,7 +7,8 @@ import numpy as np
 from mmengine.dataset import DefaultSampler
 from torch.utils.data import Dataset
 
-from mmdet.datasets.samplers import AspectRatioBatchSampler
+from mmdet.datasets.samplers import (AspectRatioBatchSampler,
+                                     SizeBucketBatchSampler)
 
 
 class DummyDataset(Dataset):
@@ -78,3 +79,55 @@ class TestAspectRatioBatchSampler(TestCase):
             flag = batch[0][0] < batch[0][1]
             for i in range(1, batch_size):
                 self.assertEqual(batch[i][0] < batch[i][1], flag)
+
+
+class SizedDummyDataset(DummyDataset):
+
+    def __init__(self, length):
+        self.length = length
+        self.shapes = np.random.randint(100, 1000, (length, 2))
+
+
+class TestSizeBucketBatchSampler(TestCase):
+
+    @patch('mmengine.dist.get_dist_info', return_value=(0, 1))
+    def setUp(self, mock):
+        self.length = 100
+        self.dataset = SizedDummyDataset(self.length)
+        self.sampler = DefaultSampler(self.dataset, shuffle=True)
+
+    def test_indivisible_batch(self):
+        batch_size = 7
+        for drop_last in (False, True):
+            batch_sampler = SizeBucketBatchSampler(
+                self.sampler,
+                batch_size=batch_size,
+                drop_last=drop_last,
+                scale=(1333, 800))
+            all_batch_idxs = list(batch_sampler)
+            self.assertEqual(len(all_batch_idxs), len(batch_sampler))
+            num_idxs = sum(len(batch_idxs) for batch_idxs in all_batch_idxs)
+            self.assertEqual(
+                num_idxs,
+                len(batch_sampler) * batch_size if drop_last else self.length)
+
+    def test_padding_ratio(self):
+        batch_size = 4
+        batch_sampler = SizeBucketBatchSampler(
+            self.sampler, batch_size=batch_size, bucket_size=32)
+        aspect_ratio_sampler = AspectRatioBatchSampler(
+            self.sampler, batch_size=batch_size)
+        self.assertEqual(batch_sampler.padding_ratio, 0)
+
+        def get_padding_ratio(all_batch_idxs):
+            valid_pixels, batch_pixels = 0, 0
+            for batch_idxs in all_batch_idxs:
+                shapes = self.dataset.shapes[batch_idxs]
+                valid_pixels += shapes.prod(1).sum()
+                batch_pixels += len(shapes) * shapes.max(0).prod()
+            return 1 - valid_pixels / batch_pixels
+
+        padding_ratio = get_padding_ratio(list(batch_sampler))
+        self.assertAlmostEqual(batch_sampler.padding_ratio, padding_ratio)
+        self.assertLess(padding_ratio,
+                        get_padding_ratio(list(aspect_ratio_sampler)))
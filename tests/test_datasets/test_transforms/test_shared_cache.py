@@ -0,0 +1,174 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+import copy
+import multiprocessing
+import os
+import unittest
+import warnings
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+from mmdet.datasets.transforms import CachedMixUp, CachedMosaic
+from mmdet.datasets.transforms.shared_cache import SharedResultsCache
+from mmdet.structures.bbox import HorizontalBoxes
+from mmdet.structures.mask import BitmapMasks
+
+
+def _append_in_worker(cache, value):
+    cache.append(dict(img=np.full((4, 5, 3), value, dtype=np.uint8)))
+
+
+def _die_while_writing(cache, slot):
+    cache._lock.acquire()
+    cache._versions[slot] += 1
+    os._exit(0)
+
+
+class TestSharedResultsCache(unittest.TestCase):
+
+    def test_append_and_get(self):
+        cache = SharedResultsCache(3, random_pop=False, slot_size=1024)
+        self.assertEqual(len(cache), 0)
+        for i in range(4):
+            cache.append(
+                dict(
+                    img=np.full((4, 5, 3), i, dtype=np.uint8),
+                    gt_bboxes_labels=np.array([i])))
+        # the oldest result is overwritten
+        self.assertEqual(len(cache), 3)
+        self.assertEqual([int(cache[i]['img'][0, 0, 0]) for i in range(3)],
+                         [3, 1, 2])
+        results = cache[1]
+        self.assertEqual(results['img'].shape, (4, 5, 3))
+        self.assertEqual(results['img'].dtype, np.uint8)
+        self.assertEqual(results['gt_bboxes_labels'].tolist(), [1])
+        # reads are copies
+        results['img'][:] = 100
+        self.assertEqual(int(cache[1]['img'][0, 0, 0]), 1)
+        with self.assertRaises(IndexError):
+            cache[3]
+
+        # too large results are not cached
+        with self.assertWarns(UserWarning):
+            self.assertFalse(
+                cache.append(dict(img=np.zeros((32, 32, 3), np.uint8))))
+        cache.close()
+
+    def test_share_across_processes(self):
+        cache = SharedResultsCache(4, slot_size=1024)
+        # the caches unpickled by spawned workers share the memory
+        attached = SharedResultsCache.__new__(SharedResultsCache)
+        attached.__setstate__(cache.__getstate__())
+        attached.append(dict(img=np.ones((2, 2), dtype=np.float32)))
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache[0]['img'].tolist(), [[1., 1.], [1., 1.]])
+
+        ctx = multiprocessing.get_context('fork')
+        process = ctx.Process(target=_append_in_worker, args=(cache, 7))
+        process.start()
+        process.join()
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(int(cache[1]['img'][0, 0, 0]), 7)
+        cache.close()
+
+    def test_deepcopy(self):
+        cache = SharedResultsCache(4, slot_size=1024)
+        copied = copy.deepcopy(cache)
+        self.assertIs(copied._lock, cache._lock)
+        copied.append(dict(img=np.full((2, 2), 3, dtype=np.uint8)))
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(int(cache[0]['img'][0, 0]), 3)
+
+        # the memory is kept until the last copy is released
+        name = cache._name
+        cache.close()
+        attached = SharedResultsCache.__new__(SharedResultsCache)
+        attached.__setstate__(copied.__getstate__())
+        self.assertEqual(int(attached[0]['img'][0, 0]), 3)
+        attached.close()
+        copied.close()
+        with self.assertRaises(FileNotFoundError):
+            SharedMemory(name=name)
+
+    def test_dead_writer(self):
+        cache = SharedResultsCache(2, slot_size=1024, timeout=0.05)
+        for i in range(2):
+            cache.append(dict(img=np.full((2, 2), i, dtype=np.uint8)))
+        # a worker dies while writing slot 0 and holding the lock
+        ctx = multiprocessing.get_context('fork')
+        process = ctx.Process(target=_die_while_writing, args=(cache, 0))
+        process.start()
+        process.join()
+
+        # the read times out to a miss and the slot is dropped
+        with self.assertWarns(UserWarning):
+            self.assertIsNone(cache[0])
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            self.assertIsNone(cache[0])
+        self.assertEqual(int(cache[1]['img'][0, 0]), 1)
+        # the lock is taken with a timeout
+        with self.assertWarns(UserWarning):
+            self.assertFalse(
+                cache.append(dict(img=np.ones((2, 2), dtype=np.uint8))))
+
+        # the slot is read again once it is written
+        cache._versions[0] += 1
+        self.assertEqual(int(cache[0]['img'][0, 0]), 0)
+        cache.close()
+
+
+class TestSharedCachedTransforms(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        self.results = {
+            'img':
+            rng.randint(0, 255, (32, 32, 3)).astype(np.uint8),
+            'img_shape': (32, 32),
+            'gt_bboxes_labels':
+            np.array([1, 2, 3], dtype=np.int64),
+            'gt_bboxes':
+            HorizontalBoxes(
+                np.array([[1, 1, 5, 5], [5, 5, 10, 10], [10, 10, 20, 20]],
+                         dtype=np.float32)),
+            'gt_ignore_flags':
+            np.array([0, 0, 1], dtype=bool),
+            'gt_masks':
+            BitmapMasks(
+                (rng.rand(3, 32, 32) > 0.5).astype(np.uint8),
+                height=32,
+                width=32),
+        }
+
+    def test_cached_mosaic(self):
+        transform = CachedMosaic(
+            img_scale=(12, 10), max_cached_images=6, shared_cache=True)
+        self.assertIsInstance(transform.results_cache, SharedResultsCache)
+        self.assertIn('shared_cache=True', repr(transform))
+        for _ in range(8):
+            results = transform(copy.deepcopy(self.results))
+        self.assertEqual(len(transform.results_cache), 6)
+        self.assertEqual(results['img'].shape[:2], (20, 24))
+        self.assertEqual(results['gt_bboxes_labels'].shape[0],
+                         results['gt_bboxes'].shape[0])
+        self.assertEqual(
+            len(results['gt_masks']), results['gt_bboxes'].shape[0])
+
+        # copies of the pipeline, e.g. made by ``BaseDataset.get_subset``,
+        # share the cache
+        copied = copy.deepcopy(transform)
+        copied(copy.deepcopy(self.results))
+        self.assertEqual(len(copied.results_cache), 6)
+        self.assertEqual(copied.results_cache._name,
+                         transform.results_cache._name)
+
+    def test_cached_mixup(self):
+        transform = CachedMixUp(
+            img_scale=(16, 16), max_cached_images=3, shared_cache=True)
+        for _ in range(5):
+            results = transform(copy.deepcopy(self.results))
+        self.assertEqual(len(transform.results_cache), 3)
+        self.assertEqual(results['img'].shape[:2], (32, 32))
+        self.assertEqual(results['gt_bboxes_labels'].shape[0],
+                         results['gt_bboxes'].shape[0])
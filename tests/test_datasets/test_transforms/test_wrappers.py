@@ -1,10 +1,13 @@
 import copy
+import glob
 import os.path as osp
+import tempfile
 import unittest
 
+import numpy as np
 from mmcv.transforms import Compose
 
-from mmdet.datasets.transforms import MultiBranch, RandomOrder
+from mmdet.datasets.transforms import DiskCache, MultiBranch, RandomOrder
 from mmdet.utils import register_all_modules
 from .utils import construct_toy_data
 
@@ -171,3 +174,89 @@ class TestRandomOrder(unittest.TestCase):
         self.assertEqual(
             repr(transform), ('RandomOrder(Sharpness, Contrast, '
                               'Brightness, Rotate, ShearX, TranslateY, )'))
+
+
+class TestDiskCache(unittest.TestCase):
+
+    def setUp(self):
+        data_prefix = osp.join(osp.dirname(__file__), '../../data')
+        self.results = {
+            'img_path':
+            osp.join(data_prefix, 'color.jpg'),
+            'instances': [{
+                'bbox': [10, 10, 110, 120],
+                'bbox_label': 2,
+                'ignore_flag': 0
+            }]
+        }
+        self.transforms = [
+            dict(type='LoadImageFromFile'),
+            dict(type='LoadAnnotations', with_bbox=True),
+            dict(type='Resize', scale=(200, 150), keep_ratio=True)
+        ]
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_transform(self):
+        transform = DiskCache(self.transforms, cache_dir=self.tmp_dir.name)
+        expected = Compose(self.transforms)(copy.deepcopy(self.results))
+        results = transform(copy.deepcopy(self.results))
+        self.assertEqual(
+            len(glob.glob(osp.join(self.tmp_dir.name, '*', '*.pkl'))), 1)
+
+        # the second call loads the outputs from the cache
+        transform.transforms = Compose([])
+        cached = transform(copy.deepcopy(self.results))
+        for results in (results, cached):
+            self.assertEqual(results['img_shape'], expected['img_shape'])
+            np.testing.assert_array_equal(results['img'], expected['img'])
+            np.testing.assert_array_equal(results['gt_bboxes'].numpy(),
+                                          expected['gt_bboxes'].numpy())
+            np.testing.assert_array_equal(results['gt_bboxes_labels'], [2])
+        # the cached image can be modified in place
+        cached['img'][:] = 0
+        cached = transform(copy.deepcopy(self.results))
+        np.testing.assert_array_equal(cached['img'], expected['img'])
+
+    def test_different_annotations(self):
+        transform = DiskCache(self.transforms, cache_dir=self.tmp_dir.name)
+        transform(copy.deepcopy(self.results))
+        # the same image with other instances is another entry
+        results = copy.deepcopy(self.results)
+        results['instances'] = [{
+            'bbox': [0, 0, 10, 10],
+            'bbox_label': 7,
+            'ignore_flag': 0
+        }, {
+            'bbox': [20, 20, 40, 50],
+            'bbox_label': 7,
+            'ignore_flag': 0
+        }]
+        expected = Compose(self.transforms)(copy.deepcopy(results))
+        results = transform(results)
+        self.assertEqual(
+            len(glob.glob(osp.join(self.tmp_dir.name, '*', '*.pkl'))), 2)
+        np.testing.assert_array_equal(results['gt_bboxes_labels'], [7, 7])
+        np.testing.assert_array_equal(results['gt_bboxes'].numpy(),
+                                      expected['gt_bboxes'].numpy())
+
+    def test_evict(self):
+        transform = DiskCache(
+            self.transforms[:1], cache_dir=self.tmp_dir.name, max_size=1)
+        for key in range(3):
+            results = copy.deepcopy(self.results)
+            results['img_id'] = key
+            transform.key_fields = ('img_path', 'img_id')
+            transform(results)
+        # the store is over the size limit, only the entry being written
+        # by the last call is kept
+        self.assertLessEqual(
+            len(glob.glob(osp.join(self.tmp_dir.name, '*', '*.pkl'))), 1)
+
+    def test_repr(self):
+        transform = DiskCache(
+            self.transforms[:1], cache_dir=self.tmp_dir.name, max_size=1024)
+        self.assertIn('DiskCache(transforms=Compose(', repr(transform))
+        self.assertIn('max_size=1024', repr(transform))
@@ -2,6 +2,7 @@
 import os.path as osp
 import tempfile
 from unittest import TestCase
+from unittest.mock import Mock
 
 import torch
 import torch.nn as nn
@@ -12,6 +13,7 @@ from mmengine.registry import MODEL_WRAPPERS
 from mmengine.runner import Runner
 from torch.utils.data import Dataset
 
+from mmdet.engine.hooks import MeanTeacherHook
 from mmdet.registry import DATASETS
 from mmdet.utils import register_all_modules
 
@@ -97,6 +99,25 @@ class TestMeanTeacherHook(TestCase):
     def tearDown(self):
         self.temp_dir.cleanup()
 
+    def test_momentum_update(self):
+        model = ToyModel2()
+        hook = MeanTeacherHook(momentum=0.1, interval=4)
+        teacher = [p.clone() for p in model.teacher.parameters()]
+        student = [p.clone() for p in model.student.parameters()]
+        hook.momentum_update(model, 0.1)
+        for t, s, p in zip(teacher, student, model.teacher.parameters()):
+            torch.testing.assert_close(p, t * 0.9 + s * 0.1)
+
+        runner = Mock(model=model, iter=3)
+        hook.after_train_iter(runner, 0)
+        hook = MeanTeacherHook(
+            momentum=0.1, interval=4, compensate_momentum=True)
+        teacher = [p.clone() for p in model.teacher.parameters()]
+        hook.after_train_iter(runner, 0)
+        momentum = 1 - 0.9**4
+        for t, s, p in zip(teacher, student, model.teacher.parameters()):
+            torch.testing.assert_close(p, t * (1 - momentum) + s * momentum)
+
     def test_mean_teacher_hook(self):
         device = 'cuda:0' if torch.cuda.is_available() else 'cpu'
         model = ToyModel2().to(device)
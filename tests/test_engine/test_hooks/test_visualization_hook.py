@@ -1,6 +1,7 @@
 # Copyright (c) OpenMMLab. All rights reserved.
 import os.path as osp
 import shutil
+import threading
 import time
 from unittest import TestCase
 from unittest.mock import Mock
@@ -9,6 +10,7 @@ import torch
 from mmengine.structures import InstanceData
 
 from mmdet.engine.hooks import DetVisualizationHook, TrackVisualizationHook
+from mmdet.engine.hooks.visualization_hook import _DrawWorkers
 from mmdet.structures import DetDataSample, TrackDataSample
 from mmdet.visualization import DetLocalVisualizer, TrackLocalVisualizer
 
@@ -69,6 +71,45 @@ class TestVisualizationHook(TestCase):
         self.assertTrue(osp.exists(f'{timestamp}/1/{test_out_dir}'))
         shutil.rmtree(f'{timestamp}')
 
+    def test_async_workers(self):
+        runner = Mock()
+        runner.iter = 1
+        timestamp = time.strftime('%Y%m%d_%H%M%S', time.localtime())
+        test_out_dir = timestamp + '1'
+        runner.work_dir = timestamp
+        runner.timestamp = '1'
+        hook = DetVisualizationHook(
+            draw=True, test_out_dir=test_out_dir, async_workers=2)
+        hook.after_test_iter(runner, 1, {}, self.outputs[:1])
+        hook.after_test_epoch(runner)
+        self.assertTrue(osp.exists(f'{timestamp}/1/{test_out_dir}/color.jpg'))
+        shutil.rmtree(f'{timestamp}')
+
+        # the images are drawn in the loop if they are shown
+        hook = DetVisualizationHook(draw=True, show=True, async_workers=2)
+        self.assertEqual(hook.async_workers, 0)
+
+    def test_draw_workers(self):
+        workers = _DrawWorkers(1, max_pending=1)
+        event = threading.Event()
+        results = []
+        workers.submit(event.wait)
+        # wait for the worker to take the first job
+        while workers._queue.qsize() > 0:
+            time.sleep(0.01)
+        self.assertTrue(workers.submit(results.append, 1))
+        # the jobs beyond max_pending are dropped
+        self.assertFalse(workers.submit(results.append, 2))
+        event.set()
+        self.assertEqual(workers.flush(), 1)
+        self.assertEqual(results, [1])
+
+        # the errors of the jobs are raised when flushing
+        workers.submit(results.pop, 5)
+        with self.assertRaises(IndexError):
+            workers.flush()
+        self.assertEqual(workers.flush(), 0)
+
 
 class TestTrackVisualizationHook(TestCase):
 
@@ -203,6 +203,23 @@ class TestCocoPanopticMetric(unittest.TestCase):
         metric.process({}, deepcopy(self.data_samples))
         eval_results = metric.evaluate(size=1)
         self.assertDictEqual(eval_results, self.target)
+        # the predictions are evaluated without being saved
+        self.assertFalse(osp.exists(metric.seg_out_dir))
+
+        # with the cache of gt
+        metric = CocoPanopticMetric(
+            ann_file=None,
+            seg_prefix=self.gt_seg_dir,
+            classwise=False,
+            nproc=1,
+            outfile_prefix=None,
+            gt_cache_size=1)
+        metric.dataset_meta = self.dataset_meta
+        for _ in range(2):
+            metric.process({}, deepcopy(self.data_samples))
+            eval_results = metric.evaluate(size=1)
+            self.assertDictEqual(eval_results, self.target)
+            self.assertEqual(len(metric._gt_cache), 1)
 
         # without tmpfile and json
         outfile_prefix = f'{self.tmp_dir.name}/test'
@@ -0,0 +1,215 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+import copy
+from unittest import TestCase
+from unittest.mock import patch
+
+import mmcv
+import numpy as np
+import torch
+from mmengine.structures import InstanceData
+
+from mmdet.models.data_preprocessors import (BatchPhotoMetricDistortion,
+                                             BatchRandomAffine,
+                                             BatchRandomCrop, BatchRandomFlip,
+                                             BatchYOLOXHSVRandomAug,
+                                             DetDataPreprocessor)
+from mmdet.models.data_preprocessors.batch_augments import (_hsv_to_rgb,
+                                                            _rgb_to_hsv)
+from mmdet.structures import DetDataSample
+from mmdet.structures.bbox import HorizontalBoxes, bbox_flip
+from mmdet.testing import demo_mm_inputs
+
+
+class TestBatchAugments(TestCase):
+
+    def setUp(self):
+        self.image_shapes = [[3, 40, 50], [3, 64, 32]]
+        self.packed_inputs = demo_mm_inputs(
+            2, self.image_shapes, num_items=[3, 4], with_mask=True)
+
+    def _preprocess(self, batch_augments, pad_mask=True):
+        processor = DetDataPreprocessor(
+            mean=[103.53, 116.28, 123.675],
+            std=[57.375, 57.12, 58.395],
+            bgr_to_rgb=True,
+            pad_mask=pad_mask,
+            batch_augments=batch_augments)
+        plain_processor = DetDataPreprocessor(
+            mean=[103.53, 116.28, 123.675],
+            std=[57.375, 57.12, 58.395],
+            bgr_to_rgb=True,
+            pad_mask=pad_mask)
+        plain_data = plain_processor(
+            copy.deepcopy(self.packed_inputs), training=True)
+        data = processor(copy.deepcopy(self.packed_inputs), training=True)
+        return processor, plain_data, data
+
+    def _assert_homography_matrix(self, data, plain_data):
+        """Assert that the recorded homography matrices project the plain
+        bboxes to the augmented ones."""
+        for data_sample, plain_sample in zip(data['data_samples'],
+                                             plain_data['data_samples']):
+            img_shape = data_sample.img_shape
+            boxes = HorizontalBoxes(plain_sample.gt_instances.bboxes.clone())
+            boxes.project_(torch.from_numpy(data_sample.homography_matrix))
+            boxes.clip_(img_shape)
+            boxes = boxes[boxes.is_inside(img_shape)]
+            torch.testing.assert_close(
+                data_sample.gt_instances.bboxes,
+                boxes.tensor,
+                atol=1e-3,
+                rtol=1e-4)
+
+    @staticmethod
+    def _zeros_randint(high, size, **kwargs):
+        return torch.zeros(size, dtype=torch.long, device=kwargs.get('device'))
+
+    def test_hsv(self):
+        img = np.random.uniform(0, 255, (8, 9, 3)).astype(np.float32)
+        hsv = _rgb_to_hsv(torch.from_numpy(img).permute(2, 0, 1)[None])
+        expected = mmcv.bgr2hsv(img[..., ::-1].copy())
+        self.assertTrue(
+            np.allclose(hsv[0].permute(1, 2, 0).numpy(), expected, atol=1e-2))
+        rgb = _hsv_to_rgb(hsv)[0].permute(1, 2, 0).numpy()
+        self.assertTrue(np.allclose(rgb, img, atol=1e-2))
+
+    def test_photometric_identity(self):
+        # the distortions with neutral ranges keep the images if the channels
+        # are not swapped, so all the random flags are turned off
+        torch.manual_seed(0)
+        photometric = dict(
+            type='BatchPhotoMetricDistortion',
+            brightness_delta=0,
+            contrast_range=(1, 1),
+            saturation_range=(1, 1),
+            hue_delta=0)
+        hsv = dict(
+            type='BatchYOLOXHSVRandomAug',
+            hue_delta=0,
+            saturation_delta=0,
+            value_delta=0)
+        for aug, aug_type in ((photometric, BatchPhotoMetricDistortion),
+                              (hsv, BatchYOLOXHSVRandomAug)):
+            with patch('torch.randint', self._zeros_randint):
+                processor, plain_data, data = self._preprocess([aug])
+            self.assertIsInstance(processor.batch_augments[0], aug_type)
+            torch.testing.assert_close(
+                data['inputs'], plain_data['inputs'], atol=1e-3, rtol=1e-3)
+
+        _, plain_data, data = self._preprocess(
+            [dict(type='BatchPhotoMetricDistortion')])
+        # padded pixels are not changed
+        torch.testing.assert_close(data['inputs'][0, :, 40:],
+                                   plain_data['inputs'][0, :, 40:])
+        torch.testing.assert_close(data['inputs'][1, :, :, 32:],
+                                   plain_data['inputs'][1, :, :, 32:])
+
+    def test_random_flip(self):
+        processor, plain_data, data = self._preprocess(
+            [dict(type='BatchRandomFlip', prob=1., direction='horizontal')])
+        self.assertIsInstance(processor.batch_augments[0], BatchRandomFlip)
+        for i, (h, w) in enumerate([(40, 50), (64, 32)]):
+            torch.testing.assert_close(
+                data['inputs'][i, :, :h, :w],
+                plain_data['inputs'][i, :, :h, :w].flip(-1))
+            data_sample = data['data_samples'][i]
+            plain_sample = plain_data['data_samples'][i]
+            self.assertTrue(data_sample.flip)
+            torch.testing.assert_close(
+                data_sample.gt_instances.bboxes,
+                bbox_flip(plain_sample.gt_instances.bboxes, (h, w),
+                          'horizontal'))
+            masks = data_sample.gt_instances.masks.masks
+            plain_masks = plain_sample.gt_instances.masks.masks
+            self.assertEqual(masks.shape, plain_masks.shape)
+            np.testing.assert_array_equal(masks[:, :h, :w],
+                                          plain_masks[:, :h, :w][..., ::-1])
+
+        self._assert_homography_matrix(data, plain_data)
+
+        # the flip is composed into the existing homography matrix
+        scaling = np.diag([2., 2., 1.]).astype(np.float32)
+        self.packed_inputs['data_samples'][0].set_metainfo(
+            dict(homography_matrix=scaling))
+        _, plain_data, data = self._preprocess(
+            [dict(type='BatchRandomFlip', prob=1., direction='vertical')])
+        np.testing.assert_allclose(
+            data['data_samples'][0].homography_matrix,
+            np.array([[1, 0, 0], [0, -1, 40], [0, 0, 1]]) @ scaling)
+
+        _, plain_data, data = self._preprocess(
+            [dict(type='BatchRandomFlip', prob=0.)])
+        torch.testing.assert_close(data['inputs'], plain_data['inputs'])
+
+    def test_random_crop(self):
+        processor, plain_data, data = self._preprocess([
+            dict(
+                type='BatchRandomCrop',
+                crop_size=(20, 30),
+                allow_negative_crop=True,
+                size_divisor=8)
+        ])
+        self.assertIsInstance(processor.batch_augments[0], BatchRandomCrop)
+        self._assert_homography_matrix(data, plain_data)
+        self.assertEqual(data['inputs'].shape[-2:], (32, 24))
+        for data_sample in data['data_samples']:
+            self.assertEqual(data_sample.img_shape, (30, 20))
+            self.assertEqual(data_sample.batch_input_shape, (32, 24))
+            gt_instances = data_sample.gt_instances
+            bboxes = gt_instances.bboxes
+            self.assertEqual(len(bboxes), len(gt_instances.labels))
+            self.assertEqual(len(bboxes), len(gt_instances.masks))
+            self.assertEqual(gt_instances.masks.masks.shape[1:], (32, 24))
+            self.assertTrue((bboxes[:, 0::2] <= 20).all())
+            self.assertTrue((bboxes[:, 1::2] <= 30).all())
+
+    def test_random_affine(self):
+        # the identity affine transform keeps the images and bboxes, the
+        # bbox filter is off by default as RandomAffine
+        self.packed_inputs = demo_mm_inputs(2, self.image_shapes)
+        identity = dict(
+            type='BatchRandomAffine',
+            max_rotate_degree=0.,
+            max_translate_ratio=0.,
+            scaling_ratio_range=(1., 1.),
+            max_shear_degree=0.)
+        processor, plain_data, data = self._preprocess([identity])
+        self.assertIsInstance(processor.batch_augments[0], BatchRandomAffine)
+        torch.testing.assert_close(
+            data['inputs'], plain_data['inputs'], atol=1e-3, rtol=1e-3)
+        for data_sample, plain_sample in zip(data['data_samples'],
+                                             plain_data['data_samples']):
+            h, w = data_sample.img_shape
+            plain_bboxes = plain_sample.gt_instances.bboxes
+            plain_bboxes[:, 0::2] = plain_bboxes[:, 0::2].clamp(0, w)
+            plain_bboxes[:, 1::2] = plain_bboxes[:, 1::2].clamp(0, h)
+            torch.testing.assert_close(data_sample.gt_instances.bboxes,
+                                       plain_bboxes)
+
+        # bboxes are clipped to the images
+        _, plain_data, data = self._preprocess(
+            [dict(type='BatchRandomAffine')])
+        self._assert_homography_matrix(data, plain_data)
+        for data_sample in data['data_samples']:
+            h, w = data_sample.img_shape
+            bboxes = data_sample.gt_instances.bboxes
+            self.assertTrue((bboxes[:, 0::2] <= w).all())
+            self.assertTrue((bboxes[:, 1::2] <= h).all())
+
+        # too small or too thin bboxes are removed by the bbox filter
+        affine = BatchRandomAffine(
+            max_rotate_degree=0.,
+            max_translate_ratio=0.,
+            scaling_ratio_range=(1., 1.),
+            max_shear_degree=0.,
+            min_bbox_size=2,
+            min_area_ratio=0.2,
+            max_aspect_ratio=20)
+        data_sample = DetDataSample(metainfo=dict(img_shape=(40, 50)))
+        data_sample.gt_instances = InstanceData(
+            bboxes=torch.tensor([[5., 5., 25., 25.], [5., 5., 6., 25.],
+                                 [0., 0., 45., 2.], [45., 5., 60., 25.],
+                                 [45., 10., 75., 20.]]),
+            labels=torch.arange(5))
+        _, data_samples = affine(torch.zeros(1, 3, 40, 50), [data_sample])
+        self.assertEqual(data_samples[0].gt_instances.labels.tolist(), [0, 3])
@@ -72,3 +72,69 @@ class TestGLIP(TestCase):
             #     batch_results = detector.forward(**data, mode='predict')
             #     self.assertEqual(len(batch_results), 2)
             #     self.assertIsInstance(batch_results[0], DetDataSample)
+
+
+class TestPromptCache(TestCase):
+
+    def test_get(self):
+        from mmdet.models.detectors.glip import PromptCache
+        cache = PromptCache(max_size=2)
+        calls = []
+
+        def compute(key):
+            calls.append(key)
+            return key * 2
+
+        self.assertEqual(cache.get('a', lambda: compute('a')), 'aa')
+        self.assertEqual(cache.get('b', lambda: compute('b')), 'bb')
+        # cached results are not computed again
+        self.assertEqual(cache.get('a', lambda: compute('a')), 'aa')
+        self.assertEqual(calls, ['a', 'b'])
+        # the least recently used result is evicted
+        cache.get('c', lambda: compute('c'))
+        self.assertEqual(len(cache), 2)
+        cache.get('a', lambda: compute('a'))
+        cache.get('b', lambda: compute('b'))
+        self.assertEqual(calls, ['a', 'b', 'c', 'b'])
+
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+        # the cache is disabled if the max size is 0
+        cache = PromptCache(max_size=0)
+        cache.get('a', lambda: compute('a'))
+        self.assertEqual(len(cache), 0)
+
+    def test_chunked_text_feats(self):
+        from torch import nn
+
+        from mmdet.models.detectors.glip import GLIP, PromptCache
+
+        class LanguageModel(nn.Module):
+
+            def __init__(self):
+                super().__init__()
+                self.calls = []
+
+            def forward(self, text_prompts):
+                self.calls.extend(text_prompts)
+                return dict(embedded=torch.rand(len(text_prompts), 4, 8))
+
+        # only the text feature caching of GLIP is built
+        detector = GLIP.__new__(GLIP)
+        nn.Module.__init__(detector)
+        detector.language_model = LanguageModel()
+        detector._prompt_cache = PromptCache(max_size=2)
+        detector.eval()
+
+        # the chunks of a prompt are cached together, even if there are more
+        # chunks than the cache size
+        chunked_feats = detector.get_cached_chunked_text_feats(['a', 'b', 'c'])
+        self.assertEqual(len(chunked_feats), 3)
+        cached_feats = detector.get_cached_chunked_text_feats(['a', 'b', 'c'])
+        self.assertEqual(detector.language_model.calls, ['a', 'b', 'c'])
+        for feats, cached in zip(chunked_feats, cached_feats):
+            self.assertIs(feats['embedded'], cached['embedded'])
+
+        # the cache is cleared when the model is moved or cast
+        detector.float()
+        self.assertEqual(len(detector._prompt_cache), 0)
@@ -0,0 +1,44 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+from unittest import TestCase
+
+import torch
+from mmengine.structures import InstanceData
+
+from mmdet.models.detectors.grounding_dino import merge_chunk_results
+
+
+class TestGroundingDINO(TestCase):
+
+    def test_merge_chunk_results(self):
+
+        def make_results(labels):
+            return InstanceData(
+                bboxes=torch.rand(len(labels), 4),
+                scores=torch.rand(len(labels)),
+                labels=torch.tensor(labels, dtype=torch.long))
+
+        # image 0 has 3 chunks and image 1 has 2 chunks, the chunks of the
+        # two images are interleaved
+        chunk_results = [
+            make_results([0, 2]),
+            make_results([1]),
+            make_results([]),
+            make_results([0]),
+            make_results([3, 0]),
+        ]
+        chunk_img_inds = [0, 1, 0, 1, 0]
+        chunk_num_entities = [3, 2, 4, 5, 4]
+        bboxes = [results.bboxes for results in chunk_results]
+
+        results_list = merge_chunk_results(chunk_results, chunk_img_inds,
+                                           chunk_num_entities, 2)
+        self.assertEqual(len(results_list), 2)
+        # the labels are offset by the entities of the previous chunks
+        self.assertEqual(results_list[0].labels.tolist(), [0, 2, 10, 7])
+        self.assertEqual(results_list[1].labels.tolist(), [1, 2])
+        self.assertTrue(
+            torch.equal(results_list[0].bboxes,
+                        torch.cat([bboxes[0], bboxes[2], bboxes[4]])))
+        self.assertTrue(
+            torch.equal(results_list[1].bboxes,
+                        torch.cat([bboxes[1], bboxes[3]])))
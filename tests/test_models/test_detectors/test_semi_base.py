@@ -1,10 +1,17 @@
 # Copyright (c) OpenMMLab. All rights reserved.
+import copy
 from unittest import TestCase
+from unittest.mock import patch
 
+import numpy as np
+import torch
 from mmengine.registry import MODELS
+from mmengine.structures import InstanceData
 from parameterized import parameterized
 
-from mmdet.testing import get_detector_cfg
+from mmdet.models.detectors import SoftTeacher
+from mmdet.structures.bbox import bbox_project
+from mmdet.testing import demo_mm_inputs, get_detector_cfg
 from mmdet.utils import register_all_modules
 
 register_all_modules()
@@ -32,3 +39,118 @@ class TestSemiBase(TestCase):
         self.assertTrue(model.student.neck)
         self.assertTrue(model.student.rpn_head)
         self.assertTrue(model.student.roi_head)
+
+    @staticmethod
+    def _build_soft_teacher():
+        model = get_detector_cfg(
+            'soft_teacher/'
+            'soft-teacher_faster-rcnn_r50-caffe_fpn_180k_semi-0.1-coco.py')
+        model.detector.backbone.depth = 18
+        model.detector.neck.in_channels = [64, 128, 256, 512]
+        model.detector.backbone.init_cfg = None
+        return MODELS.build(model)
+
+    def test_project_pseudo_instances(self):
+        model = self._build_soft_teacher()
+
+        rng = np.random.RandomState(0)
+        batch_pseudo_instances = demo_mm_inputs(
+            batch_size=3, num_items=[4, 0, 6])['data_samples']
+        batch_data_samples = demo_mm_inputs(
+            batch_size=3,
+            image_shapes=[(3, 96, 128), (3, 128, 128),
+                          (3, 64, 80)])['data_samples']
+        for data_samples in batch_data_samples:
+            homography_matrix = np.eye(3, dtype=np.float32)
+            homography_matrix[:2] += rng.uniform(-0.5, 0.5, (2, 3)).astype(
+                np.float32) * [[1, 1, 40]]
+            data_samples.set_metainfo(
+                dict(homography_matrix=homography_matrix))
+
+        projected = model.project_pseudo_instances(
+            batch_pseudo_instances, copy.deepcopy(batch_data_samples))
+        for pseudo_instances, data_samples, projected_samples in zip(
+                batch_pseudo_instances, batch_data_samples, projected):
+            bboxes = bbox_project(
+                pseudo_instances.gt_instances.bboxes,
+                torch.from_numpy(data_samples.homography_matrix),
+                data_samples.img_shape)
+            w = bboxes[:, 2] - bboxes[:, 0]
+            h = bboxes[:, 3] - bboxes[:, 1]
+            keep = (w > 1e-2) & (h > 1e-2)
+            self.assertTrue(
+                torch.allclose(
+                    projected_samples.gt_instances.bboxes,
+                    bboxes[keep],
+                    atol=1e-3))
+            self.assertTrue(
+                torch.equal(projected_samples.gt_instances.labels,
+                            pseudo_instances.gt_instances.labels[keep]))
+
+        # the pseudo instances are kept with a single image
+        pseudo_bboxes = batch_pseudo_instances[0].gt_instances.bboxes.clone()
+        projected = model.project_pseudo_instances(
+            batch_pseudo_instances[:1], copy.deepcopy(batch_data_samples[:1]))
+        self.assertTrue(
+            torch.equal(batch_pseudo_instances[0].gt_instances.bboxes,
+                        pseudo_bboxes))
+        self.assertIsNot(projected[0].gt_instances,
+                         batch_pseudo_instances[0].gt_instances)
+
+    def test_compute_uncertainty_with_aug(self):
+        model = self._build_soft_teacher()
+        model.eval()
+        batch_data_samples = demo_mm_inputs(
+            batch_size=3,
+            image_shapes=[(3, 96, 128), (3, 128, 128), (3, 64, 80)],
+            num_items=[4, 0, 6],
+            num_classes=80)['data_samples']
+        jitter_times = model.semi_train_cfg.jitter_times
+        jitter_scale = model.semi_train_cfg.jitter_scale
+
+        # the jitter of each image is the same as jittering it alone
+        torch.manual_seed(0)
+        auged_bboxes = model.aug_box(batch_data_samples, jitter_times,
+                                     jitter_scale)
+        torch.manual_seed(0)
+        offsets = torch.randn(jitter_times, 10, 4).split([4, 0, 6], dim=1)
+        for auged, offset, data_samples in zip(auged_bboxes, offsets,
+                                               batch_data_samples):
+            bboxes = data_samples.gt_instances.bboxes
+            box_scale = (bboxes[:, 2:4] - bboxes[:, :2]).clamp(min=1)
+            aug_scale = box_scale.repeat(1, 2) * jitter_scale
+            self.assertEqual(auged.shape, (jitter_times, len(bboxes), 4))
+            self.assertTrue(
+                torch.allclose(auged, bboxes + offset * aug_scale))
+
+        # the uncertainties match the per-image prediction of the jittered
+        # bboxes, and an image without pseudo bboxes gets an empty one
+        with torch.no_grad():
+            x = model.teacher.extract_feat(torch.rand(3, 3, 128, 128))
+            with patch.object(
+                    SoftTeacher, 'aug_box', return_value=auged_bboxes):
+                reg_uncs_list = model.compute_uncertainty_with_aug(
+                    x, batch_data_samples)
+            model.teacher.roi_head.test_cfg = None
+            results_list = model.teacher.roi_head.predict(
+                x, [
+                    InstanceData(bboxes=auged.reshape(-1, 4))
+                    for auged in auged_bboxes
+                ],
+                batch_data_samples,
+                rescale=False)
+        self.assertEqual(reg_uncs_list[1].shape, (0, ))
+        for reg_uncs, results, data_samples in zip(reg_uncs_list,
+                                                   results_list,
+                                                   batch_data_samples):
+            labels = data_samples.gt_instances.labels
+            if len(labels) == 0:
+                continue
+            bboxes = results.bboxes.reshape(jitter_times, len(labels), -1, 4)
+            bboxes = bboxes[:, torch.arange(len(labels)), labels]
+            box_unc = bboxes.std(dim=0)
+            wh = (bboxes.mean(dim=0)[:, 2:4] -
+                  bboxes.mean(dim=0)[:, :2]).clamp(min=1.0)
+            box_unc = (box_unc / wh.repeat(1, 2)).mean(dim=-1)
+            self.assertEqual(reg_uncs.shape, (len(labels), ))
+            self.assertTrue(torch.allclose(reg_uncs, box_unc, atol=1e-5))
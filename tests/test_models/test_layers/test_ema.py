@@ -7,7 +7,7 @@ import torch
 import torch.nn as nn
 from mmengine.testing import assert_allclose
 
-from mmdet.models.layers import ExpMomentumEMA
+from mmdet.models.layers import ExpMomentumEMA, fused_ema_update
 
 
 class TestEMA(TestCase):
@@ -92,3 +92,40 @@ class TestEMA(TestCase):
         ]
         for p_target, p_ema in zip(averaged_params, ema_params):
             assert_allclose(p_target, p_ema)
+
+    def test_exp_momentum_ema_interval(self):
+        model = nn.Sequential(nn.Conv2d(1, 5, kernel_size=3), nn.Linear(5, 10))
+        momentum = 0.1
+        gamma = 4
+        interval = 3
+        for compensate_momentum in (False, True):
+            ema_model = ExpMomentumEMA(
+                model,
+                momentum=momentum,
+                gamma=gamma,
+                interval=interval,
+                compensate_momentum=compensate_momentum)
+            averaged_params = [param.clone() for param in model.parameters()]
+            for i in range(7):
+                for p, p_avg in zip(model.parameters(), averaged_params):
+                    p.detach().add_(torch.randn_like(p))
+                    if i > 0 and i % interval == 0:
+                        m = (1 - momentum) * math.exp(
+                            -(1 + i) / gamma) + momentum
+                        if compensate_momentum:
+                            m = 1 - (1 - m)**interval
+                        p_avg.mul_(1 - m).add_(p.detach() * m)
+                    elif i == 0:
+                        p_avg.copy_(p.detach())
+                ema_model.update_parameters(model)
+            for p_target, p_ema in zip(averaged_params,
+                                       ema_model.module.parameters()):
+                assert_allclose(p_target, p_ema)
+
+    def test_fused_ema_update(self):
+        averaged = [torch.rand(3, 4), torch.rand(5).double(), torch.rand(2)]
+        source = [torch.rand(3, 4), torch.rand(5).double(), torch.rand(2)]
+        expected = [a * 0.7 + s * 0.3 for a, s in zip(averaged, source)]
+        fused_ema_update(averaged, source, 0.3)
+        for a, e in zip(averaged, expected):
+            assert_allclose(a, e)
@@ -37,3 +37,59 @@ def test_learned_positional_encoding(num_feats=16,
     mask = torch.rand(batch_size, h, w) > 0.5
     out = module(mask)
     assert out.shape == (batch_size, num_feats * 2, h, w)
+
+
+def test_sine_positional_encoding_cache(num_feats=16, batch_size=2):
+    module = SinePositionalEncoding(num_feats, normalize=True)
+    cached_module = SinePositionalEncoding(
+        num_feats, normalize=True, cache_size=2)
+    h, w = 10, 6
+    mask = torch.ones(batch_size, h, w, dtype=torch.bool)
+    mask[0, :8, :5] = False
+    mask[1, :10, :3] = False
+    mask_out = cached_module(mask)
+    assert torch.equal(mask_out, module(mask))
+    assert len(cached_module._cache) == 1
+    assert cached_module(mask.clone()) is mask_out
+
+    # the valid regions which are not top-left rectangles are not cached
+    irregular_mask = torch.rand(batch_size, h, w) > 0.5
+    assert torch.equal(cached_module(irregular_mask), module(irregular_mask))
+    assert len(cached_module._cache) == 1
+
+    # the all-valid input shares the cache with the all-valid mask
+    feat = torch.rand(batch_size, 8, h, w)
+    out = cached_module(None, input=feat)
+    assert torch.equal(out, module(None, input=feat))
+    assert cached_module(torch.zeros(batch_size, h, w,
+                                     dtype=torch.bool)) is out
+    assert len(cached_module._cache) == 2
+
+    # the least recently used embedding is evicted
+    cached_module(torch.zeros(batch_size, 4, 4, dtype=torch.bool))
+    assert len(cached_module._cache) == 2
+    assert cached_module(None, input=feat) is out
+    assert cached_module(mask) is not mask_out
+
+
+def test_learned_positional_encoding_cache(num_feats=16, batch_size=2):
+    module = LearnedPositionalEncoding(num_feats, 10, 10, cache_size=2)
+    mask = torch.rand(batch_size, 10, 6) > 0.5
+    # no cache in training mode
+    module(mask)
+    assert len(module._cache) == 0
+
+    module.eval()
+    with torch.no_grad():
+        out = module(mask)
+        assert module(mask) is out
+    # no cache with gradients
+    assert module(mask) is not out
+
+    # the cache is cleared with new weights
+    state_dict = module.state_dict()
+    state_dict['row_embed.weight'] = torch.rand(10, num_feats)
+    module.load_state_dict(state_dict)
+    assert len(module._cache) == 0
+    with torch.no_grad():
+        assert not torch.equal(module(mask), out)
@@ -1,13 +1,12 @@
 # Copyright (c) OpenMMLab. All rights reserved.
 import pytest
 import torch
+from mmcv.cnn.bricks.transformer import MultiheadAttention
 from mmengine.config import ConfigDict
 
-from mmdet.models.layers.transformer import (AdaptivePadding,
-                                             DDQTransformerDecoder,
-                                             DetrTransformerDecoder,
-                                             DetrTransformerEncoder,
-                                             PatchEmbed, PatchMerging)
+from mmdet.models.layers.transformer import (
+    AdaptivePadding, DDQTransformerDecoder, DetrTransformerDecoder,
+    DetrTransformerEncoder, PatchEmbed, PatchMerging, SDPAMultiheadAttention)
 
 
 def test_adaptive_padding():
@@ -505,6 +504,73 @@ def test_detr_transformer_encoder_decoder():
     assert DetrTransformerEncoder(**config)
 
 
+@pytest.mark.parametrize('batch_first', [True, False])
+def test_sdpa_multihead_attention(batch_first):
+    attn = MultiheadAttention(32, 4, batch_first=batch_first).eval()
+    sdpa_attn = SDPAMultiheadAttention(32, 4, batch_first=batch_first).eval()
+    sdpa_attn.load_state_dict(attn.state_dict())
+
+    bs, num_queries, num_keys = 2, 7, 11
+    query = torch.rand(bs, num_queries, 32)
+    key = torch.rand(bs, num_keys, 32)
+    key_pos = torch.rand(bs, num_keys, 32)
+    if not batch_first:
+        query, key, key_pos = (
+            x.transpose(0, 1) for x in (query, key, key_pos))
+    attn_mask = torch.rand(num_queries, num_keys) > 0.5
+    attn_mask[:, 0] = False
+    key_padding_mask = torch.zeros(bs, num_keys, dtype=torch.bool)
+    key_padding_mask[0, -4:] = True
+    for masks in (dict(), dict(attn_mask=attn_mask),
+                  dict(key_padding_mask=key_padding_mask),
+                  dict(
+                      attn_mask=torch.rand(num_queries, num_keys),
+                      key_padding_mask=key_padding_mask),
+                  dict(
+                      attn_mask=attn_mask.repeat(bs * 4, 1, 1),
+                      key_padding_mask=key_padding_mask)):
+        out = sdpa_attn(query, key, key_pos=key_pos, **masks)
+        assert torch.allclose(
+            out, attn(query, key, key_pos=key_pos, **masks), atol=1e-5)
+
+
+def test_detr_transformer_decoder_attn_backend():
+    layer_cfg = dict(
+        self_attn_cfg=dict(embed_dims=32, num_heads=4),
+        cross_attn_cfg=dict(embed_dims=32, num_heads=4),
+        ffn_cfg=dict(embed_dims=32, feedforward_channels=64))
+    decoder = DetrTransformerDecoder(num_layers=2, layer_cfg=layer_cfg)
+    layer_cfg['self_attn_cfg']['attn_backend'] = 'sdpa'
+    layer_cfg['cross_attn_cfg']['attn_backend'] = 'sdpa'
+    sdpa_decoder = DetrTransformerDecoder(num_layers=2, layer_cfg=layer_cfg)
+    assert isinstance(sdpa_decoder.layers[0].self_attn, SDPAMultiheadAttention)
+    assert isinstance(sdpa_decoder.layers[0].cross_attn,
+                      SDPAMultiheadAttention)
+    sdpa_decoder.load_state_dict(decoder.state_dict())
+    decoder.eval()
+    sdpa_decoder.eval()
+
+    bs, num_queries, num_keys = 2, 10, 20
+    inputs = dict(
+        query=torch.rand(bs, num_queries, 32),
+        key=torch.rand(bs, num_keys, 32),
+        value=torch.rand(bs, num_keys, 32),
+        query_pos=torch.rand(bs, num_queries, 32),
+        key_pos=torch.rand(bs, num_keys, 32),
+        key_padding_mask=torch.arange(num_keys).expand(bs, -1) >= 15)
+    # the denoising queries are not seen by the matching queries as DINO
+    self_attn_mask = torch.zeros(num_queries, num_queries, dtype=torch.bool)
+    self_attn_mask[4:, :4] = True
+    assert torch.allclose(
+        sdpa_decoder(**inputs, self_attn_mask=self_attn_mask),
+        decoder(**inputs, self_attn_mask=self_attn_mask),
+        atol=1e-5)
+
+    with pytest.raises(AssertionError):
+        layer_cfg['self_attn_cfg']['attn_backend'] = 'flash'
+        DetrTransformerDecoder(num_layers=1, layer_cfg=layer_cfg)
+
+
 def test_ddq_transformer_decoder():
     num_layers = 2
     config = ConfigDict(
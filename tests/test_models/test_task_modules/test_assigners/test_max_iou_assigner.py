@@ -160,3 +160,45 @@ def test_max_iou_assigner_with_empty_priors_and_gt():
     gt_instances = InstanceData(bboxes=gt_bboxes, labels=gt_labels)
     assign_result = self.assign(pred_instances, gt_instances)
     assert len(assign_result.gt_inds) == 0
+
+
+@pytest.mark.parametrize('gt_max_assign_all', [True, False])
+@pytest.mark.parametrize('ignore_wrt_candidates', [True, False])
+def test_max_iou_assigner_chunked(gt_max_assign_all, ignore_wrt_candidates):
+    """Test the chunked overlaps give the same assignment."""
+    cfg = dict(
+        pos_iou_thr=0.5,
+        neg_iou_thr=(0.1, 0.4),
+        min_pos_iou=0.1,
+        gt_max_assign_all=gt_max_assign_all,
+        ignore_iof_thr=0.5,
+        ignore_wrt_candidates=ignore_wrt_candidates)
+    self = MaxIoUAssigner(**cfg)
+    chunked_self = MaxIoUAssigner(overlaps_chunk_numel=64, **cfg)
+
+    torch.manual_seed(0)
+    xy = torch.randint(0, 50, (100, 2)).float()
+    wh = torch.randint(1, 30, (100, 2)).float()
+    priors = torch.cat([xy, xy + wh], dim=1)
+    # repeated gts make ties of the max overlaps among the priors
+    gt_bboxes = torch.cat([priors[:20:2], priors[:10:2] + 1], dim=0)
+    gt_labels = torch.randint(0, 3, (len(gt_bboxes), ))
+
+    pred_instances = InstanceData(priors=priors)
+    gt_instances = InstanceData(bboxes=gt_bboxes, labels=gt_labels)
+    gt_instances_ignore = InstanceData(bboxes=torch.Tensor([[30, 30, 60, 60]]))
+    assign_result = self.assign(
+        pred_instances, gt_instances, gt_instances_ignore=gt_instances_ignore)
+    chunked_assign_result = chunked_self.assign(
+        pred_instances, gt_instances, gt_instances_ignore=gt_instances_ignore)
+
+    assert torch.equal(assign_result.gt_inds, chunked_assign_result.gt_inds)
+    assert torch.equal(assign_result.labels, chunked_assign_result.labels)
+    assert torch.allclose(assign_result.max_overlaps,
+                          chunked_assign_result.max_overlaps)
+
+    # empty gts
+    gt_instances = InstanceData(
+        bboxes=torch.empty(0, 4), labels=torch.empty(0).long())
+    chunked_assign_result = chunked_self.assign(pred_instances, gt_instances)
+    assert torch.all(chunked_assign_result.gt_inds == 0)
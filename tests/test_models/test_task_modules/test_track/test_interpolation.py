@@ -37,3 +37,26 @@ class TestInterpolateTracklets(TestCase):
         linked_track = interpolation.forward(pred_track)
         assert isinstance(linked_track, np.ndarray)
         assert linked_track.shape == (5, 7)
+
+    def test_interpolate(self):
+        pred_track = np.random.rand(9, 7)
+        pred_track[:, 0] = np.array([1, 2, 5, 6, 7, 1, 2, 3, 4])
+        pred_track[:, 1] = np.array([1, 1, 1, 1, 1, 2, 2, 2, 2])
+        # the rows of a track are disordered with other tracks
+        pred_track = pred_track[[0, 5, 1, 6, 7, 2, 8, 3, 4]]
+
+        cfg = dict(self.cfg, min_num_frames=3, use_gsi=False)
+        interpolation = TASK_UTILS.build(cfg)
+        linked_track = interpolation.forward(pred_track)
+        assert linked_track.shape == (11, 7)
+        assert (np.diff(linked_track[:, 0]) >= 0).all()
+
+        track = linked_track[linked_track[:, 1] == 1]
+        track = track[track[:, 0].argsort()]
+        assert track[:, 0].tolist() == [1, 2, 3, 4, 5, 6, 7]
+        left_bbox, right_bbox = track[1, 2:6], track[4, 2:6]
+        np.testing.assert_allclose(track[2, 2:6],
+                                   left_bbox + (right_bbox - left_bbox) / 3)
+        np.testing.assert_allclose(
+            track[3, 2:6], left_bbox + (right_bbox - left_bbox) * 2 / 3)
+        assert (track[2:4, 6] == 1).all()
@@ -1,6 +1,7 @@
 from unittest import TestCase
 
 import numpy as np
+import torch
 from mmengine.registry import init_default_scope
 
 from mmdet.registry import TASK_UTILS
@@ -35,3 +36,60 @@ class TestKalmanFilter(TestCase):
         mean, covariance = self.kf.update(mean, covariance, measurement, score)
         assert len(mean) == 8
         assert covariance.shape == (8, 8)
+
+    def _random_states(self, num_tracks):
+        measurements = np.random.rand(num_tracks, 4) * 100 + 1
+        states = [self.kf.initiate(m) for m in measurements]
+        mean = np.stack([s[0] for s in states])
+        covariance = np.stack([s[1] for s in states])
+        return measurements, mean, covariance
+
+    def test_multi_initiate(self):
+        measurements, mean, covariance = self._random_states(5)
+        multi_mean, multi_covariance = self.kf.multi_initiate(measurements)
+        np.testing.assert_allclose(multi_mean, mean)
+        np.testing.assert_allclose(multi_covariance, covariance)
+
+    def test_multi_predict_and_update(self):
+        measurements, mean, covariance = self._random_states(5)
+        multi_mean, multi_covariance = self.kf.multi_predict(mean, covariance)
+        assert multi_mean.shape == (5, 8)
+        assert multi_covariance.shape == (5, 8, 8)
+        for i in range(5):
+            single_mean, single_covariance = self.kf.predict(
+                mean[i], covariance[i])
+            np.testing.assert_allclose(multi_mean[i], single_mean)
+            np.testing.assert_allclose(multi_covariance[i], single_covariance)
+
+        measurements = measurements + np.random.rand(5, 4)
+        scores = np.random.rand(5)
+        updated_mean, updated_covariance = self.kf.multi_update(
+            multi_mean, multi_covariance, measurements, scores)
+        for i in range(5):
+            single_mean, single_covariance = self.kf.update(
+                multi_mean[i], multi_covariance[i], measurements[i], scores[i])
+            np.testing.assert_allclose(updated_mean[i], single_mean)
+            np.testing.assert_allclose(
+                updated_covariance[i], single_covariance, atol=1e-8)
+
+    def test_multi_gating_distance(self):
+        measurements, mean, covariance = self._random_states(5)
+        dists = self.kf.multi_gating_distance(mean, covariance,
+                                              measurements[:3])
+        assert dists.shape == (5, 3)
+        for i in range(5):
+            np.testing.assert_allclose(
+                dists[i],
+                self.kf.gating_distance(mean[i], covariance[i],
+                                        measurements[:3]))
+
+    def test_track(self):
+        measurements, mean, covariance = self._random_states(5)
+        pred_mean, pred_covariance, costs = self.kf.track(
+            mean, covariance, torch.from_numpy(measurements[:3]))
+        multi_mean, multi_covariance = self.kf.multi_predict(mean, covariance)
+        np.testing.assert_allclose(pred_mean, multi_mean)
+        np.testing.assert_allclose(pred_covariance, multi_covariance)
+        assert costs.shape == (5, 3)
+        # the distances over the gating threshold are ignored
+        assert np.isnan(costs[~(costs <= self.kf.gating_threshold)]).all()
@@ -0,0 +1,88 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+from unittest import TestCase
+
+import numpy as np
+import torch
+
+from mmdet.models.trackers.base_tracker import BaseTracker
+
+
+class DummyTracker(BaseTracker):
+
+    def track(self, *args, **kwargs):
+        pass
+
+
+class TestBaseTracker(TestCase):
+
+    def test_update(self):
+        tracker = DummyTracker(num_frames_retain=3)
+        bboxes = [torch.rand(4, 4) for _ in range(5)]
+        for frame_id in range(5):
+            ids = torch.arange(4) if frame_id < 4 else torch.arange(2)
+            tracker.update(
+                ids=ids,
+                bboxes=bboxes[frame_id][:len(ids)],
+                embeds=torch.full((len(ids), 2), float(frame_id)),
+                frame_ids=frame_id)
+        assert tracker.ids == [0, 1, 2, 3]
+
+        # the history of a track is bounded by num_frames_retain
+        assert len(tracker.tracks[0].bboxes) == 3
+        assert torch.equal(tracker.tracks[0].bboxes[-1], bboxes[4][:1])
+        assert torch.equal(tracker.tracks[2].bboxes[-1], bboxes[3][2:3])
+        assert [int(x) for x in tracker.tracks[0].frame_ids] == [2, 3, 4]
+
+        memo = tracker.memo
+        assert memo.ids.tolist() == [0, 1, 2, 3]
+        assert memo.frame_ids.tolist() == [4, 4, 3, 3]
+        assert memo.bboxes.shape == (4, 4)
+
+        embeds = tracker.get('embeds', [0, 2], num_samples=2, behavior='mean')
+        assert embeds.tolist() == [[3.5, 3.5], [2.5, 2.5]]
+        embeds = tracker.get('embeds', [0, 1], num_samples=2)
+        assert embeds.shape == (2, 2, 2)
+
+        # the tracks disappeared more than num_frames_retain are popped
+        for frame_id in range(5, 7):
+            tracker.update(
+                ids=torch.arange(1),
+                bboxes=torch.rand(1, 4),
+                embeds=torch.rand(1, 2),
+                frame_ids=frame_id)
+        assert tracker.ids == [0, 1]
+        assert tracker.memo.ids.tolist() == [0, 1]
+
+    def test_momentums(self):
+        tracker = DummyTracker(momentums=dict(embeds=0.5))
+        for frame_id in range(2):
+            tracker.update(
+                ids=torch.arange(2),
+                embeds=torch.full((2, 2), float(frame_id)),
+                frame_ids=frame_id)
+        assert tracker.get('embeds').tolist() == [[0.5, 0.5], [0.5, 0.5]]
+        assert 'embeds' not in tracker.tracks[0]
+
+    def test_states(self):
+        tracker = DummyTracker(num_frames_retain=1)
+        tracker.update(
+            ids=torch.arange(3), bboxes=torch.rand(3, 4), frame_ids=0)
+        tracker.set_states('mean', np.arange(6.).reshape(3, 2))
+        tracker.set_states('covariance', np.ones((1, 2, 2)), [1])
+        np.testing.assert_array_equal(
+            tracker.get_states('mean', [2, 0]), [[4., 5.], [0., 1.]])
+        # the buffer of a new state is created with zeros
+        covariance = np.zeros((3, 2, 2))
+        covariance[1] = 1
+        np.testing.assert_array_equal(
+            tracker.get_states('covariance'), covariance)
+
+        # the rows of the new tracks are appended and the rows of the popped
+        # tracks are removed
+        tracker.update(
+            ids=torch.tensor([1, 3]), bboxes=torch.rand(2, 4), frame_ids=1)
+        assert tracker.ids == [1, 3]
+        np.testing.assert_array_equal(
+            tracker.get_states('mean'), [[2., 3.], [0., 0.]])
+        np.testing.assert_array_equal(
+            tracker.get_states('covariance', [1]), np.ones((1, 2, 2)))
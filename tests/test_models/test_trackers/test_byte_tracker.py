@@ -63,3 +63,25 @@ class TestByteTracker(TestCase):
 
                 assert bboxes.shape[1] == 4
                 assert bboxes.shape[0] == labels.shape[0]
+
+    def test_confirm_with_short_history(self):
+        # a track is confirmed after num_tentatives hits even if fewer
+        # frames are retained in its history
+        tracker = MODELS.build(
+            dict(
+                type='ByteTracker',
+                motion=dict(type='KalmanFilter'),
+                num_tentatives=3,
+                num_frames_retain=2))
+        tracker.kf = TASK_UTILS.build(dict(type='KalmanFilter'))
+        bboxes = torch.tensor([[10., 10., 50., 60.]])
+        for frame_id in range(1, 4):
+            tracker.update(
+                ids=torch.tensor([0]),
+                bboxes=bboxes,
+                scores=torch.ones(1),
+                labels=torch.zeros(1),
+                frame_ids=frame_id)
+            assert tracker.num_hits(0) == frame_id
+            assert len(tracker.tracks[0].bboxes) == min(frame_id, 2)
+            assert tracker.tracks[0].tentative == (frame_id < 3)
@@ -1,8 +1,10 @@
 # Copyright (c) OpenMMLab. All rights reserved.
+import copy
 from unittest import TestCase
 
 import torch
 from mmengine import ConfigDict
+from mmengine.structures import InstanceData
 
 from mmdet.models import DetTTAModel
 from mmdet.registry import MODELS
@@ -46,3 +48,106 @@ class TestDetTTAModel(TestCase):
             ])
 
         model.test_step(dict(inputs=imgs, data_samples=data_samples))
+
+    def test_batch_augs(self):
+        detector_cfg = get_detector_cfg(
+            'retinanet/retinanet_r18_fpn_1x_coco.py')
+        detector_cfg.test_cfg.score_thr = 0.
+        cfg = ConfigDict(
+            type='DetTTAModel',
+            module=detector_cfg,
+            tta_cfg=dict(
+                nms=dict(type='nms', iou_threshold=0.5), max_per_img=100))
+        model: DetTTAModel = MODELS.build(cfg)
+        model.eval()
+
+        # 2 images with 3 views each, all the views have the same shape so
+        # that they are not padded differently in a single pass
+        torch.manual_seed(0)
+        imgs = [torch.rand(3, 64, 96) * 255 for _ in range(2)]
+        inputs, data_samples = [], []
+        for flip, direction in ((False, None), (True, 'horizontal'),
+                                (True, 'vertical')):
+            inputs.append([
+                img.flip(-1) if direction == 'horizontal' else
+                img.flip(-2) if direction == 'vertical' else img
+                for img in imgs
+            ])
+            data_samples.append([
+                DetDataSample(
+                    metainfo=dict(
+                        ori_shape=(64, 96),
+                        img_shape=(64, 96),
+                        scale_factor=(1., 1.),
+                        flip=flip,
+                        flip_direction=direction)) for _ in imgs
+            ])
+
+        with torch.no_grad():
+            results = model.test_step(
+                dict(inputs=inputs, data_samples=copy.deepcopy(data_samples)))
+            # forward all the views in a single pass
+            model.batch_augs = True
+            batch_results = model.test_step(
+                dict(inputs=inputs, data_samples=copy.deepcopy(data_samples)))
+        assert len(batch_results) == len(results) == 2
+        for result, batch_result in zip(results, batch_results):
+            pred_instances = result.pred_instances
+            batch_pred_instances = batch_result.pred_instances
+            assert len(pred_instances) > 0
+            assert torch.allclose(
+                batch_pred_instances.bboxes, pred_instances.bboxes, atol=1e-4)
+            assert torch.allclose(
+                batch_pred_instances.scores, pred_instances.scores, atol=1e-5)
+            assert torch.equal(batch_pred_instances.labels,
+                               pred_instances.labels)
+
+    def test_merge_preds(self):
+        model = DetTTAModel(
+            module=get_detector_cfg('retinanet/retinanet_r18_fpn_1x_coco.py'),
+            tta_cfg=ConfigDict(
+                nms=dict(type='nms', iou_threshold=0.5), max_per_img=100))
+
+        def make_sample(bboxes, flip, direction, labels=None):
+            data_sample = DetDataSample(
+                metainfo=dict(
+                    ori_shape=(100, 200), flip=flip, flip_direction=direction))
+            bboxes = torch.tensor(bboxes, dtype=torch.float32).view(-1, 4)
+            data_sample.pred_instances = InstanceData(
+                bboxes=bboxes,
+                scores=torch.linspace(0.9, 0.5, len(bboxes)),
+                labels=torch.zeros(len(bboxes), dtype=torch.long)
+                if labels is None else torch.tensor(labels))
+            return data_sample
+
+        data_samples_list = [
+            [
+                make_sample([[10, 20, 50, 60]], False, None),
+                # the horizontally flipped view of the same bbox
+                make_sample([[150, 20, 190, 60]], True, 'horizontal'),
+            ],
+            [
+                make_sample([[0, 0, 10, 10], [100, 50, 120, 90]], False, None,
+                            [0, 1]),
+                make_sample([[190, 90, 200, 100]], True, 'diagonal'),
+            ],
+            [make_sample([], False, None),
+             make_sample([], True, 'vertical')],
+        ]
+        results = model.merge_preds(data_samples_list)
+        assert len(results) == 3
+        # the bboxes of different images are not suppressed by each other
+        assert torch.allclose(results[0].pred_instances.bboxes,
+                              torch.tensor([[10., 20., 50., 60.]]))
+        assert torch.allclose(
+            results[1].pred_instances.bboxes,
+            torch.tensor([[0., 0., 10., 10.], [100., 50., 120., 90.]]))
+        assert results[1].pred_instances.labels.tolist() == [0, 1]
+        assert len(results[2].pred_instances) == 0
+
+        # fuse the views with weighted boxes fusion
+        model.tta_cfg = ConfigDict(wbf=dict(iou_thr=0.5), max_per_img=100)
+        results = model.merge_preds(data_samples_list)
+        assert len(results[0].pred_instances) == 1
+        assert len(results[1].pred_instances) == 2
+        assert len(results[2].pred_instances) == 0
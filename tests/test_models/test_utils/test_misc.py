@@ -1,12 +1,15 @@
 import copy
 
+import numpy as np
 import pytest
 import torch
 from mmengine.structures import InstanceData
 
 from mmdet.models.utils import (empty_instances, filter_gt_instances,
-                                rename_loss_dict, reweight_loss_dict,
+                                pack_gt_instances, rename_loss_dict,
+                                reweight_loss_dict, split_gt_instances,
                                 unpack_gt_instances)
+from mmdet.structures.mask import BitmapMasks
 from mmdet.testing import demo_mm_inputs
 
 
@@ -93,6 +96,92 @@ def test_filter_gt_instances():
     for filtered_inputs in filtered_packed_inputs:
         assert len(filtered_inputs.gt_instances) == 0
 
+    # filter by score and size at once
+    packed_inputs = demo_mm_inputs(
+        batch_size=3, num_items=[5, 0, 8])['data_samples']
+    score_thr, wh_thr = 0.5, (30, 30)
+    for inputs in packed_inputs:
+        inputs.gt_instances.scores = torch.rand(len(inputs.gt_instances))
+    filtered_packed_inputs = filter_gt_instances(
+        copy.deepcopy(packed_inputs), score_thr=score_thr, wh_thr=wh_thr)
+    for filtered_inputs, inputs in zip(filtered_packed_inputs, packed_inputs):
+        gt_instances = inputs.gt_instances
+        bboxes = gt_instances.bboxes
+        keep = (gt_instances.scores
+                > score_thr) & (bboxes[:, 2] - bboxes[:, 0] > wh_thr[0]) & (
+                    bboxes[:, 3] - bboxes[:, 1] > wh_thr[1])
+        assert torch.equal(filtered_inputs.gt_instances.bboxes, bboxes[keep])
+        assert torch.equal(filtered_inputs.gt_instances.scores,
+                           gt_instances.scores[keep])
+
+    # the masks of the images have different sizes
+    packed_inputs = demo_mm_inputs(
+        batch_size=2, num_items=[3, 4], with_mask=True)['data_samples']
+    for inputs, (h, w) in zip(packed_inputs, [(10, 12), (20, 8)]):
+        num = len(inputs.gt_instances)
+        inputs.gt_instances.scores = torch.rand(num)
+        inputs.gt_instances.masks = BitmapMasks(
+            np.random.randint(0, 2, (num, h, w), dtype=np.uint8), h, w)
+        inputs.gt_instances.tensor_masks = torch.rand(num, h, w)
+    filtered_packed_inputs = filter_gt_instances(
+        copy.deepcopy(packed_inputs), score_thr=0.5, wh_thr=(30, 30))
+    for filtered_inputs, inputs in zip(filtered_packed_inputs, packed_inputs):
+        gt_instances = inputs.gt_instances
+        bboxes = gt_instances.bboxes
+        keep = (gt_instances.scores
+                > 0.5) & (bboxes[:, 2] - bboxes[:, 0] > 30) & (
+                    bboxes[:, 3] - bboxes[:, 1] > 30)
+        filtered_instances = filtered_inputs.gt_instances
+        assert torch.equal(filtered_instances.bboxes, bboxes[keep])
+        np.testing.assert_array_equal(filtered_instances.masks.masks,
+                                      gt_instances.masks.masks[keep.numpy()])
+        assert torch.equal(filtered_instances.tensor_masks,
+                           gt_instances.tensor_masks[keep])
+
+
+def test_pack_split_gt_instances():
+    packed_inputs = demo_mm_inputs(
+        batch_size=3, num_items=[2, 0, 3])['data_samples']
+    packed_instances, batch_idx = pack_gt_instances(packed_inputs)
+    assert len(packed_instances) == 5
+    assert batch_idx.tolist() == [0, 0, 2, 2, 2]
+
+    split_packed_inputs = split_gt_instances(
+        copy.deepcopy(packed_inputs), packed_instances, batch_idx)
+    for split_inputs, inputs in zip(split_packed_inputs, packed_inputs):
+        assert torch.equal(split_inputs.gt_instances.bboxes,
+                           inputs.gt_instances.bboxes)
+        assert torch.equal(split_inputs.gt_instances.labels,
+                           inputs.gt_instances.labels)
+
+    # a single image is packed into new instances
+    packed_instances, batch_idx = pack_gt_instances(packed_inputs[:1])
+    assert packed_instances is not packed_inputs[0].gt_instances
+    assert packed_instances.bboxes.data_ptr() != \
+        packed_inputs[0].gt_instances.bboxes.data_ptr()
+    assert batch_idx.tolist() == [0, 0]
+
+    # only the given fields are packed, the other fields are kept by split
+    packed_inputs = demo_mm_inputs(
+        batch_size=2, num_items=[3, 4], with_mask=True)['data_samples']
+    for inputs, (h, w) in zip(packed_inputs, [(10, 12), (20, 8)]):
+        num = len(inputs.gt_instances)
+        inputs.gt_instances.masks = BitmapMasks(
+            np.zeros((num, h, w), dtype=np.uint8), h, w)
+    packed_instances, batch_idx = pack_gt_instances(
+        packed_inputs, fields=('bboxes', ))
+    assert list(packed_instances.keys()) == ['bboxes']
+    packed_instances.bboxes = packed_instances.bboxes + 1
+    batch_gt_instances = [inputs.gt_instances for inputs in packed_inputs]
+    split_packed_inputs = split_gt_instances(packed_inputs, packed_instances,
+                                             batch_idx)
+    for split_inputs, gt_instances in zip(split_packed_inputs,
+                                          batch_gt_instances):
+        assert split_inputs.gt_instances is not gt_instances
+        assert torch.equal(split_inputs.gt_instances.bboxes,
+                           gt_instances.bboxes + 1)
+        assert split_inputs.gt_instances.masks is gt_instances.masks
+
 
 def test_rename_loss_dict():
     prefix = 'sup_'
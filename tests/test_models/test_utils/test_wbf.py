@@ -0,0 +1,99 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+from unittest import TestCase
+
+import numpy as np
+import torch
+
+from mmdet.models.utils import (batched_weighted_boxes_fusion,
+                                weighted_boxes_fusion)
+from mmdet.models.utils.wbf import (cluster_boxes, find_matching_box_fast,
+                                    get_weighted_box, prefilter_boxes)
+
+
+def _reference_clusters(boxes, iou_thr, conf_type):
+    """Cluster boxes by comparing each box with all the fused boxes."""
+    new_boxes = []
+    weighted_boxes = np.empty((0, 8))
+    for box in boxes:
+        index, _ = find_matching_box_fast(weighted_boxes, box, iou_thr)
+        if index != -1:
+            new_boxes[index].append(box)
+            weighted_boxes[index] = get_weighted_box(new_boxes[index],
+                                                     conf_type)
+        else:
+            new_boxes.append([box.copy()])
+            weighted_boxes = np.vstack((weighted_boxes, box.copy()))
+    return weighted_boxes, new_boxes
+
+
+def _random_predictions(rng, num_models, num_boxes, num_classes):
+    bboxes_list, scores_list, labels_list = [], [], []
+    centers = rng.rand(max(num_boxes // 3, 1), 2) * 500
+    for _ in range(num_models):
+        xy = centers[rng.randint(0, len(centers), num_boxes)] + \
+            rng.randn(num_boxes, 2) * 3
+        wh = rng.rand(num_boxes, 2) * 40 + 10
+        bboxes_list.append(np.concatenate([xy, xy + wh], axis=1).tolist())
+        scores_list.append(rng.rand(num_boxes).tolist())
+        labels_list.append(rng.randint(0, num_classes, num_boxes).tolist())
+    return bboxes_list, scores_list, labels_list
+
+
+class TestWeightedBoxesFusion(TestCase):
+
+    def test_weighted_boxes_fusion(self):
+        bboxes_list = [[[0, 0, 10, 10], [20, 20, 30, 30]], [[1, 1, 11, 11]]]
+        scores_list = [[0.9, 0.5], [0.7]]
+        labels_list = [[0, 1], [0]]
+        bboxes, scores, labels = weighted_boxes_fusion(
+            bboxes_list, scores_list, labels_list, iou_thr=0.5)
+        self.assertEqual(bboxes.shape, (2, 4))
+        # the boxes of label 0 are fused, weighted by their scores
+        expected = (0.9 * torch.tensor([0., 0, 10, 10]) +
+                    0.7 * torch.tensor([1., 1, 11, 11])) / 1.6
+        self.assertTrue(torch.allclose(bboxes[0], expected))
+        self.assertTrue(torch.allclose(scores, torch.tensor([0.8, 0.25])))
+        self.assertEqual(labels.tolist(), [0, 1])
+
+        # empty predictions
+        bboxes, scores, labels = weighted_boxes_fusion([[]], [[]], [[]])
+        self.assertEqual(len(bboxes), 0)
+
+    def test_cluster_boxes(self):
+        rng = np.random.RandomState(0)
+        bboxes_list, scores_list, labels_list = _random_predictions(
+            rng, 4, 300, 3)
+        filtered_boxes = prefilter_boxes(bboxes_list, scores_list, labels_list,
+                                         np.ones(4), 0.1)
+        for conf_type in ['avg', 'max']:
+            for boxes in filtered_boxes.values():
+                weighted_boxes, num_boxes, model_mask = cluster_boxes(
+                    boxes, 0.55, conf_type, 4)
+                ref_weighted_boxes, ref_clusters = _reference_clusters(
+                    boxes, 0.55, conf_type)
+                self.assertTrue(
+                    np.array_equal(weighted_boxes, ref_weighted_boxes))
+                self.assertEqual(num_boxes.tolist(),
+                                 [len(c) for c in ref_clusters])
+                for mask, cluster in zip(model_mask, ref_clusters):
+                    models = np.unique(np.array(cluster)[:, 3]).astype(int)
+                    self.assertEqual(
+                        np.flatnonzero(mask).tolist(), models.tolist())
+
+    def test_batched_weighted_boxes_fusion(self):
+        rng = np.random.RandomState(0)
+        predictions = [_random_predictions(rng, 3, 50, 5) for _ in range(3)]
+        bboxes_lists, scores_lists, labels_lists = zip(*predictions)
+        for nproc in [1, 2]:
+            results = batched_weighted_boxes_fusion(
+                bboxes_lists,
+                scores_lists,
+                labels_lists,
+                conf_type='box_and_model_avg',
+                nproc=nproc)
+            self.assertEqual(len(results), 3)
+            for result, prediction in zip(results, predictions):
+                expected = weighted_boxes_fusion(
+                    *prediction, conf_type='box_and_model_avg')
+                for x, y in zip(result, expected):
+                    self.assertTrue(torch.equal(x, y))
@@ -0,0 +1,66 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+from unittest import TestCase
+
+import torch
+from mmengine.structures import InstanceData
+
+from mmdet.structures import DetDataSample
+from mmdet.utils.large_image import NeighborPatchMerger
+
+
+class TestNeighborPatchMerger(TestCase):
+
+    def test_merge(self):
+        patch_size = 100
+        starts = [0, 75, 150]
+        # objects on a grid, each seen by all the patches containing it
+        objects = torch.tensor([[x, y, x + 20, y + 20]
+                                for x in range(5, 230, 30)
+                                for y in range(5, 230, 30)]).float()
+        labels = torch.arange(len(objects)) % 3
+
+        merger = NeighborPatchMerger(
+            starts,
+            starts, (patch_size, patch_size),
+            nms_cfg=dict(type='nms', iou_threshold=0.5))
+        best_scores = torch.zeros(len(objects))
+        for row, y in enumerate(starts):
+            results = []
+            for x in starts:
+                inside = (objects[:, 0] >= x) & (objects[:, 1] >= y) & \
+                    (objects[:, 2] <= x + patch_size) & \
+                    (objects[:, 3] <= y + patch_size)
+                scores = torch.rand(len(objects))
+                best_scores[inside] = torch.maximum(best_scores[inside],
+                                                    scores[inside])
+                bboxes = objects[inside] - torch.tensor([x, y, x, y])
+                results.append(
+                    DetDataSample(
+                        pred_instances=InstanceData(
+                            bboxes=bboxes,
+                            scores=scores[inside],
+                            labels=labels[inside])))
+            merger.add_row(row, results)
+        merged = merger.merge()
+
+        # every object is kept once with its best score
+        self.assertEqual(len(merged), len(objects))
+        order = torch.argsort(merged.bboxes[:, 0] * 1000 + merged.bboxes[:, 1])
+        gt_order = torch.argsort(objects[:, 0] * 1000 + objects[:, 1])
+        self.assertTrue(
+            torch.allclose(merged.bboxes[order], objects[gt_order]))
+        self.assertTrue(
+            torch.allclose(merged.scores[order], best_scores[gt_order]))
+        self.assertTrue(torch.equal(merged.labels[order], labels[gt_order]))
+
+    def test_empty(self):
+        merger = NeighborPatchMerger([0], [0], (100, 100),
+                                     dict(type='nms', iou_threshold=0.5))
+        merger.add_row(0, [
+            DetDataSample(
+                pred_instances=InstanceData(
+                    bboxes=torch.zeros((0, 4)),
+                    scores=torch.zeros((0, )),
+                    labels=torch.zeros((0, ), dtype=torch.long)))
+        ])
+        self.assertEqual(len(merger.merge()), 0)
@@ -113,6 +113,59 @@ class TestDetLocalVisualizer(TestCase):
             det_local_visualizer.add_datasample(
                 'image', image, det_data_sample, out_file=out_file)
 
+    def test_cv2_backend(self):
+        torch.manual_seed(0)
+        np.random.seed(0)
+        h = 120
+        w = 100
+        num_bboxes = 5
+        image = np.random.randint(0, 256, size=(h, w, 3)).astype('uint8')
+        masks = np.zeros((num_bboxes, h, w), dtype=bool)
+        bboxes = _rand_bboxes(num_bboxes, h, w)
+        for mask, (x1, y1, x2, y2) in zip(masks, bboxes.int().tolist()):
+            mask[y1:y2, x1:x2] = True
+        instances = InstanceData(
+            bboxes=bboxes,
+            labels=torch.randint(0, 3, (num_bboxes, )),
+            scores=torch.rand((num_bboxes, )),
+            masks=masks)
+        classes = ('a', 'b', 'c')
+
+        with self.assertRaises(AssertionError):
+            DetLocalVisualizer(draw_backend='pil')
+        mpl_visualizer = DetLocalVisualizer()
+        cv2_visualizer = DetLocalVisualizer(
+            name='cv2_visualizer', draw_backend='cv2')
+        # the mask colors are jittered randomly
+        no_scores = InstanceData(
+            bboxes=bboxes, labels=instances.labels, masks=masks)
+        for draw_instances in (instances, instances[:0], no_scores):
+            np.random.seed(0)
+            expected = mpl_visualizer._draw_instances(image, draw_instances,
+                                                      classes, None)
+            np.random.seed(0)
+            drawn = cv2_visualizer._draw_instances(image, draw_instances,
+                                                   classes, None)
+            self.assertEqual(drawn.shape, expected.shape)
+            self._assert_image_close(drawn, expected)
+
+        # masks without bboxes
+        instances.bboxes = torch.zeros_like(bboxes)
+        drawn = cv2_visualizer._draw_instances(image, instances, classes, None)
+        self.assertEqual(drawn.shape, (h, w, 3))
+
+        panoptic_seg = PixelData(sem_seg=_create_panoptic_data(3, h, w))
+        expected = mpl_visualizer._draw_panoptic_seg(image, panoptic_seg,
+                                                     ('1', '2', '3'), None)
+        drawn = cv2_visualizer._draw_panoptic_seg(image, panoptic_seg,
+                                                  ('1', '2', '3'), None)
+        self._assert_image_close(drawn, expected)
+
+    def _assert_image_close(self, drawn, expected):
+        # the glyphs and the anti-aliased edges may differ by a pixel
+        diff = np.abs(drawn.astype(float) - expected.astype(float)).max(-1)
+        self.assertLess((diff > 32).mean(), 0.1)
+
     def _assert_image_and_shape(self, out_file, out_shape):
         assert os.path.exists(out_file)
         drawn_img = cv2.imread(out_file)
@@ -2,11 +2,10 @@ import argparse
 
 from mmengine.fileio import dump, load
 from mmengine.logging import print_log
-from mmengine.utils import ProgressBar
 from pycocotools.coco import COCO
 from pycocotools.cocoeval import COCOeval
 
-from mmdet.models.utils import weighted_boxes_fusion
+from mmdet.models.utils import batched_weighted_boxes_fusion
 
 
 def parse_args():
@@ -55,6 +54,11 @@ def parse_args():
         type=str,
         default='outputs',
         help='Output directory of images or prediction results.')
+    parser.add_argument(
+        '--nproc',
+        type=int,
+        default=1,
+        help='Processes used for fusing the results of images in parallel.')
 
     args = parser.parse_args()
 
@@ -102,18 +106,20 @@ def main():
             p['scores_list'][i].append(pred['score'])
             p['labels_list'][i].append(pred['category_id'])
 
-    result = []
-    prog_bar = ProgressBar(len(predict))
-    for image_id, res in predict.items():
-        bboxes, scores, labels = weighted_boxes_fusion(
-            res['bboxes_list'],
-            res['scores_list'],
-            res['labels_list'],
-            weights=args.weights,
-            iou_thr=args.fusion_iou_thr,
-            skip_box_thr=args.skip_box_thr,
-            conf_type=args.conf_type)
+    image_ids = list(predict)
+    fused_results = batched_weighted_boxes_fusion(
+        [predict[image_id]['bboxes_list'] for image_id in image_ids],
+        [predict[image_id]['scores_list'] for image_id in image_ids],
+        [predict[image_id]['labels_list'] for image_id in image_ids],
+        weights=args.weights,
+        iou_thr=args.fusion_iou_thr,
+        skip_box_thr=args.skip_box_thr,
+        conf_type=args.conf_type,
+        nproc=args.nproc,
+        show_progress=True)
 
+    result = []
+    for image_id, (bboxes, scores, labels) in zip(image_ids, fused_results):
         for bbox, score, label in zip(bboxes, scores, labels):
             result.append({
                 'bbox': bbox.numpy().tolist(),
@@ -122,8 +128,6 @@ def main():
                 'score': float(score)
             })
 
-        prog_bar.update()
-
     if args.save_fusion_results:
         out_file = args.out_dir + '/fusion_results.json'
         dump(result, file=out_file)
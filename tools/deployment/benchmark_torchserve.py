@@ -0,0 +1,147 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+import os.path as osp
+import time
+from argparse import ArgumentParser
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import numpy as np
+import requests
+from mmengine.fileio import list_dir_or_file
+
+IMG_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+
+def parse_args():
+    parser = ArgumentParser(
+        description='Replay image requests to measure the throughput of the '
+        'MMDetection TorchServe handler.')
+    parser.add_argument('img_dir', help='Directory of the replayed images')
+    parser.add_argument(
+        '--config',
+        help='Config file. If given with --checkpoint, the handler runs '
+        'locally without a server.')
+    parser.add_argument('--checkpoint', help='Checkpoint file')
+    parser.add_argument('--model-name', help='The model name in the server')
+    parser.add_argument(
+        '--inference-addr',
+        default='127.0.0.1:8080',
+        help='Address and port of the inference server')
+    parser.add_argument(
+        '--batch-sizes',
+        type=int,
+        nargs='+',
+        default=[1, 2, 4, 8],
+        help='Batch sizes replayed on the local handler')
+    parser.add_argument(
+        '--concurrency',
+        type=int,
+        default=8,
+        help='Number of concurrent clients sending requests to the server')
+    parser.add_argument(
+        '--num-requests',
+        type=int,
+        default=200,
+        help='Number of replayed requests')
+    parser.add_argument(
+        '--num-warmup', type=int, default=5, help='Number of warmup batches')
+    args = parser.parse_args()
+    return args
+
+
+def load_requests(img_dir, num_requests):
+    """Read the raw bytes of the images, cycled to ``num_requests``."""
+    img_paths = sorted(
+        osp.join(img_dir, filename) for filename in list_dir_or_file(
+            img_dir, list_dir=False, suffix=IMG_EXTENSIONS))
+    assert len(img_paths) > 0, f'No image is found in {img_dir}'
+    bodies = []
+    for img_path in img_paths[:num_requests]:
+        with open(img_path, 'rb') as f:
+            bodies.append(f.read())
+    return [bodies[i % len(bodies)] for i in range(num_requests)]
+
+
+def build_local_handler(config, checkpoint, batch_size):
+    """Build the handler with a fake TorchServe context."""
+    from mmdet_handler import MMdetHandler
+
+    context = SimpleNamespace(
+        system_properties=dict(
+            gpu_id=0,
+            model_dir=osp.dirname(osp.abspath(config)),
+            batch_size=batch_size),
+        manifest=dict(model=dict(serializedFile=checkpoint)))
+    handler = MMdetHandler()
+    handler.initialize(context)
+    return handler
+
+
+def benchmark_local(args, bodies):
+    """Replay the requests on a local handler in TorchServe batches."""
+    # the handler expects the config as `config.py` in the model dir
+    from mmengine.config import Config
+    from mmengine.utils import mkdir_or_exist
+    work_dir = osp.join('work_dirs', 'torchserve_benchmark')
+    mkdir_or_exist(work_dir)
+    Config.fromfile(args.config).dump(osp.join(work_dir, 'config.py'))
+    checkpoint = osp.abspath(args.checkpoint)
+
+    for batch_size in args.batch_sizes:
+        handler = build_local_handler(
+            osp.join(work_dir, 'config.py'), checkpoint, batch_size)
+        batches = [[dict(body=body) for body in bodies[i:i + batch_size]]
+                   for i in range(0, len(bodies), batch_size)]
+        for batch in batches[:args.num_warmup]:
+            handler.postprocess(handler.inference(handler.preprocess(batch)))
+
+        latencies = []
+        start = time.perf_counter()
+        for batch in batches:
+            batch_start = time.perf_counter()
+            handler.postprocess(handler.inference(handler.preprocess(batch)))
+            latencies.append(time.perf_counter() - batch_start)
+        elapsed = time.perf_counter() - start
+        print(f'batch size: {batch_size}, '
+              f'qps: {len(bodies) / elapsed:.2f}, '
+              f'batch latency: {np.mean(latencies) * 1000:.1f} ms')
+
+
+def benchmark_server(args, bodies):
+    """Replay the requests to a running server with concurrent clients."""
+    url = f'http://{args.inference_addr}/predictions/{args.model_name}'
+
+    def send(body):
+        start = time.perf_counter()
+        response = requests.post(url, body)
+        response.raise_for_status()
+        return time.perf_counter() - start
+
+    for body in bodies[:args.num_warmup]:
+        send(body)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(args.concurrency) as executor:
+        latencies = list(executor.map(send, bodies))
+    elapsed = time.perf_counter() - start
+    latencies = np.array(latencies) * 1000
+    print(f'concurrency: {args.concurrency}, '
+          f'qps: {len(bodies) / elapsed:.2f}, '
+          f'latency mean: {latencies.mean():.1f} ms, '
+          f'p50: {np.percentile(latencies, 50):.1f} ms, '
+          f'p99: {np.percentile(latencies, 99):.1f} ms')
+
+
+def main(args):
+    bodies = load_requests(args.img_dir, args.num_requests)
+    if args.config is not None and args.checkpoint is not None:
+        benchmark_local(args, bodies)
+    else:
+        assert args.model_name is not None, \
+            '--model-name is required to benchmark a running server'
+        benchmark_server(args, bodies)
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    main(args)
@@ -3,6 +3,7 @@ from argparse import ArgumentParser, Namespace
 from pathlib import Path
 from tempfile import TemporaryDirectory
 
+import mmengine
 from mmengine.config import Config
 from mmengine.utils import mkdir_or_exist
 
@@ -20,6 +21,8 @@ def mmdet2torchserve(
     model_name: str,
     model_version: str = '1.0',
     force: bool = False,
+    batch_size: int = 1,
+    max_batch_delay: int = 100,
 ):
     """Converts MMDetection model (config + checkpoint) to TorchServe `.mar`.
 
@@ -42,6 +45,11 @@ def mmdet2torchserve(
         force:
             If True, if there is an existing `{model_name}.mar`
             file under `output_folder` it will be overwritten.
+        batch_size:
+            Maximum number of requests TorchServe aggregates into one
+            batch, which the handler forwards together.
+        max_batch_delay:
+            Maximum time in milliseconds TorchServe waits to fill a batch.
     """
     mkdir_or_exist(output_folder)
 
@@ -49,11 +57,15 @@ def mmdet2torchserve(
 
     with TemporaryDirectory() as tmpdir:
         config.dump(f'{tmpdir}/config.py')
+        # the batch settings of TorchServe are read from the model config
+        mmengine.dump(
+            dict(batchSize=batch_size, maxBatchDelay=max_batch_delay),
+            f'{tmpdir}/model-config.yaml')
 
         args = Namespace(
             **{
                 'model_file': f'{tmpdir}/config.py',
-                'config_file': f'{tmpdir}/config.py',
+                'config_file': f'{tmpdir}/model-config.yaml',
                 'serialized_file': checkpoint_file,
                 'handler': f'{Path(__file__).parent}/mmdet_handler.py',
                 'model_name': model_name or Path(checkpoint_file).stem,
@@ -96,6 +108,16 @@ def parse_args():
         '--force',
         action='store_true',
         help='overwrite the existing `{model_name}.mar`')
+    parser.add_argument(
+        '--batch-size',
+        type=int,
+        default=1,
+        help='Maximum number of requests aggregated into one batch.')
+    parser.add_argument(
+        '--max-batch-delay',
+        type=int,
+        default=100,
+        help='Maximum time in milliseconds to wait for filling a batch.')
     args = parser.parse_args()
 
     return args
@@ -109,4 +131,5 @@ if __name__ == '__main__':
                           'Try: pip install torch-model-archiver')
 
     mmdet2torchserve(args.config, args.checkpoint, args.output_folder,
-                     args.model_name, args.model_version, args.force)
+                     args.model_name, args.model_version, args.force,
+                     args.batch_size, args.max_batch_delay)
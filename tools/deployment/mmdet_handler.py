@@ -11,6 +11,14 @@ from mmdet.apis import inference_detector, init_detector
 
 
 class MMdetHandler(BaseHandler):
+    """TorchServe handler of MMDetection models.
+
+    TorchServe gathers up to ``batchSize`` requests within ``maxBatchDelay``
+    milliseconds (see ``mmdet2torchserve.py``) and passes them to the handler
+    at once. The images of a batch are sorted by aspect ratio, so that images
+    of similar shapes are collated together and little padding is added, and
+    forwarded in chunks of at most ``batch_size`` images.
+    """
     threshold = 0.5
 
     def initialize(self, context):
@@ -20,6 +28,7 @@ class MMdetHandler(BaseHandler):
                                    str(properties.get('gpu_id')) if torch.cuda.
                                    is_available() else self.map_location)
         self.manifest = context.manifest
+        self.batch_size = max(int(properties.get('batch_size') or 1), 1)
 
         model_dir = properties.get('model_dir')
         serialized_file = self.manifest['model']['serializedFile']
@@ -27,6 +36,7 @@ class MMdetHandler(BaseHandler):
         self.config_file = os.path.join(model_dir, 'config.py')
 
         self.model = init_detector(self.config_file, checkpoint, self.device)
+        self.class_names = np.array(self.model.dataset_meta['classes'])
         self.initialized = True
 
     def preprocess(self, data):
@@ -42,7 +52,15 @@ class MMdetHandler(BaseHandler):
         return images
 
     def inference(self, data, *args, **kwargs):
-        results = inference_detector(self.model, data)
+        # bucket images of similar aspect ratios to reduce padding
+        order = sorted(
+            range(len(data)),
+            key=lambda i: data[i].shape[0] / data[i].shape[1])
+        sorted_results = inference_detector(
+            self.model, [data[i] for i in order], batch_size=self.batch_size)
+        results = [None] * len(data)
+        for i, result in zip(order, sorted_results):
+            results[i] = result
         return results
 
     def postprocess(self, data):
@@ -50,23 +68,20 @@ class MMdetHandler(BaseHandler):
         output = []
         for data_sample in data:
             pred_instances = data_sample.pred_instances
-            bboxes = pred_instances.bboxes.cpu().numpy().astype(
-                np.float32).tolist()
-            labels = pred_instances.labels.cpu().numpy().astype(
-                np.int32).tolist()
-            scores = pred_instances.scores.cpu().numpy().astype(
-                np.float32).tolist()
-            preds = []
-            for idx in range(len(labels)):
-                cls_score, bbox, cls_label = scores[idx], bboxes[idx], labels[
-                    idx]
-                if cls_score >= self.threshold:
-                    class_name = self.model.dataset_meta['classes'][cls_label]
-                    result = dict(
-                        class_label=cls_label,
-                        class_name=class_name,
-                        bbox=bbox,
-                        score=cls_score)
-                    preds.append(result)
+            keep = pred_instances.scores >= self.threshold
+            pred_instances = pred_instances[keep].cpu().numpy()
+            labels = pred_instances.labels.astype(np.int32)
+            class_names = self.class_names[labels].tolist()
+            preds = [
+                dict(
+                    class_label=cls_label,
+                    class_name=class_name,
+                    bbox=bbox,
+                    score=cls_score)
+                for cls_label, class_name, bbox, cls_score in zip(
+                    labels.tolist(), class_names,
+                    pred_instances.bboxes.astype(np.float32).tolist(),
+                    pred_instances.scores.astype(np.float32).tolist())
+            ]
             output.append(preds)
         return output